@@ -0,0 +1 @@
+# NEXUS Benchmarks - load generators, fakes and stub servers (never imported by the API)
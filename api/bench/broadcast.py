@@ -0,0 +1,120 @@
+"""
+SSE Broadcast Benchmark - per-client polling vs BroadcastHub fan-out
+Simulated subscribers measure delivery latency and CPU per update; a share of
+them never read, to show the hub's bounded queues and conflation.
+
+Run: python -m bench.broadcast [--subscribers N] [--updates N] [--slow-fraction F]
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+
+from services.broadcast import BroadcastHub
+
+
+def _sample_state(update: int) -> dict:
+    return {
+        "weather": {"type": "weather", "temperature": 70 + update % 10, "weathercode": 1},
+        "news": [{"type": "news", "title": f"Headline {update - i}", "source": "Wire"} for i in range(5)],
+        "alerts": [],
+        "last_update": f"update-{update}",
+    }
+
+
+async def _bench(subscribers: int, updates: int, interval: float, poll_interval: float, slow_fraction: float):
+    def _report(name: str, latencies: list[float], cpu: float, frames: int):
+        latencies = sorted(latencies) or [0.0]
+        print(f"{name:<20}{frames:>10}{latencies[len(latencies) // 2]:>11.1f}"
+              f"{latencies[int(len(latencies) * 0.99)]:>11.1f}{cpu * 1000 / updates:>15.1f}"
+              f"{cpu * 1e6 / max(frames, 1):>15.1f}")
+
+    print(f"{subscribers} subscribers, {updates} updates every {interval:.1f}s")
+    print(f"{'mode':<20}{'frames':>10}{'p50 ms':>11}{'p99 ms':>11}{'cpu ms/update':>15}{'cpu us/frame':>15}")
+
+    # Before: every client wakes on its own timer, copies the state and re-serializes it
+    state = {"current": _sample_state(0), "update": 0}
+    update_times = [0.0]
+    latencies: list[float] = []
+    frames = 0
+
+    async def poller():
+        nonlocal frames
+        last_sent = None
+        seen = 0
+        await asyncio.sleep(random.uniform(0, poll_interval))  # Clients connect at different times
+        while True:
+            current = dict(state["current"])
+            if current["last_update"] != last_sent:
+                json.dumps(current)
+                if last_sent is not None:
+                    # Every update since the last wake-up reaches the client only now
+                    now = time.perf_counter()
+                    latencies.extend((now - update_times[u]) * 1000 for u in range(seen + 1, state["update"] + 1))
+                frames += 1
+                last_sent = current["last_update"]
+                seen = state["update"]
+            await asyncio.sleep(poll_interval)
+
+    tasks = [asyncio.create_task(poller()) for _ in range(subscribers)]
+    await asyncio.sleep(poll_interval * 1.5)
+    cpu = time.process_time()
+    for update in range(1, updates + 1):
+        state["current"], state["update"] = _sample_state(update), update
+        update_times.append(time.perf_counter())
+        await asyncio.sleep(interval)
+    await asyncio.sleep(poll_interval)
+    cpu = time.process_time() - cpu
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _report(f"poll every {poll_interval:.0f}s", latencies, cpu, frames)
+
+    # After: one encode per update, pushed to bounded queues; some clients never read
+    hub = BroadcastHub("bench", keepalive=0)
+    published_at = {hub.publish(_sample_state(0)): None}
+    latencies = []
+    frames = 0
+    slow = int(subscribers * slow_fraction)
+
+    async def reader():
+        nonlocal frames
+        async for frame in hub.stream():
+            sent = published_at[frame[4:frame.index(b"\n")].decode()]
+            if sent is not None:  # Skip each client's initial snapshot
+                latencies.append((time.perf_counter() - sent) * 1000)
+            frames += 1
+
+    tasks = [asyncio.create_task(reader()) for _ in range(subscribers - slow)]
+    stuck = [hub.subscribe() for _ in range(slow)]  # Connected but never drained
+    await asyncio.sleep(0.5)
+    cpu = time.process_time()
+    for update in range(1, updates + 1):
+        sent = time.perf_counter()
+        published_at[hub.publish(_sample_state(update))] = sent
+        await asyncio.sleep(interval)
+    cpu = time.process_time() - cpu
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    _report("broadcast hub", latencies, cpu, frames)
+
+    stats = hub.stats()
+    backlog = max((len(s.queue._queue) for s in stuck), default=0)
+    print(f"Slow clients: {slow}, conflated frames: {stats['conflated']}, "
+          f"max backlog per slow client: {backlog} frames (bound {hub.queue_frames})")
+    print("Polling clients only see the state at their next wake-up, so they skip intermediate updates.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fan-out latency and CPU with simulated subscribers")
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--updates", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between updates")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Old per-client poll period")
+    parser.add_argument("--slow-fraction", type=float, default=0.05, help="Subscribers that never read")
+    args = parser.parse_args()
+
+    asyncio.run(_bench(args.subscribers, args.updates, args.interval, args.poll_interval, args.slow_fraction))
@@ -0,0 +1,108 @@
+"""
+ElevenLabs Client Benchmark - per-call vs pooled httpx clients
+Runs against a local TTS-like stub (HTTP/1.1 keep-alive, self-signed TLS by
+default) or a real endpoint, to measure what connection reuse saves.
+
+Run: python -m bench.elevenlabs [--requests N] [--no-tls] [--url URL]
+"""
+
+import os
+import time
+import asyncio
+import argparse
+import threading
+from typing import Optional
+import httpx
+
+from services.elevenlabs import MODEL_ID, _pool_limits
+
+
+def _start_stub_server(tls: bool) -> tuple[str, object]:
+    """Local TTS-like endpoint (HTTP/1.1 keep-alive, optional self-signed TLS)"""
+    import ssl
+    import tempfile
+    import subprocess
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # Headers and body go out in separate writes
+        
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = b"\xff" * 16384
+            self.send_response(200)
+            self.send_header("Content-Type", "audio/mpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    if tls:
+        cert_dir = tempfile.mkdtemp()
+        cert, key = os.path.join(cert_dir, "cert.pem"), os.path.join(cert_dir, "key.pem")
+        subprocess.run(
+            ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-keyout", key, "-out", cert,
+             "-days", "1", "-subj", "/CN=127.0.0.1"],
+            check=True, capture_output=True
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = "https" if tls else "http"
+    return f"{scheme}://127.0.0.1:{server.server_address[1]}/v1/text-to-speech/stub/stream", server
+
+
+async def _bench(url: Optional[str], requests: int, tls: bool):
+    server = None
+    if url is None:
+        url, server = _start_stub_server(tls)
+    payload = {"text": "The Artemis II crew is scheduled to fly around the Moon next year.", "model_id": MODEL_ID}
+    
+    async def _timed(client: httpx.AsyncClient) -> float:
+        start = time.perf_counter()
+        response = await client.post(url, json=payload)
+        await response.aread()
+        return (time.perf_counter() - start) * 1000
+    
+    # Before: a new client (connection pool, TCP + TLS handshake) per call
+    per_call = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        async with httpx.AsyncClient(verify=False) as client:
+            await _timed(client)
+        per_call.append((time.perf_counter() - start) * 1000)
+    
+    # After: one long-lived client; the first call pays the handshake
+    pooled = []
+    async with httpx.AsyncClient(verify=False, limits=_pool_limits()) as client:
+        for _ in range(requests):
+            pooled.append(await _timed(client))
+    
+    if server is not None:
+        server.shutdown()
+    
+    def _p(values: list[float], q: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    print(f"Endpoint: {url} ({requests} sequential requests)")
+    print(f"{'client':<20}{'p50 ms':>9}{'p95 ms':>9}{'first ms':>10}")
+    print(f"{'new per call':<20}{_p(per_call, 0.5):>9.2f}{_p(per_call, 0.95):>9.2f}{per_call[0]:>10.2f}")
+    print(f"{'pooled keep-alive':<20}{_p(pooled, 0.5):>9.2f}{_p(pooled, 0.95):>9.2f}{pooled[0]:>10.2f}")
+    print(f"Per-request saving (p50): {_p(per_call, 0.5) - _p(pooled, 0.5):.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call vs pooled client latency against a stub server")
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--no-tls", action="store_true", help="Plain HTTP stub (TCP connect cost only)")
+    parser.add_argument("--url", help="Benchmark a real endpoint instead of the local stub")
+    args = parser.parse_args()
+
+    asyncio.run(_bench(args.url, args.requests, tls=not args.no_tls))
@@ -0,0 +1,64 @@
+"""
+GAIA Weather Cache Benchmark - upstream calls for users sharing geohash cells
+Simulated users scattered around a set of cities request weather through
+GaiaDataStream with a fake upstream fetch, per geohash precision and with the
+Kafka stream pre-warming each city's cell.
+
+Run: python -m bench.gaia [--users N] [--cities N] [--spread-km KM] [--fetch-ms MS]
+"""
+
+import random
+import asyncio
+import argparse
+from datetime import datetime
+
+from services.gaia import WEATHER_GEOHASH_PRECISION, GaiaDataStream
+
+
+async def _bench(users: int, cities: int, spread_km: float, fetch_ms: float):
+    centers = [(random.uniform(-50, 60), random.uniform(-170, 170)) for _ in range(cities)]
+    population = []
+    for _ in range(users):
+        lat, lon = random.choice(centers)
+        # Users scattered around their city center (1 degree of latitude ~ 111 km)
+        population.append((lat + random.uniform(-1, 1) * spread_km / 111, lon + random.uniform(-1, 1) * spread_km / 111))
+    
+    async def _run(label: str, precision: int, warm: bool = False):
+        gaia = GaiaDataStream(geohash_precision=precision)
+        calls = 0
+        
+        async def fake_fetch(lat: float, lon: float) -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(fetch_ms / 1000)
+            return {"condition": "Clear sky", "temperature": "70°F", "feels_like": "70°F", "mock": False}
+        
+        gaia._fetch_weather = fake_fetch
+        if warm:
+            # The producer publishes each tracked city; the consumer seeds those cells
+            for lat, lon in centers:
+                gaia.warm_from_stream({
+                    "type": "weather", "temperature": 70, "temperature_unit": "fahrenheit",
+                    "timestamp": datetime.utcnow().isoformat(), "location": {"lat": lat, "lon": lon}
+                })
+        
+        await asyncio.gather(*(gaia.get_weather(lat, lon) for lat, lon in population))
+        print(f"{label:<36}{calls:>16}{len(gaia.weather_cache._entries):>10}{gaia.stream_hits:>14}")
+    
+    print(f"{users} users around {cities} cities (within ~{spread_km:.0f} km), upstream fetch {fetch_ms:.0f}ms")
+    print(f"{'weather cache key':<36}{'upstream calls':>16}{'entries':>10}{'stream hits':>14}")
+    await _run("geohash 7 (~150 m, per user)", 7)
+    await _run("geohash 6 (~1 km, like 0.01 deg)", 6)
+    await _run(f"geohash {WEATHER_GEOHASH_PRECISION} (~5 km)", WEATHER_GEOHASH_PRECISION)
+    await _run(f"geohash {WEATHER_GEOHASH_PRECISION} + stream warm", WEATHER_GEOHASH_PRECISION, warm=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Upstream weather calls for many users sharing geohash cells")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--spread-km", type=float, default=3)
+    parser.add_argument("--fetch-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(_bench(args.users, args.cities, args.spread_km, args.fetch_ms))
@@ -0,0 +1,187 @@
+"""
+GAIA Consumer Benchmarks - event-loop lag, throughput and snapshot reads
+- bench: the old blocking poll + sleep loop vs the batched consumer thread,
+  against an in-memory broker that offers messages at a fixed rate
+- snapshot: per-read cost of the versioned snapshot vs copy + json.dumps
+
+Run: python -m bench.gaia_consumer {bench,snapshot}
+"""
+
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+
+from consumers.gaia_consumer import (
+    GAIA_TOPIC, BatchedGaiaConsumer, get_gaia_snapshot, update_cache, update_cache_bulk
+)
+
+
+class _FakeMessage:
+    def __init__(self, value: bytes, offset: int):
+        self._value, self._offset = value, offset
+    
+    def error(self):
+        return None
+    
+    def value(self):
+        return self._value
+    
+    def topic(self):
+        return GAIA_TOPIC
+    
+    def partition(self):
+        return 0
+    
+    def offset(self):
+        return self._offset
+
+
+class InMemoryConsumer:
+    """Stand-in broker: messages arrive at a fixed rate; poll/consume block like librdkafka"""
+    
+    def __init__(self, total: int, rate: float):
+        self.total = total
+        self.rate = rate
+        self.started = time.monotonic()
+        self.delivered = 0
+        self.commits = 0
+        kinds = [
+            {"type": "weather", "temperature": 71.2, "weathercode": 1},
+            {"type": "news", "title": "Headline", "source": "Wire"},
+            {"type": "alert", "alert_type": "weather", "message": "Storm", "severity": "low"},
+        ]
+        self._payloads = [json.dumps({**k, "timestamp": datetime.utcnow().isoformat()}).encode() for k in kinds]
+    
+    def _available(self) -> int:
+        arrived = min(self.total, int((time.monotonic() - self.started) * self.rate))
+        return arrived - self.delivered
+    
+    def consume(self, num_messages: int = 1, timeout: float = -1) -> list:
+        deadline = time.monotonic() + timeout
+        while self._available() <= 0 and self.delivered < self.total and time.monotonic() < deadline:
+            time.sleep(0.001)
+        count = min(num_messages, max(0, self._available()))
+        batch = [_FakeMessage(self._payloads[(self.delivered + i) % 3], self.delivered + i) for i in range(count)]
+        self.delivered += count
+        if not batch and self.delivered >= self.total:
+            time.sleep(timeout)
+        return batch
+    
+    def poll(self, timeout: float = -1):
+        batch = self.consume(1, timeout)
+        return batch[0] if batch else None
+    
+    def commit(self, offsets=None, asynchronous=True):
+        self.commits += 1
+    
+    def close(self):
+        pass
+
+
+async def _measure_lag(stop: asyncio.Event, interval: float = 0.01) -> list[float]:
+    """Scheduling delay of a 10ms ticker - how long the loop was unavailable"""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+    return lags
+
+
+async def _bench(total: int, rate: float, seconds: float):
+    def _report(name: str, received: int, elapsed: float, lags: list[float]):
+        lags = sorted(lags) or [0.0]
+        print(f"{name:<22}{received:>9}{received / elapsed:>10.0f}{lags[len(lags) // 2]:>9.2f}"
+              f"{lags[int(len(lags) * 0.99)]:>9.2f}{lags[-1]:>9.2f}")
+    
+    print(f"Stand-in broker: {total} messages offered at {rate:.0f} msg/s, {seconds:.0f}s per run")
+    print(f"{'consumer':<22}{'received':>9}{'msg/s':>10}{'lag p50':>9}{'lag p99':>9}{'lag max':>9}  (ms)")
+    
+    # Before: blocking poll(1.0) on the loop + 100ms sleep per message
+    fake = InMemoryConsumer(total, rate)
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_lag(stop))
+    received = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        msg = fake.poll(1.0)
+        if msg is None:
+            await asyncio.sleep(0.1)
+            continue
+        update_cache(json.loads(msg.value()))
+        received += 1
+        await asyncio.sleep(0.1)
+    stop.set()
+    _report("poll + sleep (old)", received, time.perf_counter() - start, await lag_task)
+    
+    # After: consumer thread + batched handoff
+    fake = InMemoryConsumer(total, rate)
+    batched = BatchedGaiaConsumer(fake, asyncio.get_running_loop(), commit_interval=0.5)
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_lag(stop))
+    apply_task = asyncio.create_task(batched.apply_batches())
+    start = time.perf_counter()
+    batched.start()
+    await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lags = await lag_task
+    batched.stop()
+    apply_task.cancel()
+    _report("batched thread (new)", batched.messages, elapsed, lags)
+    print(f"Commits: {fake.commits} for {batched.batch_count} batches")
+
+
+def _snapshot_bench(reads: int):
+    """Per-read cost: copy + json.dumps of the dict cache vs the snapshot's cached bytes"""
+    fake = InMemoryConsumer(9, rate=1e9)
+    update_cache_bulk([json.loads(msg.value()) for msg in fake.consume(num_messages=9, timeout=0)])
+    snapshot = get_gaia_snapshot()
+    legacy = json.loads(snapshot.body)  # Plain nested dicts, like the old _gaia_cache
+    
+    start = time.perf_counter()
+    for _ in range(reads):
+        json.dumps(legacy.copy()).encode("utf-8")
+    copy_us = (time.perf_counter() - start) * 1e6 / reads
+    
+    start = time.perf_counter()
+    for _ in range(reads):
+        get_gaia_snapshot().body
+    snapshot_us = (time.perf_counter() - start) * 1e6 / reads
+    
+    etag = snapshot.etag
+    start = time.perf_counter()
+    for _ in range(reads):
+        get_gaia_snapshot().etag == etag
+    etag_us = (time.perf_counter() - start) * 1e6 / reads
+    
+    start = time.perf_counter()
+    for _ in range(1000):
+        update_cache_bulk([legacy["weather"]])
+    update_us = (time.perf_counter() - start) * 1e6 / 1000
+    
+    print(f"Cache body: {len(snapshot.body)} bytes, {reads} reads")
+    print(f"{'read path':<34}{'us/read':>10}")
+    print(f"{'copy + json.dumps (old)':<34}{copy_us:>10.2f}")
+    print(f"{'snapshot.body':<34}{snapshot_us:>10.2f}")
+    print(f"{'ETag check (304, no body)':<34}{etag_us:>10.2f}")
+    print(f"Update (build + render snapshot): {update_us:.1f} us per applied batch")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GAIA consumer benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="Event-loop lag and throughput against a stand-in broker")
+    bench.add_argument("--messages", type=int, default=200000)
+    bench.add_argument("--rate", type=float, default=20000, help="Messages per second offered by the broker")
+    bench.add_argument("--seconds", type=float, default=5)
+    snapshot = sub.add_parser("snapshot", help="Read cost of the versioned snapshot vs copy + serialize")
+    snapshot.add_argument("--reads", type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        asyncio.run(_bench(args.messages, args.rate, args.seconds))
+    else:
+        _snapshot_bench(args.reads)
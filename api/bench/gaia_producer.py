@@ -0,0 +1,126 @@
+"""
+GAIA Producer Benchmark - weather fetch and publish volume
+Runs the producer's fetch path against a local Open-Meteo stand-in with a
+fixed latency per request (sequential vs concurrent vs multi-coordinate
+batches), then counts messages published with and without change tracking.
+
+Run: python -m bench.gaia_producer [--locations N] [--cycles N] [--latency-ms MS] [--change-rate R]
+"""
+
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+
+from bench.kafka_producer import InMemoryProducer
+from producers import gaia_producer
+from producers.gaia_producer import (
+    FETCH_CONCURRENCY, GAIA_TOPIC, OPEN_METEO_BATCH_SIZE, ChangeTracker, Location,
+    change_key, fetch_weather_all, fetch_weather_batch, send_to_kafka
+)
+from services.http_clients import close_http_clients
+from services.kafka_producer import AsyncKafkaProducer
+
+
+def _start_open_meteo_stub(latency_ms: float, change_rate: float) -> tuple[str, object]:
+    """Local Open-Meteo-like endpoint: fixed latency per request, any number of coordinates"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+    
+    readings: dict[str, float] = {}
+    lock = threading.Lock()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+        
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            coords = list(zip(query["latitude"][0].split(","), query["longitude"][0].split(",")))
+            time.sleep(latency_ms / 1000)
+            results = []
+            with lock:
+                for coord in coords:
+                    key = ",".join(coord)
+                    if key not in readings or random.random() < change_rate:
+                        readings[key] = round(random.uniform(30, 90), 1)
+                    results.append({"current": {
+                        "temperature_2m": readings[key], "apparent_temperature": readings[key],
+                        "relative_humidity_2m": 50, "wind_speed_10m": 5, "weather_code": 1
+                    }})
+            body = json.dumps(results if len(results) > 1 else results[0]).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1/forecast", server
+
+
+async def _bench(location_count: int, cycles: int, latency_ms: float, change_rate: float):
+    gaia_producer.WEATHER_URL, server = _start_open_meteo_stub(latency_ms, change_rate)
+    locations = [Location(f"city-{i}", round(random.uniform(-60, 70), 4), round(random.uniform(-180, 180), 4))
+                 for i in range(location_count)]
+    
+    print(f"{location_count} locations, stand-in Open-Meteo at {latency_ms:.0f}ms/request, "
+          f"{change_rate:.0%} of readings change per cycle")
+    print(f"{'fetch mode':<34}{'requests':>10}{'cycle ms':>10}")
+    
+    # Before: one request per location, one after another
+    start = time.perf_counter()
+    for location in locations:
+        await fetch_weather_batch([location])
+    print(f"{'sequential, 1 location/request':<34}{location_count:>10}{(time.perf_counter() - start) * 1000:>10.0f}")
+    
+    # Concurrent, still one location per request
+    start = time.perf_counter()
+    await fetch_weather_all(locations, batch_size=1)
+    print(f"{f'concurrent ({FETCH_CONCURRENCY}), 1 location/request':<34}{location_count:>10}"
+          f"{(time.perf_counter() - start) * 1000:>10.0f}")
+    
+    # After: multi-coordinate batches, bounded concurrency
+    start = time.perf_counter()
+    events = await fetch_weather_all(locations)
+    batches = -(-location_count // OPEN_METEO_BATCH_SIZE)
+    print(f"{f'batched ({OPEN_METEO_BATCH_SIZE}/request), concurrent':<34}{batches:>10}"
+          f"{(time.perf_counter() - start) * 1000:>10.0f}")
+    assert len(events) == location_count
+    
+    # Publishing: every value every cycle vs changed values only
+    print(f"\n{'publish mode':<34}{'messages':>10}{'per cycle':>10}")
+    for label, delta in (("republish everything", False), ("changed values only", True)):
+        producer = AsyncKafkaProducer({}, producer=InMemoryProducer())
+        tracker = ChangeTracker()
+        published = 0
+        for _ in range(cycles):
+            events = await fetch_weather_all(locations)
+            if delta:
+                events = [w for w in events if tracker.should_publish(*change_key(w))]
+            await asyncio.gather(*[await send_to_kafka(producer, GAIA_TOPIC, e) for e in events])
+            for event in events:
+                tracker.record(*change_key(event))
+            published += len(events)
+        producer.close()
+        print(f"{label:<34}{published:>10}{published / cycles:>10.0f}")
+    
+    server.shutdown()
+    await close_http_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch and publish volume against a stand-in Open-Meteo")
+    parser.add_argument("--locations", type=int, default=500)
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    args = parser.parse_args()
+
+    asyncio.run(_bench(args.locations, args.cycles, args.latency_ms, args.change_rate))
@@ -0,0 +1,133 @@
+"""
+Kafka Producer Benchmark - flush-per-message vs AsyncKafkaProducer
+Runs against an in-memory stand-in whose every broker request costs a fixed
+round trip, or a real broker with --bootstrap.
+
+Run: python -m bench.kafka_producer [--messages N] [--rtt-ms MS] [--bootstrap HOST:PORT]
+"""
+
+import json
+import time
+import asyncio
+import argparse
+import threading
+from typing import Optional
+from confluent_kafka import Producer
+
+from services.kafka_producer import PRODUCER_TUNING, AsyncKafkaProducer
+
+
+class _FakeMessage:
+    def __init__(self, topic: str, offset: int):
+        self._topic, self._offset = topic, offset
+    
+    def topic(self):
+        return self._topic
+    
+    def partition(self):
+        return 0
+    
+    def offset(self):
+        return self._offset
+
+
+class InMemoryProducer:
+    """
+    Stand-in for confluent_kafka.Producer: every broker request (one batch)
+    costs a fixed round trip; batches form by linger time and size.
+    """
+    
+    def __init__(self, rtt_ms: float = 5.0, linger_ms: float = 20.0, batch_messages: int = 500,
+                 max_queued: int = 100000):
+        self.rtt = rtt_ms / 1000
+        self.linger = linger_ms / 1000
+        self.batch_messages = batch_messages
+        self.max_queued = max_queued
+        self._pending: list = []  # (queued_at, topic, callback)
+        self._lock = threading.Lock()
+        self._offset = 0
+        self.requests = 0
+    
+    def __len__(self):
+        return len(self._pending)
+    
+    def produce(self, topic, value=None, key=None, on_delivery=None):
+        with self._lock:
+            if len(self._pending) >= self.max_queued:
+                raise BufferError("Local: Queue full")
+            self._pending.append((time.monotonic(), topic, on_delivery))
+    
+    def _send_batch(self, force: bool) -> int:
+        with self._lock:
+            if not self._pending:
+                return 0
+            ready = force or len(self._pending) >= self.batch_messages or \
+                time.monotonic() - self._pending[0][0] >= self.linger
+            if not ready:
+                return 0
+            batch, self._pending = self._pending[:self.batch_messages], self._pending[self.batch_messages:]
+        time.sleep(self.rtt)
+        self.requests += 1
+        for _, topic, callback in batch:
+            self._offset += 1
+            if callback:
+                callback(None, _FakeMessage(topic, self._offset))
+        return len(batch)
+    
+    def poll(self, timeout: float = 0) -> int:
+        sent = self._send_batch(force=False)
+        if not sent:
+            time.sleep(min(timeout, self.linger / 4))
+        return sent
+    
+    def flush(self, timeout: float = None) -> int:
+        while self._send_batch(force=True):
+            pass
+        return len(self._pending)
+
+
+async def _bench(messages: int, rtt_ms: float, bootstrap: Optional[str]):
+    payload = json.dumps({"type": "weather", "temperature": 71.2, "humidity": 40}).encode("utf-8")
+    
+    def _make_raw():
+        if bootstrap:
+            return Producer({"bootstrap.servers": bootstrap})
+        return InMemoryProducer(rtt_ms=rtt_ms, linger_ms=PRODUCER_TUNING["linger.ms"])
+    
+    # Before: produce + flush per message
+    raw = _make_raw()
+    start = time.perf_counter()
+    for _ in range(messages):
+        raw.produce("bench", value=payload)
+        raw.flush(5)
+    flush_each_s = time.perf_counter() - start
+    
+    # After: batched async producer, awaiting every delivery future
+    if bootstrap:
+        producer = AsyncKafkaProducer({"bootstrap.servers": bootstrap})
+    else:
+        producer = AsyncKafkaProducer({}, producer=_make_raw())
+    start = time.perf_counter()
+    futures = [await producer.produce("bench", payload) for _ in range(messages)]
+    enqueue_s = time.perf_counter() - start
+    await asyncio.gather(*futures)
+    batched_s = time.perf_counter() - start
+    producer.close()
+    
+    target = bootstrap or f"in-memory stand-in ({rtt_ms:.0f}ms broker round trip)"
+    print(f"{messages} messages -> {target}")
+    print(f"{'mode':<26}{'total s':>9}{'msg/s':>11}")
+    print(f"{'flush per message':<26}{flush_each_s:>9.2f}{messages / flush_each_s:>11.0f}")
+    print(f"{'batched async':<26}{batched_s:>9.2f}{messages / batched_s:>11.0f}")
+    print(f"Event loop blocked while enqueueing: {enqueue_s * 1000:.1f}ms total "
+          f"(flush-per-message blocked it for {flush_each_s * 1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput: flush-per-message vs batched async producer")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--rtt-ms", type=float, default=5.0, help="Simulated broker round trip (stand-in only)")
+    parser.add_argument("--bootstrap", help="Use a real broker, e.g. localhost:9092")
+    args = parser.parse_args()
+
+    asyncio.run(_bench(args.messages, args.rtt_ms, args.bootstrap))
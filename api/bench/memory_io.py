@@ -0,0 +1,108 @@
+"""
+ECHO Memory I/O Benchmark - turn latency as concurrent sessions grow
+N simulated sessions each run turns (aget_memory, context read, aadd_exchange)
+with think time in between, against a journal store in a temporary directory
+with simulated storage latency (a network disk, not the page cache). Compares
+the async API on the memory I/O executor with the old synchronous calls on
+the event loop. Turn latency counts from when the turn was due, so it includes
+waiting for a blocked loop; loop lag is how long any other request would stall.
+
+Run: python -m bench.memory_io [--sessions 1,10,50,200] [--turns N] [--think-ms MS] [--disk-ms MS]
+"""
+
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+from services import memory, memory_store
+from services.memory import aget_memory, get_memory, set_summarizer
+from services.memory_store import JsonMemoryStore
+
+
+async def _keep_summary(previous_summary: str, messages: list[dict]) -> str:
+    return previous_summary  # No Gemini calls; summarization is not what is measured
+
+
+def _slow_store(store: JsonMemoryStore, delay: float) -> JsonMemoryStore:
+    """Add a fixed delay to every storage call"""
+    def _delayed(method):
+        def call(*args, **kwargs):
+            time.sleep(delay)
+            return method(*args, **kwargs)
+        return call
+
+    for name in dir(store):
+        method = getattr(store, name)
+        if not name.startswith("_") and callable(method):
+            setattr(store, name, _delayed(method))
+    return store
+
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values) or [0.0]
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+async def _run(sessions: int, turns: int, think: float, use_executor: bool) -> tuple[list[float], list[float]]:
+    """Turn latencies and event loop lag samples (ms) for one load level"""
+    latencies: list[float] = []
+    lags: list[float] = []
+    mode = "async" if use_executor else "sync"
+
+    async def session(i: int):
+        user_id, session_id = f"{mode}-{sessions}-u{i}", f"{mode}-{sessions}-s{i}"
+        due = time.perf_counter() + random.uniform(0, think)  # Users don't arrive in lockstep
+        for turn in range(turns):
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            if use_executor:
+                manager = await aget_memory(user_id, session_id)
+                await manager.aget_context_sections()
+                await manager.aadd_exchange(f"question {turn} from {i}", f"answer {turn} " * 20)
+            else:
+                manager = get_memory(user_id, session_id)
+                manager.get_context_sections()
+                manager.add_exchange(f"question {turn} from {i}", f"answer {turn} " * 20)
+            done = time.perf_counter()
+            latencies.append((done - due) * 1000)
+            due = done + think
+
+    async def ticker(interval: float = 0.005):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append((time.perf_counter() - start - interval) * 1000)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    tick.cancel()
+    return latencies, lags
+
+
+def _bench(session_counts: list[int], turns: int, think_ms: float, disk_ms: float):
+    think = think_ms / 1000
+    print(f"{turns} turns per session, {think_ms:.0f}ms think time, {disk_ms:.1f}ms per storage call")
+    print(f"{'mode':<8}{'sessions':>10}{'turn p50':>11}{'turn p99':>11}{'lag p99':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        memory_store._store_instance = _slow_store(JsonMemoryStore(tmp), disk_ms / 1000)
+        memory.get_vector_index = lambda user_id: None  # Recall cost: see bench.vector_index
+        set_summarizer(_keep_summary)
+        for use_executor in (False, True):
+            for sessions in session_counts:
+                latencies, lags = asyncio.run(_run(sessions, turns, think, use_executor))
+                print(f"{'async' if use_executor else 'sync':<8}{sessions:>10}"
+                      f"{_percentile(latencies, 0.5):>9.2f}ms{_percentile(latencies, 0.99):>9.2f}ms"
+                      f"{_percentile(lags, 0.99):>9.2f}ms")
+        memory.shutdown_memory_io()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ECHO memory I/O under concurrent sessions")
+    parser.add_argument("--sessions", default="1,10,50,200", help="Comma-separated session counts")
+    parser.add_argument("--turns", type=int, default=20, help="Turns per session")
+    parser.add_argument("--think-ms", type=float, default=500, help="Pause between a session's turns")
+    parser.add_argument("--disk-ms", type=float, default=1.0, help="Simulated latency per storage call")
+    args = parser.parse_args()
+
+    _bench([int(s) for s in args.sessions.split(",")], args.turns, args.think_ms, args.disk_ms)
@@ -0,0 +1,98 @@
+"""
+Search Gate Evaluation - services.search_gate vs the is_question heuristic
+The feature weights are tuned on the train set only; the held-out set is
+the accuracy to quote, so don't tune on its misses - once a held-out set has
+been looked at for tuning, fold it into train and label a fresh one.
+Labelled queries live in tests/data.
+
+Run: python -m bench.search_gate [-v]
+"""
+
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+
+from services.search_gate import needs_search, score_query
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "tests" / "data"
+
+
+def load_labelled(split: str) -> list[tuple[str, bool]]:
+    """(query, needs web search) pairs of the "train" or "heldout" split"""
+    with open(DATA_DIR / f"search_gate_{split}.jsonl", encoding="utf-8") as f:
+        return [(row["query"], row["needs_search"]) for row in map(json.loads, f) if row]
+
+
+def _evaluate(gate, labelled: list[tuple[str, bool]], search_ms: float) -> dict:
+    tp = fp = tn = fn = 0
+    for text, label in labelled:
+        predicted = gate(text)
+        if predicted and label:
+            tp += 1
+        elif predicted:
+            fp += 1
+        elif label:
+            fn += 1
+        else:
+            tn += 1
+
+    iterations = 2000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for text, _ in labelled:
+            gate(text)
+    per_call_us = (time.perf_counter() - start) / (iterations * len(labelled)) * 1e6
+
+    searches = tp + fp
+    return {
+        "accuracy": (tp + tn) / len(labelled),
+        "precision": tp / searches if searches else 0.0,
+        "recall": tp / (tp + fn) if tp + fn else 0.0,
+        "searches": searches,
+        "needless_searches": fp,
+        "missed_searches": fn,
+        "gate_us": per_call_us,
+        "search_time_ms": searches * search_ms,
+    }
+
+
+def _report(search_ms: float, verbose: bool):
+    from services.prometheus import is_question
+
+    for split in ("train", "heldout"):
+        labelled = load_labelled(split)
+        total = len(labelled)
+        positives = sum(1 for _, label in labelled if label)
+        print(f"{split} set: {total} queries ({positives} need search), assumed search latency {search_ms:.0f}ms")
+
+        results = {"heuristic (is_question)": _evaluate(is_question, labelled, search_ms),
+                   "classifier (needs_search)": _evaluate(needs_search, labelled, search_ms)}
+        print(f"{'gate':<28}{'acc':>7}{'prec':>7}{'recall':>8}{'searches':>10}{'needless':>10}{'missed':>8}{'gate us':>9}")
+        for name, r in results.items():
+            print(f"{name:<28}{r['accuracy']:>7.2f}{r['precision']:>7.2f}{r['recall']:>8.2f}"
+                  f"{r['searches']:>10}{r['needless_searches']:>10}{r['missed_searches']:>8}{r['gate_us']:>9.1f}")
+
+        old, new = results["heuristic (is_question)"], results["classifier (needs_search)"]
+        saved_ms = old["search_time_ms"] - new["search_time_ms"]
+        print(f"Search time: {old['search_time_ms']:.0f}ms -> {new['search_time_ms']:.0f}ms "
+              f"(saved {saved_ms:.0f}ms, {saved_ms / total:.0f}ms per turn on average)")
+
+        if verbose:
+            misclassified = [(text, label) for text, label in labelled if needs_search(text) != label]
+            print(f"Misclassified: {len(misclassified)}")
+            for text, label in misclassified:
+                score, fired = score_query(text)
+                print(f"  expected={label!s:<5} score={score:+.1f} {fired} {text!r}")
+        print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate the PROMETHEUS search gate")
+    parser.add_argument("--search-ms", type=float, default=float(os.getenv("SEARCH_LATENCY_MS", "800")),
+                        help="Typical Tavily round trip used for the latency-saved estimate")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List misclassified queries")
+    args = parser.parse_args()
+
+    _report(args.search_ms, args.verbose)
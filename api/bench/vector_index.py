@@ -0,0 +1,60 @@
+"""
+ECHO Recall Index Benchmark - flat vs IVF search latency
+Builds random unit-vector indexes of each size in a temporary directory and
+times top-5 searches, including the first (IVF training) query.
+
+Run: python -m bench.vector_index [--sizes 10000,100000,1000000]
+"""
+
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from services import vector_index
+from services.vector_index import EMBEDDING_DIM, VectorIndex
+
+
+def _bench(sizes: list[int], queries: int = 50):
+    """Recall latency for flat and IVF search at several index sizes"""
+    rng = np.random.default_rng(42)
+    vocab = [f"w{i}" for i in range(5000)]
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            vectors = rng.standard_normal((n, EMBEDDING_DIM), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors.tofile(Path(tmp) / "vectors_bench.f32")
+            with open(Path(tmp) / "vectors_bench.jsonl", "w") as f:
+                f.writelines('{"i": %d}\n' % i for i in range(n))
+
+            index = VectorIndex("bench", base_dir=Path(tmp))
+            texts = [" ".join(rng.choice(vocab, 12)) for _ in range(queries)]
+
+            for mode, threshold in (("flat", n + 1), ("ivf", 0)):
+                vector_index.IVF_MIN_VECTORS = threshold
+                index._ivf = None
+                train_start = time.perf_counter()
+                index.search(texts[0], budget_ms=1e9, min_score=-1.0)  # Warm up / start IVF training
+                while index._ivf_training:
+                    time.sleep(0.01)
+                train_ms = (time.perf_counter() - train_start) * 1000
+
+                timings = []
+                for text in texts:
+                    start = time.perf_counter()
+                    index.search(text, k=5, budget_ms=1e9, min_score=-1.0)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                print(f"[BENCH] n={n:>9,} {mode:4}  p50={timings[len(timings) // 2]:8.2f}ms  "
+                      f"p99={timings[int(len(timings) * 0.99) - 1]:8.2f}ms  first={train_ms:8.1f}ms")
+            del index
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark ECHO recall latency")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated index sizes")
+    args = parser.parse_args()
+
+    _bench([int(s) for s in args.sizes.split(",")])
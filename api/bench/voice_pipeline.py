@@ -0,0 +1,135 @@
+"""
+Voice Pipeline Benchmarks - services.voice_pipeline against fake backends
+Fake Gemini (first-token latency, then one word per tick) and fake
+ElevenLabs (first-byte latency, frames proportional to text length).
+
+Time-to-first-audio, blob vs sentence pipeline: python -m bench.voice_pipeline bench
+Base64-JSON vs binary audio/mpeg responses: python -m bench.voice_pipeline transport
+"""
+
+import os
+import re
+import json
+import time
+import base64
+import asyncio
+import argparse
+import tracemalloc
+from typing import AsyncGenerator
+
+from services.voice_pipeline import speak_stream
+
+
+async def _fake_llm(text: str, first_token_ms: float, token_ms: float) -> AsyncGenerator[str, None]:
+    await asyncio.sleep(first_token_ms / 1000)
+    for word in re.findall(r"\S+\s*", text):
+        yield word
+        await asyncio.sleep(token_ms / 1000)
+
+
+def _fake_tts(first_byte_ms: float, ms_per_char: float, frame_ms: float = 40):
+    """Fake streaming TTS: first-byte latency, then frames at a rate proportional to text length"""
+    async def tts(text: str) -> AsyncGenerator[bytes, None]:
+        await asyncio.sleep(first_byte_ms / 1000)
+        frames = max(1, int(len(text) * ms_per_char / frame_ms))
+        for _ in range(frames):
+            yield b"\xff" * 1024
+            await asyncio.sleep(frame_ms / 1000)
+    return tts
+
+
+async def _bench(first_token_ms: float, token_ms: float, first_byte_ms: float, ms_per_char: float):
+    text = (
+        "The Artemis II crew is scheduled to fly around the Moon next year. "
+        "It will be the first crewed lunar mission since Apollo 17 in 1972. "
+        "The four astronauts will test Orion's life support systems on a ten day flight. "
+        "If all goes well, Artemis III will attempt a landing near the lunar south pole."
+    )
+    tts = _fake_tts(first_byte_ms, ms_per_char)
+
+    # Before: whole response, then whole-text TTS joined into one blob
+    start = time.perf_counter()
+    full = "".join([chunk async for chunk in _fake_llm(text, first_token_ms, token_ms)])
+    audio = b"".join([frame async for frame in tts(full)])
+    sequential_ms = (time.perf_counter() - start) * 1000
+
+    # After: sentence-pipelined streaming
+    start = time.perf_counter()
+    first_audio_ms = None
+    pipelined_bytes = 0
+    async for event in speak_stream(_fake_llm(text, first_token_ms, token_ms), tts):
+        if event["type"] == "audio":
+            pipelined_bytes += len(event["data"])
+            if first_audio_ms is None:
+                first_audio_ms = (time.perf_counter() - start) * 1000
+    pipelined_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Fake LLM: first token {first_token_ms:.0f}ms, {token_ms:.0f}ms/token; "
+          f"fake TTS: first byte {first_byte_ms:.0f}ms, {ms_per_char:.0f}ms/char")
+    print(f"{'mode':<22}{'first audio ms':>16}{'last audio ms':>16}{'bytes':>10}")
+    print(f"{'sequential (blob)':<22}{sequential_ms:>16.0f}{sequential_ms:>16.0f}{len(audio):>10}")
+    print(f"{'sentence pipeline':<22}{first_audio_ms:>16.0f}{pipelined_ms:>16.0f}{pipelined_bytes:>10}")
+    print(f"Time-to-first-audio: {sequential_ms / first_audio_ms:.1f}x faster")
+
+
+def _transport_comparison(frame_bytes: int = 4096):
+    """Peak memory and serialize/parse time: base64-in-JSON vs streamed audio/mpeg"""
+    text = "The Artemis II crew is scheduled to fly around the Moon next year. " * 3
+    # mp3_44100_128 is 16 KB per second of speech
+    sizes = {"5s reply": 5 * 16_000, "20s reply": 20 * 16_000, "60s reply": 60 * 16_000}
+
+    print(f"{'audio':<11}{'mode':<9}{'body KB':>9}{'server peak KB':>16}{'server ms':>11}"
+          f"{'client ms':>11}{'first-play ms':>15}")
+    for label, size in sizes.items():
+        audio = os.urandom(size)
+
+        # JSON: whole clip -> base64 str -> JSON document; client must parse it all before playing
+        tracemalloc.start()
+        start = time.perf_counter()
+        body = json.dumps({"text": text, "audio": base64.b64encode(audio).decode("utf-8"),
+                           "audio_format": "mp3"}).encode("utf-8")
+        server_ms = (time.perf_counter() - start) * 1000
+        server_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        decoded = base64.b64decode(json.loads(body)["audio"])
+        client_ms = (time.perf_counter() - start) * 1000
+        assert decoded == audio
+        print(f"{label:<11}{'json':<9}{len(body) / 1024:>9.0f}{server_peak / 1024:>16.0f}{server_ms:>11.2f}"
+              f"{client_ms:>11.2f}{server_ms + client_ms:>15.2f}")
+
+        # Binary: frames pass straight through; text rides in a header
+        tracemalloc.start()
+        start = time.perf_counter()
+        sent = 0
+        first_frame_ms = None
+        for offset in range(0, size, frame_bytes):
+            frame = audio[offset:offset + frame_bytes]
+            sent += len(frame)
+            if first_frame_ms is None:
+                first_frame_ms = (time.perf_counter() - start) * 1000
+        server_ms = (time.perf_counter() - start) * 1000
+        server_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{'':<11}{'binary':<9}{sent / 1024:>9.0f}{server_peak / 1024:>16.0f}{server_ms:>11.2f}"
+              f"{0.0:>11.2f}{first_frame_ms:>15.2f}")
+
+    print("\nServer peak excludes the source clip itself. Body size drives transfer time: "
+          "base64 adds ~33% on the wire.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Voice pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench = sub.add_parser("bench", help="Time-to-first-audio against fake LLM/TTS backends")
+    bench.add_argument("--first-token-ms", type=float, default=400)
+    bench.add_argument("--token-ms", type=float, default=25)
+    bench.add_argument("--first-byte-ms", type=float, default=300)
+    bench.add_argument("--ms-per-char", type=float, default=4)
+    sub.add_parser("transport", help="Compare base64-JSON vs binary audio responses")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        asyncio.run(_bench(args.first_token_ms, args.token_ms, args.first_byte_ms, args.ms_per_char))
+    else:
+        _transport_comparison()
@@ -1,15 +1,33 @@
 """
 GAIA Consumer - Consumes real-time Earth data from Confluent Kafka
 Used by FastAPI to serve SSE stream to frontend
+
+The blocking Kafka client runs on its own thread: it pulls batches with
+consume(num_messages=N), decodes them there, and hands each batch to the
+event loop through a bounded queue. The loop applies a batch as one swap of
+the immutable cache snapshot; offsets of applied batches are committed
+periodically.
+
+Check event-loop responsiveness against a stand-in broker:
+python -m bench.gaia_consumer bench
+Compare snapshot reads with copy + serialize:
+python -m bench.gaia_consumer snapshot
 """
 
 import os
 import json
+import time
 import asyncio
+import threading
+from dataclasses import dataclass
 from datetime import datetime
-from typing import AsyncGenerator, Optional
+from types import MappingProxyType
+from typing import AsyncGenerator, Mapping, Optional
 from dotenv import load_dotenv
 
+from services.broadcast import BroadcastHub
+from services.gaia import DEFAULT_LAT, DEFAULT_LON, get_gaia, location_key
+
 load_dotenv()
 
 # Confluent Cloud configuration
@@ -21,44 +39,324 @@ CONFLUENT_CONFIG = {
     'sasl.password': os.getenv('CONFLUENT_API_SECRET', ''),
     'group.id': 'nexus-gaia-consumer',
     'auto.offset.reset': 'latest',
+    'enable.auto.commit': False,  # Committed after batches are applied
 }
 
 GAIA_TOPIC = 'gaia-updates'
 ALERTS_TOPIC = 'gaia-alerts'
 
-# In-memory cache of latest GAIA data (updated by background consumer)
-_gaia_cache = {
-    "weather": None,
-    "news": [],
-    "alerts": [],
-    "last_update": None
-}
+# Batching
+CONSUMER_BATCH_SIZE = int(os.getenv('GAIA_CONSUMER_BATCH_SIZE', '500'))
+CONSUMER_BATCH_TIMEOUT = float(os.getenv('GAIA_CONSUMER_BATCH_TIMEOUT', '0.5'))  # Max wait to fill a batch
+CONSUMER_QUEUE_BATCHES = int(os.getenv('GAIA_CONSUMER_QUEUE_BATCHES', '8'))  # Handoff queue bound
+COMMIT_INTERVAL_SECONDS = float(os.getenv('GAIA_CONSUMER_COMMIT_INTERVAL', '2.0'))
+CONSUMER_STOP_TIMEOUT = float(os.getenv('GAIA_CONSUMER_STOP_TIMEOUT', '5.0'))  # Bound on the final commit + close
+ERROR_BACKOFF_SECONDS = 1.0       # First retry delay after consume() fails, doubled per failure
+ERROR_BACKOFF_MAX_SECONDS = 30.0
+
+NEWS_KEEP = 5
+ALERTS_KEEP = 3
+# The snapshot/SSE stream shows the default city's weather; the producer's other
+# locations only warm the per-user GAIA weather cache
+SNAPSHOT_WEATHER_KEY = location_key(DEFAULT_LAT, DEFAULT_LON)
+
+# ============ Snapshot ============
+
+_BOOT_ID = format(time.time_ns() // 1_000_000, "x")  # Keeps ETags from matching across restarts
+
+
+def _freeze(value):
+    """Read-only deep view: dicts -> mappingproxy, lists -> tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, MappingProxyType):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+@dataclass(frozen=True)
+class GaiaSnapshot:
+    """
+    Latest GAIA data as one immutable, versioned object.
+    Updates build a new snapshot and swap the reference, so readers share it
+    without copying and never see a half-applied batch.
+    """
+    version: int
+    data: Mapping  # {"weather", "news", "alerts", "last_update"}, read-only
+    body: bytes    # JSON rendering, encoded once per version
+    
+    @property
+    def etag(self) -> str:
+        return f'"gaia-{_BOOT_ID}-{self.version}"'
+    
+    @classmethod
+    def build(cls, version: int, weather, news: tuple, alerts: tuple, last_update: Optional[str]) -> "GaiaSnapshot":
+        data = _freeze({"weather": weather, "news": news, "alerts": alerts, "last_update": last_update})
+        return cls(version, data, json.dumps(data, default=_json_default).encode("utf-8"))
+
+
+# Latest GAIA data (replaced by the background consumer, never mutated)
+_snapshot = GaiaSnapshot.build(0, None, (), (), None)
+
+
+def get_gaia_snapshot() -> GaiaSnapshot:
+    """Current snapshot - version, read-only data and pre-rendered JSON"""
+    return _snapshot
 
 
-def get_cached_gaia_data() -> dict:
-    """Get the latest cached GAIA data (non-blocking)"""
-    return _gaia_cache.copy()
+def get_cached_gaia_data() -> Mapping:
+    """Get the latest cached GAIA data (non-blocking, read-only, no copy)"""
+    return _snapshot.data
 
 
 def update_cache(data: dict):
     """Update the in-memory cache with new data"""
-    data_type = data.get("type")
+    update_cache_bulk([data])
+
+
+def _latest_headlines(news: tuple) -> tuple:
+    """Newest NEWS_KEEP headlines; the producer re-sends the current set, so repeats are dropped"""
+    seen, latest = set(), []
+    for item in news:
+        if item.get("title") not in seen:
+            seen.add(item.get("title"))
+            latest.append(item)
+    return tuple(latest[:NEWS_KEEP])
+
+
+def update_cache_bulk(events: list[dict]):
+    """Apply a batch of events (oldest first) as one snapshot swap"""
+    global _snapshot
+    
+    current = _snapshot
+    weather = None
+    news = []
+    alerts = []
+    for data in events:
+        data_type = data.get("type")
+        if data_type == "weather":
+            # Keeps every streamed location's geohash cell warm for GAIA lookups
+            get_gaia().warm_from_stream(data)
+            # Events without a location (simulation mode) are the default city's
+            if data.get("location_key", SNAPSHOT_WEATHER_KEY) == SNAPSHOT_WEATHER_KEY:
+                weather = data
+        elif data_type == "news":
+            news.append(data)
+        elif data_type == "alert":
+            alerts.append(data)
     
-    if data_type == "weather":
-        _gaia_cache["weather"] = data
-    elif data_type == "news":
-        # Keep last 5 news items
-        _gaia_cache["news"] = [data] + _gaia_cache["news"][:4]
-    elif data_type == "alert":
-        # Keep last 3 alerts
-        _gaia_cache["alerts"] = [data] + _gaia_cache["alerts"][:2]
+    if weather is None and not news and not alerts:
+        return  # Only other cities' weather - nothing the snapshot shows changed
     
-    _gaia_cache["last_update"] = datetime.utcnow().isoformat()
+    _snapshot = GaiaSnapshot.build(
+        current.version + 1,
+        weather if weather is not None else current.data["weather"],
+        # Keep last 5 news items and last 3 alerts, newest first
+        _latest_headlines(tuple(news[::-1]) + current.data["news"]),
+        (tuple(alerts[::-1]) + current.data["alerts"])[:ALERTS_KEEP],
+        datetime.utcnow().isoformat()
+    )
+    
+    # One SSE frame per applied batch, shared by every stream client
+    _publish_snapshot()
+
+
+# ============ SSE Fan-out ============
+
+_gaia_hub: Optional[BroadcastHub] = None
+
+
+def get_gaia_hub() -> BroadcastHub:
+    """Hub behind /api/gaia/stream, seeded with the current cache"""
+    global _gaia_hub
+    if _gaia_hub is None:
+        _gaia_hub = BroadcastHub("gaia")
+        _gaia_hub.publish(_snapshot.body)
+    return _gaia_hub
+
+
+def _publish_snapshot():
+    """Push the current snapshot; a hub created just now is already seeded with it"""
+    if _gaia_hub is None:
+        get_gaia_hub()
+    else:
+        _gaia_hub.publish(_snapshot.body)
+
+
+# ============ Batched Consumer Thread ============
+
+class BatchedGaiaConsumer:
+    """Runs a blocking Kafka consumer on a dedicated thread, feeding the event loop in batches"""
+    
+    def __init__(
+        self,
+        consumer,
+        loop: asyncio.AbstractEventLoop,
+        batch_size: int = CONSUMER_BATCH_SIZE,
+        batch_timeout: float = CONSUMER_BATCH_TIMEOUT,
+        queue_batches: int = CONSUMER_QUEUE_BATCHES,
+        commit_interval: float = COMMIT_INTERVAL_SECONDS
+    ):
+        self.consumer = consumer
+        self.loop = loop
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.commit_interval = commit_interval
+        self.batches: asyncio.Queue = asyncio.Queue(maxsize=queue_batches)
+        
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="gaia-consumer", daemon=True)
+        self._offsets_lock = threading.Lock()
+        self._applied_offsets: dict[tuple[str, int], int] = {}  # (topic, partition) -> next offset
+        
+        self.messages = 0
+        self.batch_count = 0
+        self.parse_errors = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.commits = 0
+    
+    def start(self):
+        self._thread.start()
+    
+    def stop(self, timeout: float = CONSUMER_STOP_TIMEOUT) -> bool:
+        """Stop the thread, commit what was applied and close the consumer; False if it outlived timeout"""
+        self._stopping.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            # Daemon thread: a hung broker close must not hold up shutdown
+            print(f"[WARN] GAIA consumer still closing after {timeout:.1f}s - abandoning it")
+            return False
+        return True
+    
+    def _run(self):
+        last_commit = time.monotonic()
+        backoff = ERROR_BACKOFF_SECONDS
+        try:
+            while not self._stopping.is_set():
+                try:
+                    self._poll_batch()
+                    backoff = ERROR_BACKOFF_SECONDS
+                except Exception as e:
+                    # Broker/network trouble must not end the thread silently
+                    self.errors += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    print(f"[GAIA CONSUMER ERROR] {self.last_error} - retrying in {backoff:.0f}s")
+                    self._stopping.wait(backoff)
+                    backoff = min(backoff * 2, ERROR_BACKOFF_MAX_SECONDS)
+                
+                if time.monotonic() - last_commit >= self.commit_interval:
+                    self._commit()
+                    last_commit = time.monotonic()
+        finally:
+            self._commit(asynchronous=False)
+            self.consumer.close()
+    
+    def _poll_batch(self):
+        """Consume one batch and hand it to the loop (blocks while the handoff queue is full)"""
+        from confluent_kafka import KafkaError
+        
+        messages = self.consumer.consume(num_messages=self.batch_size, timeout=self.batch_timeout)
+        
+        events, offsets = [], {}
+        for msg in messages:
+            if msg.error():
+                if msg.error().code() != KafkaError._PARTITION_EOF:
+                    print(f"[GAIA CONSUMER ERROR] {msg.error()}")
+                continue
+            offsets[(msg.topic(), msg.partition())] = msg.offset() + 1
+            try:
+                events.append(json.loads(msg.value()))
+            except (ValueError, TypeError) as e:
+                self.parse_errors += 1
+                print(f"[GAIA CONSUMER] Parse error: {e}")
+        
+        if offsets:
+            self.messages += len(events)
+            self.batch_count += 1
+            # Blocks while the queue is full - backpressure instead of unbounded buffering
+            handoff = asyncio.run_coroutine_threadsafe(self.batches.put((events, offsets)), self.loop)
+            while not self._stopping.is_set():
+                try:
+                    handoff.result(timeout=0.5)
+                    break
+                except TimeoutError:
+                    continue
+    
+    def mark_applied(self, offsets: dict[tuple[str, int], int]):
+        """Called on the loop once a batch is in the cache"""
+        with self._offsets_lock:
+            self._applied_offsets.update(offsets)
+    
+    def _commit(self, asynchronous: bool = True):
+        from confluent_kafka import TopicPartition
+        
+        with self._offsets_lock:
+            offsets, self._applied_offsets = self._applied_offsets, {}
+        if not offsets:
+            return
+        try:
+            self.consumer.commit(
+                offsets=[TopicPartition(topic, partition, offset) for (topic, partition), offset in offsets.items()],
+                asynchronous=asynchronous
+            )
+            self.commits += 1
+        except Exception as e:
+            print(f"[GAIA CONSUMER] Commit failed: {e}")
+    
+    async def apply_batches(self):
+        """Loop side: drain handed-off batches into the cache"""
+        while True:
+            events, offsets = await self.batches.get()
+            try:
+                update_cache_bulk(events)
+            except Exception as e:
+                # Skipped rather than retried forever; later batches carry newer state
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                print(f"[GAIA CONSUMER ERROR] Failed to apply batch: {self.last_error}")
+            self.mark_applied(offsets)
+    
+    def stats(self) -> dict:
+        return {
+            "thread_alive": self._thread.is_alive(),
+            "messages": self.messages,
+            "batches": self.batch_count,
+            "queued_batches": self.batches.qsize(),
+            "parse_errors": self.parse_errors,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "commits": self.commits,
+        }
+
+
+_active_consumer: Optional[BatchedGaiaConsumer] = None
+
+
+def consumer_stats() -> dict:
+    """Batching metrics of the running consumer"""
+    if _active_consumer is None:
+        return {"running": False}
+    return {"running": True, **_active_consumer.stats()}
+
+
+def stop_gaia_consumer(timeout: float = CONSUMER_STOP_TIMEOUT):
+    """Stop the consumer thread (app shutdown; blocks up to timeout, so run it off the loop)"""
+    global _active_consumer
+    if _active_consumer is not None:
+        _active_consumer.stop(timeout)
+        _active_consumer = None
 
 
 async def consume_gaia_stream():
     """Background task to consume Kafka messages and update cache"""
-    from confluent_kafka import Consumer, KafkaError
+    global _active_consumer
     
     if not CONFLUENT_CONFIG['bootstrap.servers']:
         print("[GAIA CONSUMER] No Confluent configured. Running in simulation mode.")
@@ -69,49 +367,28 @@ async def consume_gaia_stream():
                 "type": "weather",
                 "temperature": 34,
                 "weathercode": 3,
+                "simulated": True,  # Never served as real weather
                 "timestamp": datetime.utcnow().isoformat()
             }
             update_cache(fake_weather)
             await asyncio.sleep(30)
         return
     
+    from confluent_kafka import Consumer
+    
     consumer = Consumer(CONFLUENT_CONFIG)
     consumer.subscribe([GAIA_TOPIC, ALERTS_TOPIC])
     print(f"[GAIA CONSUMER] Subscribed to {GAIA_TOPIC}, {ALERTS_TOPIC}")
     
-    while True:
-        msg = consumer.poll(1.0)
-        
-        if msg is None:
-            await asyncio.sleep(0.1)
-            continue
-        
-        if msg.error():
-            if msg.error().code() == KafkaError._PARTITION_EOF:
-                continue
-            print(f"[GAIA CONSUMER ERROR] {msg.error()}")
-            continue
-        
-        try:
-            data = json.loads(msg.value().decode('utf-8'))
-            update_cache(data)
-            print(f"[GAIA CONSUMER] Received: {data.get('type')}")
-        except Exception as e:
-            print(f"[GAIA CONSUMER] Parse error: {e}")
-        
-        await asyncio.sleep(0.1)
+    _active_consumer = BatchedGaiaConsumer(consumer, asyncio.get_running_loop())
+    _active_consumer.start()
+    try:
+        await _active_consumer.apply_batches()
+    finally:
+        stop_gaia_consumer()
 
 
-async def gaia_sse_stream() -> AsyncGenerator[str, None]:
-    """SSE stream of GAIA updates for frontend"""
-    last_sent = None
-    
-    while True:
-        current = get_cached_gaia_data()
-        
-        # Only send if data changed
-        if current["last_update"] != last_sent:
-            yield f"data: {json.dumps(current)}\n\n"
-            last_sent = current["last_update"]
-        
-        await asyncio.sleep(5)  # Send updates every 5 seconds max
+def gaia_sse_stream(last_event_id: Optional[str] = None) -> AsyncGenerator[bytes, None]:
+    """SSE stream of GAIA updates for frontend - pushed as each update lands"""
+    return get_gaia_hub().stream(last_event_id)
+
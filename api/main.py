@@ -4,7 +4,8 @@ Day 1: Tracer Bullet Implementation
 """
 
 import os
-from fastapi import FastAPI
+from typing import Optional
+from fastapi import FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from dotenv import load_dotenv
@@ -48,11 +49,20 @@ class VoiceInput(BaseModel):
     user_id: str = "default"
     session_id: str = "default"
 
+class LocationInput(BaseModel):
+    """User location for personalized GAIA context"""
+    lat: float
+    lon: float
+    city: Optional[str] = None
+    user_id: str = "default"
+
 class NexusResponse(BaseModel):
     """Response from NEXUS"""
     text: str
     confidence: float = 1.0
     sources: list[str] = []
+    context_tokens: dict[str, int] = {}
+    context_timings: dict[str, dict] = {}
 
 # ============ ROUTES ============
 
@@ -68,20 +78,62 @@ async def health():
     }
 
 @app.get("/api/gaia/status")
-async def gaia_status():
-    """Get current GAIA data (weather, time) for UI display"""
+async def gaia_status(user_id: Optional[str] = None):
+    """Get current GAIA data (weather, time) for UI display - at the user's location if known"""
     from services.gaia import get_gaia
+    from services.memory import get_user_profile, run_memory_io
     
     gaia = get_gaia()
     time_data = gaia.get_current_time()
-    weather = await gaia.get_weather()
+    location = (await run_memory_io(get_user_profile, user_id)).get_location() if user_id else None
+    location = location or {}
+    weather = await gaia.get_weather(location.get("lat"), location.get("lon"), location.get("city"))
     
     return {
         "time": time_data,
         "weather": weather,
-        "location": weather.get("location", "New York")
+        "location": weather.get("location", "New York"),
+        "news": gaia.get_stream_news(),
+        "alerts": gaia.get_stream_alerts()
     }
 
+@app.get("/api/prometheus/cache-stats")
+async def prometheus_cache_stats():
+    """Web search cache hit-rate counters"""
+    from services.prometheus import get_prometheus
+    return get_prometheus().cache_stats()
+
+@app.get("/api/tts/cache-stats")
+async def tts_cache_stats():
+    """TTS audio cache hit-rate counters"""
+    from services.tts_cache import get_tts_cache
+    cache = get_tts_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
+@app.get("/api/tts/pool-stats")
+async def tts_pool_stats():
+    """ElevenLabs concurrency slots and queue counters"""
+    from services.elevenlabs import tts_pool_stats
+    return tts_pool_stats()
+
+@app.get("/api/http/stats")
+async def http_stats():
+    """Upstream HTTP pools: connection reuse and pool-wait metrics"""
+    from services.http_clients import http_client_stats
+    return http_client_stats()
+
+@app.get("/api/response-cache/stats")
+async def response_cache_stats():
+    """Gemini response cache hit-rate counters"""
+    from services.response_cache import get_response_cache
+    return get_response_cache().stats()
+
+@app.get("/api/gaia/cache-stats")
+async def gaia_cache_stats():
+    """Stream-cache and weather-cache hit-rate counters"""
+    from services.gaia import get_gaia
+    return get_gaia().cache_stats()
+
 @app.get("/api/gaia/news")
 async def gaia_news(category: str = "general"):
     """Get news headlines from GAIA"""
@@ -100,37 +152,28 @@ async def process_voice_input(input_data: VoiceInput):
     """
     try:
         from services.gemini import generate_response
-        from services.memory import get_memory
-        from services.gaia import get_gaia
-        
-        # Get memory for this user
-        memory = get_memory(input_data.user_id, input_data.session_id)
+        from services.memory import aget_memory
+        from services.context_gatherer import gather_turn_context
         
-        # Get ECHO context (memory)
-        memory_context = memory.get_full_context()
-        
-        # Get GAIA context (real-time data)
-        gaia = get_gaia()
-        gaia_context = await gaia.build_context()
-        
-        # Combine contexts
-        full_context = ""
-        if gaia_context:
-            full_context += f"[Real-time data]\n{gaia_context}\n\n"
-        if memory_context:
-            full_context += f"{memory_context}"
+        # Get ECHO (memory) + GAIA (real-time data) context concurrently
+        turn = await gather_turn_context(
+            input_data.text, input_data.user_id, input_data.session_id, search=None
+        )
         
         # Generate response with combined context
-        response = await generate_response(input_data.text, full_context)
+        response = await generate_response(input_data.text, turn["context"], cache=turn["cache"])
         response_text = response["text"]
         
         # Store the exchange in memory
-        memory.add_exchange(input_data.text, response_text)
+        memory = await aget_memory(input_data.user_id, input_data.session_id)
+        await memory.aadd_exchange(input_data.text, response_text)
         
         return NexusResponse(
             text=response_text,
             confidence=response.get("confidence", 1.0),
-            sources=response.get("sources", [])
+            sources=response.get("sources", []),
+            context_tokens=turn["context_tokens"],
+            context_timings=turn["timings"]
         )
     except Exception as e:
         print(f"[ERROR] Processing failed: {e}")
@@ -138,51 +181,42 @@ async def process_voice_input(input_data: VoiceInput):
 
 @app.post("/api/process-with-voice")
 @tracer.wrap(service="nexus-api", resource="process_voice_tts")
-async def process_with_voice(input_data: VoiceInput):
+async def process_with_voice(input_data: VoiceInput, format: str = "json", accept: str = Header(default="")):
     """
     Full voice round-trip with ECHO memory
     Text -> Memory -> Gemini -> Store -> TTS -> Audio
+    
+    Default: JSON with base64 audio (kept for existing clients).
+    ?format=binary or Accept: audio/mpeg: streamed audio/mpeg body, with the
+    text and metadata in X-Nexus-* headers - no base64 inflation, and the
+    client can start playback on the first frame.
     """
     import base64
     
+    binary = format == "binary" or "audio/mpeg" in accept
+    
     try:
         from services.gemini import generate_response
-        from services.elevenlabs import text_to_speech
-        from services.memory import get_memory
-        from services.gaia import get_gaia
+        from services.elevenlabs import atext_to_speech
+        from services.memory import aget_memory
+        from services.context_gatherer import gather_turn_context
         
-        # Get memory for this user
-        memory = get_memory(input_data.user_id, input_data.session_id)
-        
-        # Get ECHO context (memory)
-        memory_context = memory.get_full_context()
-        
-        # Get GAIA context (real-time data)
-        gaia = get_gaia()
-        gaia_context = await gaia.build_context()
-        
-        # Get PROMETHEUS context (web search for real-time info)
-        from services.prometheus import search_if_needed
-        search_context = await search_if_needed(input_data.text)
-        
-        # Combine contexts
-        full_context = ""
-        if search_context:
-            full_context += f"[Web search results]\n{search_context}\n\n"
-        if gaia_context:
-            full_context += f"[Real-time data]\n{gaia_context}\n\n"
-        if memory_context:
-            full_context += f"{memory_context}"
+        # Get ECHO (memory), GAIA (real-time data) and PROMETHEUS (web search) concurrently
+        turn = await gather_turn_context(input_data.text, input_data.user_id, input_data.session_id)
         
         # Get Gemini response with combined context
-        response = await generate_response(input_data.text, full_context)
+        response = await generate_response(input_data.text, turn["context"], cache=turn["cache"])
         response_text = response["text"]
         
         # Store the exchange in memory
-        memory.add_exchange(input_data.text, response_text)
+        memory = await aget_memory(input_data.user_id, input_data.session_id)
+        await memory.aadd_exchange(input_data.text, response_text)
+        
+        if binary:
+            return await _binary_voice_response(response_text, response, turn)
         
         # Convert to speech
-        audio_bytes = text_to_speech(response_text)
+        audio_bytes = await atext_to_speech(response_text)
         audio_b64 = None
         if audio_bytes:
             audio_b64 = base64.b64encode(audio_bytes).decode('utf-8')
@@ -192,13 +226,55 @@ async def process_with_voice(input_data: VoiceInput):
             "confidence": response.get("confidence", 1.0),
             "sources": response.get("sources", []),
             "audio": audio_b64,
-            "audio_format": "mp3" if audio_b64 else None
+            "audio_format": "mp3" if audio_b64 else None,
+            "context_tokens": turn["context_tokens"],
+            "context_timings": turn["timings"]
         }
     except Exception as e:
         print(f"[ERROR] Voice processing failed: {e}")
         return {"text": "I'm having trouble right now.", "audio": None}
 
 
+# Response headers over ~8KB are rejected by common proxies
+MAX_TEXT_HEADER_CHARS = 6000
+
+async def _binary_voice_response(response_text: str, response: dict, turn: dict):
+    """Stream TTS audio as audio/mpeg; text and metadata travel in headers"""
+    from urllib.parse import quote
+    from fastapi import Response
+    from services.elevenlabs import text_to_speech_stream
+    
+    encoded_text = quote(response_text)
+    truncated = len(encoded_text) > MAX_TEXT_HEADER_CHARS
+    if truncated:
+        # Drop whole characters (not bytes of an escape) so the header still decodes
+        cut = response_text
+        while len(quote(cut)) > MAX_TEXT_HEADER_CHARS:
+            cut = cut[:-max(1, (len(quote(cut)) - MAX_TEXT_HEADER_CHARS) // 12)]
+        encoded_text = quote(cut)
+    
+    headers = {
+        "X-Nexus-Text": encoded_text,  # URL-encoded UTF-8
+        "X-Nexus-Text-Truncated": "1" if truncated else "0",
+        "X-Nexus-Confidence": str(response.get("confidence", 1.0)),
+        "X-Nexus-Context-Tokens": str(turn["context_tokens"].get("total", 0)),
+        "Access-Control-Expose-Headers": "X-Nexus-Text, X-Nexus-Text-Truncated, X-Nexus-Confidence, X-Nexus-Context-Tokens",
+    }
+    
+    # Pull the first frame before committing to a body, so "no audio" is a clean 204
+    audio = text_to_speech_stream(response_text)
+    first_frame = await anext(audio, None)
+    if first_frame is None:
+        return Response(status_code=204, headers=headers)
+    
+    async def frames():
+        yield first_frame
+        async for frame in audio:
+            yield frame
+    
+    return StreamingResponse(frames(), media_type="audio/mpeg", headers=headers)
+
+
 # ============ STREAMING ENDPOINT ============
 
 from fastapi.responses import StreamingResponse
@@ -211,45 +287,37 @@ async def stream_response(input_data: VoiceInput):
     Uses Server-Sent Events (SSE) for real-time streaming.
     """
     from services.gemini import generate_response_stream
-    from services.memory import get_memory
-    from services.gaia import get_gaia
-    from services.prometheus import search_if_needed
+    from services.memory import aget_memory
+    from services.context_gatherer import gather_turn_context
     
     async def generate():
         try:
-            # Get memory
-            memory = get_memory(input_data.user_id, input_data.session_id)
-            memory_context = memory.get_full_context()
-            
-            # Get GAIA context
-            gaia = get_gaia()
-            gaia_context = await gaia.build_context()
-            
-            # Get PROMETHEUS search context WITH sources for citations
-            from services.prometheus import search_with_sources
-            search_context, sources = await search_with_sources(input_data.text)
-            
-            # Combine contexts
-            full_context = ""
-            if search_context:
-                full_context += f"[Web search results]\n{search_context}\n\n"
-            if gaia_context:
-                full_context += f"[Real-time data]\n{gaia_context}\n\n"
-            if memory_context:
-                full_context += f"{memory_context}"
+            # Get memory, GAIA and PROMETHEUS (WITH sources for citations) concurrently
+            turn = await gather_turn_context(
+                input_data.text, input_data.user_id, input_data.session_id, search="sources"
+            )
+            sources = turn["sources"]
             
             # Stream the response
             full_response = ""
-            async for chunk in generate_response_stream(input_data.text, full_context):
+            async for chunk in generate_response_stream(input_data.text, turn["context"], cache=turn["cache"]):
                 full_response += chunk
                 # Send chunk as SSE event
                 yield f"data: {json.dumps({'chunk': chunk})}\n\n"
             
             # Store in memory after complete
-            memory.add_exchange(input_data.text, full_response)
+            memory = await aget_memory(input_data.user_id, input_data.session_id)
+            await memory.aadd_exchange(input_data.text, full_response)
             
             # Send done event WITH sources for citation display
-            yield f"data: {json.dumps({'done': True, 'full_text': full_response, 'sources': sources})}\n\n"
+            done = {
+                'done': True,
+                'full_text': full_response,
+                'sources': sources,
+                'context_tokens': turn["context_tokens"],
+                'context_timings': turn["timings"]
+            }
+            yield f"data: {json.dumps(done)}\n\n"
             
         except Exception as e:
             print(f"[ERROR] Streaming failed: {e}")
@@ -266,6 +334,68 @@ async def stream_response(input_data: VoiceInput):
     )
 
 
+@app.post("/api/stream-voice")
+async def stream_voice(input_data: VoiceInput):
+    """
+    Streaming voice round-trip over SSE.
+    Each sentence goes to TTS as soon as Gemini finishes it, so audio starts
+    after the first sentence instead of after the whole response.
+    
+    Events: {'chunk'} text, {'sentence', 'index'} before that sentence's audio,
+    {'audio' (base64 mp3 frame), 'index'}, then a final {'done': True, ...}.
+    """
+    import base64
+    from services.gemini import generate_response_stream
+    from services.memory import aget_memory
+    from services.context_gatherer import gather_turn_context
+    from services.voice_pipeline import speak_stream
+    
+    async def generate():
+        try:
+            turn = await gather_turn_context(
+                input_data.text, input_data.user_id, input_data.session_id, search="sources"
+            )
+            
+            full_response = ""
+            text_stream = generate_response_stream(input_data.text, turn["context"], cache=turn["cache"])
+            async for event in speak_stream(text_stream):
+                if event["type"] == "text":
+                    full_response += event["chunk"]
+                    yield f"data: {json.dumps({'chunk': event['chunk']})}\n\n"
+                elif event["type"] == "sentence":
+                    yield f"data: {json.dumps({'sentence': event['text'], 'index': event['index']})}\n\n"
+                else:
+                    audio_b64 = base64.b64encode(event["data"]).decode("utf-8")
+                    yield f"data: {json.dumps({'audio': audio_b64, 'index': event['index']})}\n\n"
+            
+            memory = await aget_memory(input_data.user_id, input_data.session_id)
+            await memory.aadd_exchange(input_data.text, full_response)
+            
+            done = {
+                'done': True,
+                'full_text': full_response,
+                'sources': turn["sources"],
+                'audio_format': 'mp3',
+                'context_tokens': turn["context_tokens"],
+                'context_timings': turn["timings"]
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            
+        except Exception as e:
+            print(f"[ERROR] Voice streaming failed: {e}")
+            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "Access-Control-Allow-Origin": "*"
+        }
+    )
+
+
 # ============ ECHO MEMORY ENDPOINTS ============
 
 @app.get("/api/echo/profile")
@@ -274,20 +404,21 @@ async def get_echo_profile(user_id: str = "demo-user", session_id: str = "demo-s
     Get what NEXUS knows about the user - for the Memory Panel UI
     This makes NEXUS different: you can SEE what it remembers!
     """
-    from services.memory import MemoryManager
+    from services.memory import get_user_profile, run_memory_io
+    from services.memory_store import get_store
     
-    # Create fresh memory manager to reload from disk
-    memory = MemoryManager(user_id, session_id)
-    profile = memory.profile.data
-    conversation = memory.conversation
+    # Read straight from the store - counts are indexed queries on SQLite
+    profile = (await run_memory_io(get_user_profile, user_id)).data
+    stats = await run_memory_io(get_store().session_stats, session_id)
     
     # Count conversations
-    total_messages = len(conversation.messages)
-    user_messages = sum(1 for m in conversation.messages if m.get("role") == "user")
+    total_messages = stats["total_messages"]
+    user_messages = stats["user_messages"]
     
     return {
         "user_id": user_id,
         "name": profile.get("name"),
+        "location": profile.get("location"),
         "facts": profile.get("facts", []),
         "preferences": profile.get("preferences", {}),
         "stats": {
@@ -300,25 +431,44 @@ async def get_echo_profile(user_id: str = "demo-user", session_id: str = "demo-s
     }
 
 
+@app.post("/api/echo/location")
+async def set_echo_location(input_data: LocationInput):
+    """Store the user's location - GAIA weather then uses it instead of the default city"""
+    from fastapi import HTTPException
+    from services.memory import get_user_profile, run_memory_io
+    
+    # The profile is shared by all of the user's sessions
+    profile = await run_memory_io(get_user_profile, input_data.user_id)
+    try:
+        await run_memory_io(profile.set_location, input_data.lat, input_data.lon, input_data.city)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return {"user_id": input_data.user_id, "location": profile.get_location()}
+
+
+@app.get("/api/echo/cache-stats")
+async def get_echo_cache_stats():
+    """Session cache counters for sizing MEMORY_CACHE_* limits"""
+    from services.memory import get_memory_cache_stats
+    return get_memory_cache_stats()
+
+
 @app.get("/api/echo/greeting")
 async def get_proactive_greeting(user_id: str = "demo-user"):
     """
     SENTINEL MODE: Generate a Situation Report greeting.
     Makes NEXUS feel like an AI that watched the world while you were away.
     """
-    from services.memory import get_memory
+    from services.memory import aget_memory
     from services.gaia import get_gaia
-    from consumers.gaia_consumer import get_cached_gaia_data
     
-    memory = get_memory(user_id)
+    memory = await aget_memory(user_id)
     gaia = get_gaia()
     
     user_name = memory.get_user_name() or "Commander"
     time_data = gaia.get_current_time()
-    weather = await gaia.get_weather()
-    
-    # Get cached GAIA real-time data (from Kafka)
-    gaia_realtime = get_cached_gaia_data()
+    location = memory.get_user_location() or {}
+    weather = await gaia.get_weather(location.get("lat"), location.get("lon"), location.get("city"))
     
     # Get last conversation topic
     recent_messages = memory.conversation.get_context_window(2)
@@ -343,8 +493,8 @@ async def get_proactive_greeting(user_id: str = "demo-user"):
         temp = weather.get("temp") or weather.get("temperature", 0)
         status_items.append(f"Temperature: {temp}°F, {weather.get('description')}")
     
-    # Get alerts from GAIA cache
-    alerts = gaia_realtime.get("alerts", [])
+    # Get fresh alerts from the Kafka-fed GAIA cache
+    alerts = gaia.get_stream_alerts()
     if alerts:
         latest_alert = alerts[0]
         status_items.append(f"Alert: {latest_alert.get('message', 'No active alerts')}")
@@ -455,16 +605,17 @@ async def get_context_insights(query: str = ""):
 # ============ GAIA STREAMING (Confluent Kafka) ============
 
 @app.get("/api/gaia/stream")
-async def gaia_stream():
+async def gaia_stream(last_event_id: str = Header(default=None)):
     """
     SSE stream of real-time GAIA data from Confluent Kafka
     This proves "Real-Time Event Architecture" for Confluent track
+    Reconnecting clients send Last-Event-ID and get the updates they missed.
     """
     from fastapi.responses import StreamingResponse
     from consumers.gaia_consumer import gaia_sse_stream
     
     return StreamingResponse(
-        gaia_sse_stream(),
+        gaia_sse_stream(last_event_id),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -473,11 +624,43 @@ async def gaia_stream():
     )
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, lists and "*" allowed)"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
 @app.get("/api/gaia/realtime")
-async def gaia_realtime():
-    """Get cached real-time GAIA data (non-streaming)"""
-    from consumers.gaia_consumer import get_cached_gaia_data
-    return get_cached_gaia_data()
+async def gaia_realtime(if_none_match: str = Header(default=None)):
+    """
+    Get cached real-time GAIA data (non-streaming)
+    Serves the snapshot's pre-rendered JSON; polling clients that send the
+    last ETag get 304 until the data changes.
+    """
+    from fastapi.responses import Response
+    from consumers.gaia_consumer import get_gaia_snapshot
+    
+    snapshot = get_gaia_snapshot()
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache"}
+    if _etag_matches(if_none_match, snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
+
+
+@app.get("/api/gaia/consumer-stats")
+async def gaia_consumer_stats():
+    """GAIA Kafka consumer batch, commit and handoff-queue metrics"""
+    from consumers.gaia_consumer import consumer_stats
+    return consumer_stats()
+
+
+@app.get("/api/gaia/stream-stats")
+async def gaia_stream_stats():
+    """GAIA SSE fan-out: subscribers, conflated frames, dropped clients"""
+    from consumers.gaia_consumer import get_gaia_hub
+    return get_gaia_hub().stats()
 
 
 # ============ STARTUP ============
@@ -493,15 +676,50 @@ async def startup_event():
     print("[NEXUS] GAIA Data Streams: Active")
     print("[NEXUS] ElevenLabs TTS: Active")
     
+    # Shared upstream HTTP clients (GAIA, PROMETHEUS)
+    from services.http_clients import init_http_clients
+    init_http_clients()
+    
     # Start background Kafka consumer for GAIA real-time data
     asyncio.create_task(consume_gaia_stream())
     print("[NEXUS] GAIA Kafka Consumer: Started")
     
+    # Synthesize fixed phrases (fallbacks, greeting sign-off) into the TTS cache
+    from services.elevenlabs import prewarm_tts_cache
+    asyncio.create_task(prewarm_tts_cache())
+    
     if not DD_ENABLED:
         print("[NEXUS] Datadog: DISABLED (Local Mode)")
     else:
         print("[NEXUS] Datadog: ACTIVE")
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from services.memory import shutdown_memory_io
+    from services.elevenlabs import close_tts_clients
+    
+    # Let queued memory writes land on disk before the worker exits
+    shutdown_memory_io()
+    print("[NEXUS] ECHO Memory: Flushed")
+    
+    await close_tts_clients()
+    print("[NEXUS] ElevenLabs Clients: Closed")
+    
+    from services.http_clients import close_http_clients
+    await close_http_clients()
+    print("[NEXUS] Upstream HTTP Clients: Closed")
+    
+    # Commit applied GAIA offsets and leave the consumer group
+    import asyncio
+    from consumers.gaia_consumer import stop_gaia_consumer
+    await asyncio.to_thread(stop_gaia_consumer)
+    print("[NEXUS] GAIA Kafka Consumer: Stopped")
+    
+    # Deliver anything still batched in the Kafka producer (bounded by KAFKA_FLUSH_TIMEOUT)
+    from services.kafka_producer import close_producer
+    await asyncio.to_thread(close_producer)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
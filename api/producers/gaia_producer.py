@@ -1,17 +1,31 @@
 """
 GAIA Producer - Streams real-time Earth data to Confluent Kafka
 Run this as a background process: python -m producers.gaia_producer
+
+Covers a set of locations (GAIA_LOCATIONS). Weather for many coordinates is
+fetched in one Open-Meteo request per batch, batches run concurrently
+(bounded), and only values that changed since the last publish go to Kafka,
+keyed by location so each location stays on one partition.
+
+Benchmark against a local Open-Meteo stand-in: python -m bench.gaia_producer
 """
 
 import os
 import json
 import time
+import random
 import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Hashable, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from services.http_clients import close_http_clients, get_http_client
+from services.gaia import DEFAULT_CITY, DEFAULT_LAT, DEFAULT_LON, location_key
+
 # Confluent Cloud configuration
 CONFLUENT_CONFIG = {
     'bootstrap.servers': os.getenv('CONFLUENT_BOOTSTRAP_SERVERS', ''),
@@ -26,73 +40,149 @@ GAIA_TOPIC = 'gaia-updates'
 ALERTS_TOPIC = 'gaia-alerts'
 
 # Weather API
-WEATHER_URL = "https://api.open-meteo.com/v1/forecast"
+WEATHER_URL = os.getenv('OPEN_METEO_URL', "https://api.open-meteo.com/v1/forecast")
 NEWS_API_KEY = os.getenv('NEWS_API_KEY', '')
 
+# Cycle
+POLL_INTERVAL_SECONDS = float(os.getenv('GAIA_POLL_INTERVAL', '60'))
+OPEN_METEO_BATCH_SIZE = int(os.getenv('GAIA_WEATHER_BATCH_SIZE', '50'))  # Coordinates per request (URL length)
+FETCH_CONCURRENCY = int(os.getenv('GAIA_FETCH_CONCURRENCY', '4'))       # Batches in flight at once
+# Unchanged weather is re-sent after this long so the cells it warms in the
+# API's weather cache (GAIA_WEATHER_TTL, 300s) never go stale
+REPUBLISH_SECONDS = float(os.getenv('GAIA_REPUBLISH_SECONDS', '150'))
+# Unchanged headlines are re-sent this often, so an API that restarted (or
+# aged its news out) gets the current set back without waiting for new stories
+NEWS_REPUBLISH_SECONDS = float(os.getenv('GAIA_NEWS_REPUBLISH_SECONDS', '600'))
+
 
-async def fetch_weather(lat: float = 40.7128, lon: float = -74.0060) -> dict:
-    """Fetch current weather for location (default: NYC)"""
-    import httpx
+@dataclass(frozen=True)
+class Location:
+    """A place the producer tracks"""
+    name: str
+    lat: float
+    lon: float
     
+    @property
+    def key(self) -> str:
+        return location_key(self.lat, self.lon)
+
+
+def parse_locations(spec: str) -> list[Location]:
+    """'Name:lat:lon;Name:lat:lon' -> locations (duplicates by key dropped)"""
+    locations = {}
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        try:
+            name, lat, lon = entry.rsplit(":", 2)
+            location = Location(name.strip(), float(lat), float(lon))
+        except ValueError:
+            print(f"[GAIA PRODUCER] Ignoring bad location: {entry!r}")
+            continue
+        locations.setdefault(location.key, location)
+    return list(locations.values())
+
+
+GAIA_LOCATIONS = parse_locations(os.getenv(
+    'GAIA_LOCATIONS',
+    f"{DEFAULT_CITY}:{DEFAULT_LAT}:{DEFAULT_LON};London:51.5074:-0.1278;Tokyo:35.6762:139.6503;"
+    "San Francisco:37.7749:-122.4194;Mumbai:19.0760:72.8777;Sao Paulo:-23.5505:-46.6333"
+))
+
+
+def _weather_event(current: dict, location: Location) -> dict:
+    # Same fields as GaiaDataStream.get_weather so the API can serve this directly
+    return {
+        "type": "weather",
+        "temperature": current.get("temperature_2m"),
+        "apparent_temperature": current.get("apparent_temperature"),
+        "humidity": current.get("relative_humidity_2m"),
+        "windspeed": current.get("wind_speed_10m"),
+        "weathercode": current.get("weather_code"),
+        "temperature_unit": "fahrenheit",
+        "timestamp": datetime.utcnow().isoformat(),
+        "location": {"lat": location.lat, "lon": location.lon, "name": location.name},
+        "location_key": location.key
+    }
+
+
+async def fetch_weather_batch(locations: list[Location]) -> list[dict]:
+    """Current weather for several locations in one Open-Meteo request"""
     params = {
-        "latitude": lat,
-        "longitude": lon,
-        "current_weather": True,
+        "latitude": ",".join(str(loc.lat) for loc in locations),
+        "longitude": ",".join(str(loc.lon) for loc in locations),
+        "current": "temperature_2m,relative_humidity_2m,apparent_temperature,weather_code,wind_speed_10m",
+        "temperature_unit": "fahrenheit",
+        "wind_speed_unit": "mph",
         "timezone": "auto"
     }
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(WEATHER_URL, params=params)
-            if response.status_code == 200:
-                data = response.json()
-                weather = data.get("current_weather", {})
-                return {
-                    "type": "weather",
-                    "temperature": weather.get("temperature"),
-                    "windspeed": weather.get("windspeed"),
-                    "weathercode": weather.get("weathercode"),
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "location": {"lat": lat, "lon": lon}
-                }
-        except Exception as e:
-            print(f"Weather fetch error: {e}")
-    return {}
+    try:
+        response = await get_http_client("open_meteo").get(WEATHER_URL, params=params)
+        if response.status_code == 200:
+            data = response.json()
+            # One coordinate -> object; several -> list in request order
+            results = data if isinstance(data, list) else [data]
+            return [
+                _weather_event(result.get("current", {}), location)
+                for location, result in zip(locations, results)
+                if result.get("current")
+            ]
+        print(f"Weather fetch error: HTTP {response.status_code} for {len(locations)} locations")
+    except Exception as e:
+        print(f"Weather fetch error: {e}")
+    return []
+
+
+async def fetch_weather_all(
+    locations: list[Location],
+    batch_size: int = OPEN_METEO_BATCH_SIZE,
+    concurrency: int = FETCH_CONCURRENCY
+) -> list[dict]:
+    """Weather for every location: multi-coordinate batches, at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _bounded(batch: list[Location]) -> list[dict]:
+        async with semaphore:
+            return await fetch_weather_batch(batch)
+    
+    batches = [locations[i:i + batch_size] for i in range(0, len(locations), batch_size)]
+    results = await asyncio.gather(*(_bounded(batch) for batch in batches))
+    return [event for batch in results for event in batch]
+
+
+async def fetch_weather(lat: float = DEFAULT_LAT, lon: float = DEFAULT_LON) -> dict:
+    """Fetch current weather for one location (default: NYC)"""
+    events = await fetch_weather_batch([Location(DEFAULT_CITY, lat, lon)])
+    return events[0] if events else {}
 
 
 async def fetch_news_headlines() -> list:
     """Fetch top news headlines"""
-    import httpx
-    
     if not NEWS_API_KEY:
         return []
     
     url = f"https://newsapi.org/v2/top-headlines?country=us&pageSize=5&apiKey={NEWS_API_KEY}"
     
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                articles = data.get("articles", [])[:5]
-                return [
-                    {
-                        "type": "news",
-                        "title": a.get("title", ""),
-                        "source": a.get("source", {}).get("name", ""),
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                    for a in articles
-                ]
-        except Exception as e:
-            print(f"News fetch error: {e}")
+    try:
+        response = await get_http_client("newsapi").get(url)
+        if response.status_code == 200:
+            data = response.json()
+            articles = data.get("articles", [])[:5]
+            return [
+                {
+                    "type": "news",
+                    "title": a.get("title", ""),
+                    "source": a.get("source", {}).get("name", ""),
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                for a in articles
+            ]
+    except Exception as e:
+        print(f"News fetch error: {e}")
     return []
 
 
 def create_alert() -> dict:
     """Generate simulated alert (for demo purposes)"""
-    import random
-    
     alerts = [
         {"alert_type": "seismic", "message": "Minor seismic activity detected in Pacific Ring", "severity": "low"},
         {"alert_type": "weather", "message": "Storm system approaching Eastern seaboard", "severity": "medium"},
@@ -103,26 +193,116 @@ def create_alert() -> dict:
     alert = random.choice(alerts)
     alert["timestamp"] = datetime.utcnow().isoformat()
     alert["type"] = "alert"
+    alert["simulated"] = True  # Demo data - kept out of Gemini context
     return alert
 
 
-def send_to_kafka(producer, topic: str, data: dict):
-    """Send message to Kafka topic"""
+class ChangeTracker:
+    """
+    Remembers what was last delivered per key, so unchanged values are skipped.
+    A value only counts as published once Kafka acknowledged it (record());
+    one that failed to deliver is offered again next cycle.
+    """
+    
+    def __init__(self, republish_after: float = REPUBLISH_SECONDS, max_keys: int = 10000):
+        self.republish_after = republish_after
+        self.max_keys = max_keys
+        self._published: OrderedDict[Hashable, tuple[Hashable, float]] = OrderedDict()  # key -> (fingerprint, at)
+        self.changed = 0
+        self.unchanged = 0
+    
+    def should_publish(self, key: Hashable, fingerprint: Hashable, republish_after: float = None) -> bool:
+        """True if the value is new, different, or due for a freshness re-send"""
+        previous = self._published.get(key)
+        republish_after = self.republish_after if republish_after is None else republish_after
+        if previous is not None and previous[0] == fingerprint and time.monotonic() - previous[1] < republish_after:
+            self.unchanged += 1
+            return False
+        self.changed += 1
+        return True
+    
+    def record(self, key: Hashable, fingerprint: Hashable):
+        """Mark a value as delivered"""
+        self._published[key] = (fingerprint, time.monotonic())
+        self._published.move_to_end(key)
+        while len(self._published) > self.max_keys:
+            self._published.popitem(last=False)
+
+
+def weather_fingerprint(event: dict) -> tuple:
+    """Fields a listener would notice; the timestamp alone is not a change"""
+    return (
+        event.get("temperature"), event.get("apparent_temperature"), event.get("humidity"),
+        event.get("windspeed"), event.get("weathercode")
+    )
+
+
+def change_key(event: dict) -> tuple[Hashable, Hashable]:
+    """(tracker key, fingerprint) of a weather or news event"""
+    if event["type"] == "weather":
+        return event["location_key"], weather_fingerprint(event)
+    return ("news", event["title"]), event["title"]
+
+
+async def collect_changes(tracker: ChangeTracker, locations: list[Location]) -> list[dict]:
+    """One cycle's worth of weather and news events that differ from what was last delivered"""
+    weather, news = await asyncio.gather(fetch_weather_all(locations), fetch_news_headlines())
+    events = [w for w in weather if tracker.should_publish(*change_key(w))]
+    events += [a for a in news if tracker.should_publish(*change_key(a), republish_after=NEWS_REPUBLISH_SECONDS)]
+    return events
+
+
+async def send_to_kafka(producer, topic: str, data: dict) -> Optional[asyncio.Future]:
+    """Queue message for a Kafka topic; returns its delivery future (batched, no per-message flush)"""
     try:
-        producer.produce(
+        delivery = await producer.produce(
             topic,
-            key=data.get("type", "unknown"),
+            key=data.get("location_key") or data.get("type", "unknown"),
             value=json.dumps(data).encode('utf-8')
         )
-        producer.flush()
-        print(f"[KAFKA] Sent to {topic}: {data.get('type')}")
+        return delivery
     except Exception as e:
         print(f"[KAFKA ERROR] {e}")
+        return None
+
+
+async def _delivered(delivery: Optional[asyncio.Future]) -> bool:
+    """Wait for a delivery report; False if the message never made it"""
+    if delivery is None:
+        return False
+    try:
+        await delivery
+        return True
+    except Exception:
+        return False
 
 
-async def run_producer():
-    """Main producer loop - runs every 60 seconds"""
-    from confluent_kafka import Producer
+async def publish_cycle(producer, tracker: ChangeTracker, locations: list[Location]) -> list[bool]:
+    """Send one cycle's changes (and an occasional alert); returns whether each message was delivered"""
+    # Changed (or due) weather keyed by location, and headlines
+    outgoing = [(GAIA_TOPIC, event) for event in await collect_changes(tracker, locations)]
+    
+    # Send occasional alerts (every 5th cycle)
+    if random.random() < 0.2:  # 20% chance each cycle
+        outgoing.append((ALERTS_TOPIC, create_alert()))
+    
+    # One batched round trip for the whole cycle
+    deliveries = [await send_to_kafka(producer, topic, data) for topic, data in outgoing]
+    delivered = await asyncio.gather(*(_delivered(d) for d in deliveries))
+    
+    # Only acknowledged values count as sent; failures are retried next cycle
+    for (topic, data), ok in zip(outgoing, delivered):
+        if ok and topic == GAIA_TOPIC:
+            tracker.record(*change_key(data))
+    return list(delivered)
+
+
+async def run_producer(locations: list[Location] = None):
+    """Main producer loop - runs every POLL_INTERVAL_SECONDS over all locations"""
+    from services.kafka_producer import AsyncKafkaProducer
+    
+    locations = locations or GAIA_LOCATIONS
+    tracker = ChangeTracker()
     
     if not CONFLUENT_CONFIG['bootstrap.servers']:
         print("[ERROR] Confluent not configured. Set CONFLUENT_BOOTSTRAP_SERVERS in .env")
@@ -130,45 +310,49 @@ async def run_producer():
         
         # Simulation mode - just print what would be sent
         while True:
-            weather = await fetch_weather()
-            news = await fetch_news_headlines()
+            events = await collect_changes(tracker, locations)
+            for event in events:
+                tracker.record(*change_key(event))
             alert = create_alert()
             
             print(f"\n[GAIA STREAM] {datetime.utcnow().isoformat()}")
-            print(f"  Weather: {weather.get('temperature')}°C")
-            print(f"  News: {len(news)} headlines")
+            for event in events:
+                if event["type"] == "weather":
+                    print(f"  Weather [{event['location']['name']}]: {event.get('temperature')}°F")
+            print(f"  News: {sum(1 for e in events if e['type'] == 'news')} headlines")
             print(f"  Alert: {alert.get('message')}")
             
-            await asyncio.sleep(60)
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
     
     # Real Kafka mode
-    producer = Producer(CONFLUENT_CONFIG)
+    producer = AsyncKafkaProducer(CONFLUENT_CONFIG)
     print("[GAIA PRODUCER] Connected to Confluent Cloud")
-    print(f"[GAIA PRODUCER] Streaming to topics: {GAIA_TOPIC}, {ALERTS_TOPIC}")
+    print(f"[GAIA PRODUCER] Streaming {len(locations)} locations to topics: {GAIA_TOPIC}, {ALERTS_TOPIC}")
     
-    while True:
-        # Fetch and send weather
-        weather = await fetch_weather()
-        if weather:
-            send_to_kafka(producer, GAIA_TOPIC, weather)
-        
-        # Fetch and send news
-        news = await fetch_news_headlines()
-        for article in news:
-            send_to_kafka(producer, GAIA_TOPIC, article)
-        
-        # Send occasional alerts (every 5th cycle)
-        import random
-        if random.random() < 0.2:  # 20% chance each cycle
-            alert = create_alert()
-            send_to_kafka(producer, ALERTS_TOPIC, alert)
-        
-        print(f"[GAIA PRODUCER] Cycle complete. Sleeping 60s...")
-        await asyncio.sleep(60)
+    try:
+        while True:
+            started = time.monotonic()
+            
+            delivered = await publish_cycle(producer, tracker, locations)
+            failed = delivered.count(False)
+            print(f"[GAIA PRODUCER] Cycle complete in {time.monotonic() - started:.1f}s "
+                  f"({len(delivered) - failed} delivered, {failed} failed, {tracker.unchanged} unchanged skipped so far)")
+            await asyncio.sleep(max(0.0, POLL_INTERVAL_SECONDS - (time.monotonic() - started)))
+    finally:
+        # Flush only here, once
+        producer.close()
+
+
+async def main():
+    try:
+        await run_producer()
+    finally:
+        await close_http_clients()
+
 
 
 if __name__ == "__main__":
     print("=" * 50)
     print("NEXUS GAIA PRODUCER - Real-Time Earth Data Stream")
     print("=" * 50)
-    asyncio.run(run_producer())
+    asyncio.run(main())
@@ -0,0 +1,184 @@
+"""
+SSE Broadcast Hub - Push one update to many stream clients
+Producers publish a change once; it is serialized into an SSE frame once and
+handed to every subscriber's queue, instead of each client polling, copying
+and re-serializing the same state on its own timer.
+
+- Per-subscriber bounded queue; a client that falls behind is conflated
+  (oldest queued frames dropped, newest kept) or disconnected
+- Event ids "<epoch>-<seq>" (epoch is random per hub, i.e. per boot) and a
+  small ring buffer of recent frames, so an EventSource reconnecting with
+  Last-Event-ID resumes where it left off; an id from another boot gets the
+  latest frame instead of a replay against the wrong sequence
+- Keep-alive comments on idle streams
+
+Benchmark with simulated subscribers: python -m bench.broadcast
+"""
+
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from typing import AsyncGenerator, Optional, Union
+
+# Configuration
+SSE_QUEUE_FRAMES = int(os.getenv("SSE_QUEUE_FRAMES", "8"))          # Per-client backlog before the slow policy applies
+SSE_HISTORY_FRAMES = int(os.getenv("SSE_HISTORY_FRAMES", "64"))      # Ring buffer for Last-Event-ID resume
+SSE_SLOW_CLIENT_POLICY = os.getenv("SSE_SLOW_CLIENT_POLICY", "conflate")  # "conflate" or "drop"
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+_KEEPALIVE_FRAME = b": keep-alive\n\n"
+
+
+def encode_sse(event_id: str, data: Union[dict, bytes], event: Optional[str] = None) -> bytes:
+    """One SSE frame, ready to write to the socket (data: dict, or already-encoded JSON)"""
+    head = f"id: {event_id}\n" + (f"event: {event}\n" if event else "")
+    payload = data if isinstance(data, bytes) else json.dumps(data).encode("utf-8")
+    return head.encode("utf-8") + b"data: " + payload + b"\n\n"
+
+
+class Subscriber:
+    """One connected stream client"""
+
+    def __init__(self, queue_frames: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_frames)
+        self.conflated = 0
+        self.closed = False
+
+    def offer(self, frame: bytes, policy: str) -> bool:
+        """Queue a frame without blocking; False if the client was dropped"""
+        if self.closed:
+            return False
+        if self.queue.full():
+            if policy == "drop":
+                self.close()
+                return False
+            self.queue.get_nowait()
+            self.conflated += 1
+        self.queue.put_nowait(frame)
+        return True
+
+    def close(self):
+        """Discard the backlog and wake the reader so it ends the stream"""
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class BroadcastHub:
+    """Fan-out of pre-encoded SSE frames to bounded per-client queues"""
+
+    def __init__(
+        self,
+        name: str,
+        queue_frames: int = SSE_QUEUE_FRAMES,
+        history_frames: int = SSE_HISTORY_FRAMES,
+        slow_policy: str = SSE_SLOW_CLIENT_POLICY,
+        keepalive: float = SSE_KEEPALIVE_SECONDS
+    ):
+        self.name = name
+        self.queue_frames = queue_frames
+        self.slow_policy = slow_policy
+        self.keepalive = keepalive
+
+        self._subscribers: set[Subscriber] = set()
+        self._history: deque[tuple[int, bytes]] = deque(maxlen=history_frames)
+        self.epoch = os.urandom(4).hex()  # Sequence numbers restart with the process
+        self._last_id = 0
+        self._last_publish = time.monotonic()
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+        self.published = 0
+        self.delivered = 0
+        self.conflated = 0
+        self.dropped_clients = 0
+        self.resumed = 0
+
+    def publish(self, data: Union[dict, bytes], event: Optional[str] = None) -> str:
+        """Encode once and queue for every subscriber (call from the event loop); returns the event id"""
+        self._last_id += 1
+        frame = encode_sse(self.event_id(self._last_id), data, event)
+        self._history.append((self._last_id, frame))
+        self._last_publish = time.monotonic()
+        self.published += 1
+
+        for subscriber in list(self._subscribers):
+            before = subscriber.conflated
+            if subscriber.offer(frame, self.slow_policy):
+                self.delivered += 1
+                self.conflated += subscriber.conflated - before
+            else:
+                self._subscribers.discard(subscriber)
+                self.dropped_clients += 1
+        return self.event_id(self._last_id)
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscriber:
+        """
+        Register a client, primed with what it missed.
+        With a Last-Event-ID still in the ring buffer, the newer frames are
+        replayed; otherwise (first connect, too old, or from before a restart)
+        the latest frame is sent so the client starts from current state.
+        """
+        subscriber = Subscriber(self.queue_frames)
+        backlog = self._backlog(last_event_id)
+        for _, frame in backlog[-self.queue_frames:]:
+            subscriber.queue.put_nowait(frame)
+        self._subscribers.add(subscriber)
+        if self.keepalive and (self._keepalive_task is None or self._keepalive_task.done()):
+            self._keepalive_task = asyncio.create_task(self._send_keepalives())
+        return subscriber
+
+    async def _send_keepalives(self):
+        """One timer for all clients, rather than a timeout per stream read"""
+        while self._subscribers:
+            await asyncio.sleep(self.keepalive)
+            if time.monotonic() - self._last_publish >= self.keepalive:
+                for subscriber in list(self._subscribers):
+                    if subscriber.queue.empty():
+                        subscriber.queue.put_nowait(_KEEPALIVE_FRAME)
+
+    def _backlog(self, last_event_id: Optional[str]) -> list[tuple[int, bytes]]:
+        if not self._history:
+            return []
+        epoch, _, seq = (last_event_id or "").rpartition("-")
+        try:
+            resume_from = int(seq) if epoch == self.epoch else None
+        except ValueError:
+            resume_from = None
+        oldest = self._history[0][0]
+        if resume_from is not None and oldest - 1 <= resume_from <= self._last_id:
+            self.resumed += 1
+            return [item for item in self._history if item[0] > resume_from]
+        return [self._history[-1]]
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncGenerator[bytes, None]:
+        """SSE body for one client; unsubscribes when the client disconnects"""
+        subscriber = self.subscribe(last_event_id)
+        try:
+            while (frame := await subscriber.queue.get()) is not None:
+                yield frame
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "subscribers": len(self._subscribers),
+            "last_event_id": self.event_id(self._last_id),
+            "history_frames": len(self._history),
+            "published": self.published,
+            "delivered": self.delivered,
+            "conflated": self.conflated,
+            "dropped_clients": self.dropped_clients,
+            "resumed": self.resumed,
+            "slow_policy": self.slow_policy,
+        }
+
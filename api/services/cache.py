@@ -0,0 +1,128 @@
+"""
+Async TTL Cache - Shared caching primitive for upstream data
+Used by GAIA (weather) and PROMETHEUS (web search) to avoid one upstream
+round trip per user turn.
+
+- TTL expiry with an LRU bound on entry count
+- Single-flight: concurrent misses for one key share a single fetch
+- Stale-while-revalidate: expired-but-recent values are served immediately
+  while one background refresh runs
+- Hit/miss counters for sizing
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class AsyncTTLCache:
+    """TTL + LRU cache with async single-flight fetches and stale-while-revalidate"""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: float = 0.0,
+        max_entries: int = 1024,
+        should_cache: Callable[[Any], bool] = None
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl  # Extra seconds an expired value may still be served
+        self.max_entries = max_entries
+        self.should_cache = should_cache or (lambda value: value is not None)
+
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()  # key -> (value, stored_at)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Fresh value for key without fetching, or None"""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            return entry[0]
+        return None
+
+    def set(self, key: Hashable, value: Any, stored_at: float = None):
+        """Store a value (e.g. pushed from a stream) and enforce the LRU bound"""
+        self._entries[key] = (value, stored_at if stored_at is not None else time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return a cached value, or fetch it once no matter how many callers are waiting"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, stored_at = entry
+            age = time.monotonic() - stored_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < self.ttl + self.stale_ttl:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self.refreshes += 1
+                    self._start_fetch(key, fetch)
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            task = self._start_fetch(key, fetch)
+        # shield: one cancelled caller mustn't cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Run fetch as the single in-flight task for key"""
+        async def _run():
+            try:
+                value = await fetch()
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self._inflight.pop(key, None)
+            if self.should_cache(value):
+                self.set(key, value)
+            else:
+                self.errors += 1
+            return value
+
+        task = asyncio.create_task(_run())
+        # Background refreshes may have no awaiter - don't log "exception never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """Hit/miss counters"""
+        lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+        served_from_cache = self.hits + self.stale_hits + self.coalesced
+        return {
+            "name": self.name,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_rate": round(served_from_cache / lookups, 4) if lookups else 0.0,
+        }
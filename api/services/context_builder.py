@@ -0,0 +1,171 @@
+"""
+Context Builder - Token-budgeted prompt context for Gemini
+Assembles ECHO, GAIA and PROMETHEUS sections against a fixed token budget
+so prompt size (and Gemini latency/cost) stays capped.
+
+Sections are allocated in priority order (0 = highest) and rendered in the
+order they were added. A section that doesn't fit is truncated from its head
+or tail, at line boundaries where possible.
+"""
+
+import os
+from dataclasses import dataclass
+from ddtrace import tracer
+
+# Approximate context limit for Gemini
+MAX_CONTEXT_TOKENS = int(os.getenv("MAX_CONTEXT_TOKENS", "4000"))
+
+TRUNCATION_MARKER = "...(truncated)"
+
+# Section priorities (lower = allocated first)
+PRIORITY_GAIA = 0
+PRIORITY_PROFILE = 1
+PRIORITY_SEARCH = 2
+PRIORITY_CONVERSATION = 3
+PRIORITY_SUMMARY = 4
+PRIORITY_RECALL = 5
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast local token estimate (~4 chars per token for English).
+    Word count is used as a floor so short-word text isn't undercounted.
+    """
+    if not text:
+        return 0
+    return max((len(text) + 3) // 4, len(text.split()))
+
+
+@dataclass
+class ContextSection:
+    """One named block of prompt context"""
+    name: str
+    text: str
+    priority: int
+    header: str = ""
+    keep: str = "head"  # "head" keeps the start when truncating, "tail" keeps the end
+
+
+def _cut(line: str, chars: int, keep: str) -> str:
+    """First or last chars characters of a line ("" for chars <= 0, not line[-0:])"""
+    if chars <= 0:
+        return ""
+    return line[-chars:] if keep == "tail" else line[:chars]
+
+
+def _truncate(text: str, max_tokens: int, keep: str) -> str:
+    """Trim text to roughly max_tokens, dropping whole lines first"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+
+    marker_tokens = estimate_tokens(TRUNCATION_MARKER)
+    budget = max_tokens - marker_tokens
+    if budget <= 0:
+        return ""
+
+    lines = text.split("\n")
+    if keep == "tail":
+        lines.reverse()
+
+    kept = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line) + 1  # +1 for the newline
+        if used + cost > budget:
+            if not kept:
+                # Single oversized line - cut by characters instead
+                chars = budget * 4
+                piece = _cut(line, chars, keep)
+                while piece and estimate_tokens(piece) > budget:
+                    chars = chars * budget // estimate_tokens(piece)
+                    piece = _cut(line, chars, keep)
+                if not piece:
+                    return ""
+                kept.append(piece)
+            break
+        kept.append(line)
+        used += cost
+
+    if keep == "tail":
+        kept.reverse()
+        return TRUNCATION_MARKER + "\n" + "\n".join(kept)
+    return "\n".join(kept) + "\n" + TRUNCATION_MARKER
+
+
+class ContextBuilder:
+    """Assemble prompt sections against a token budget"""
+
+    def __init__(self, budget: int = MAX_CONTEXT_TOKENS):
+        self.budget = budget
+        self.sections: list[ContextSection] = []
+
+    def add(self, name: str, text: str, priority: int, header: str = "", keep: str = "head") -> "ContextBuilder":
+        """Add a section; empty text is ignored"""
+        if text:
+            self.sections.append(ContextSection(name, text, priority, header, keep))
+        return self
+
+    def build(self) -> tuple[str, dict]:
+        """
+        Render the context string.
+        Returns (context, usage) where usage maps section name -> tokens used,
+        plus "total" and "budget".
+        """
+        remaining = self.budget
+        rendered: dict[str, str] = {}
+        usage: dict[str, int] = {}
+
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            header = f"{section.header}\n" if section.header else ""
+            available = remaining - estimate_tokens(header)
+            if available <= 0:
+                usage[section.name] = 0
+                continue
+
+            body = _truncate(section.text, available, section.keep)
+            if not body:
+                usage[section.name] = 0
+                continue
+
+            block = header + body
+            tokens = estimate_tokens(block)
+            rendered[section.name] = block
+            usage[section.name] = tokens
+            remaining -= tokens
+
+        context = "\n\n".join(rendered[s.name] for s in self.sections if s.name in rendered)
+        usage["total"] = sum(usage.values())
+        usage["budget"] = self.budget
+        return context, usage
+
+
+def record_context_usage(usage: dict):
+    """Tag the active trace span with per-section token usage"""
+    span = tracer.current_span()
+    if span is not None:
+        for name, tokens in usage.items():
+            span.set_tag(f"context.tokens.{name}", tokens)
+    print(f"[CONTEXT] Tokens used: {usage}")
+
+
+def build_prompt_context(
+    search_context: str = "",
+    gaia_context: str = "",
+    profile_context: str = "",
+    conversation_context: str = "",
+    summary_context: str = "",
+    recall_context: str = "",
+    budget: int = MAX_CONTEXT_TOKENS
+) -> tuple[str, dict]:
+    """Standard NEXUS context layout: search, real-time data, user profile, recall, summary, history"""
+    builder = ContextBuilder(budget)
+    builder.add("search", search_context, PRIORITY_SEARCH, header="[Web search results]")
+    builder.add("gaia", gaia_context, PRIORITY_GAIA, header="[Real-time data]")
+    builder.add("profile", profile_context, PRIORITY_PROFILE, header="[About the user]")
+    builder.add("recall", recall_context, PRIORITY_RECALL, header="[Relevant past conversations]")
+    builder.add("summary", summary_context, PRIORITY_SUMMARY, header="[Earlier conversation summary]")
+    builder.add("conversation", conversation_context, PRIORITY_CONVERSATION,
+                header="[Conversation history]", keep="tail")
+    context, usage = builder.build()
+    record_context_usage(usage)
+    return context, usage
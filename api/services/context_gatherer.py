@@ -0,0 +1,164 @@
+"""
+Context Gatherer - Fetch ECHO, GAIA and PROMETHEUS context concurrently
+Time-to-first-token is bounded by the slowest source we wait for, not the
+sum of all of them. Each source has its own timeout inside an overall
+deadline; a source that misses it is dropped from the prompt instead of
+blocking the turn.
+"""
+
+import os
+import time
+import asyncio
+from typing import Any, Awaitable, Optional
+from ddtrace import tracer
+
+from services.context_builder import build_prompt_context
+
+# Per-source timeouts and overall deadline (seconds)
+CONTEXT_DEADLINE = float(os.getenv("CONTEXT_DEADLINE_SECONDS", "3.0"))
+SOURCE_TIMEOUTS = {
+    "memory": float(os.getenv("CONTEXT_MEMORY_TIMEOUT", "1.0")),
+    "gaia": float(os.getenv("CONTEXT_GAIA_TIMEOUT", "1.5")),
+    "search": float(os.getenv("CONTEXT_SEARCH_TIMEOUT", "3.0")),
+}
+# How long GAIA waits for the session (user's location) before using the default city
+GAIA_LOCATION_TIMEOUT = float(os.getenv("CONTEXT_GAIA_LOCATION_TIMEOUT", "0.3"))
+
+
+async def gather_sources(
+    sources: dict[str, Awaitable],
+    timeouts: dict[str, float] = None,
+    deadline: float = CONTEXT_DEADLINE
+) -> tuple[dict[str, Any], dict[str, dict]]:
+    """
+    Await all sources concurrently.
+    Returns (results, timings); a source that times out or fails maps to None.
+    """
+    timeouts = timeouts or SOURCE_TIMEOUTS
+    start = time.perf_counter()
+
+    async def _run(name: str, awaitable: Awaitable) -> tuple[Any, dict]:
+        timeout = min(timeouts.get(name, deadline), deadline)
+        with tracer.trace("context.source", service="nexus-api", resource=name) as span:
+            try:
+                result = await asyncio.wait_for(awaitable, timeout)
+                status = "ok"
+            except asyncio.TimeoutError:
+                result, status = None, "timeout"
+            except Exception as e:
+                print(f"[CONTEXT] {name} failed: {e}")
+                result, status = None, "error"
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            if span is not None:
+                span.set_tag("context.status", status)
+                span.set_tag("context.ms", elapsed_ms)
+        if status != "ok":
+            print(f"[CONTEXT] Dropped {name} ({status} after {elapsed_ms}ms)")
+        return result, {"ms": elapsed_ms, "status": status}
+
+    names = list(sources)
+    outcomes = await asyncio.gather(*(_run(name, sources[name]) for name in names))
+    results = {name: outcome[0] for name, outcome in zip(names, outcomes)}
+    timings = {name: outcome[1] for name, outcome in zip(names, outcomes)}
+    timings["total"] = {"ms": round((time.perf_counter() - start) * 1000, 1), "status": "ok"}
+    return results, timings
+
+
+async def gather_turn_context(
+    text: str,
+    user_id: str,
+    session_id: str,
+    search: Optional[str] = "context"
+) -> dict:
+    """
+    Build the prompt context for one user turn.
+
+    search: None (skip PROMETHEUS), "context" (context string only) or
+    "sources" (context string plus citation list).
+
+    Returns {"context", "context_tokens", "sources", "timings", "cache"}, where
+    cache is {"key", "ttl"} for the response cache, or None for questions
+    about the user or the conversation. Cacheable questions are answered from
+    shared context only (GAIA, PROMETHEUS): with ECHO sections in the prompt,
+    any session with history would make every answer personal.
+    """
+    from services.memory import aget_memory
+    from services.gaia import get_gaia
+    from services.response_cache import RESPONSE_CACHE_ENABLED, is_cacheable_query
+
+    shared = RESPONSE_CACHE_ENABLED and is_cacheable_query(text)
+
+    # One session load shared by ECHO and GAIA (which needs the user's location)
+    session = asyncio.ensure_future(aget_memory(user_id, session_id))
+    # The load may outlive both sources; retrieve its error so asyncio doesn't log it as unhandled
+    session.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    async def _memory():
+        memory = await asyncio.shield(session)
+        return await memory.aget_context_sections(text)
+
+    async def _gaia():
+        # A slow session load must not cost GAIA its own budget: fall back to the default city
+        try:
+            memory = await asyncio.wait_for(asyncio.shield(session), GAIA_LOCATION_TIMEOUT)
+            location = memory.get_user_location()
+        except Exception:
+            location = None
+        return await get_gaia().build_context(location=location)
+
+    async def _search():
+        from services.prometheus import search_if_needed, search_with_sources
+        if search == "sources":
+            return await search_with_sources(text)
+        return await search_if_needed(text), []
+
+    sources = {"gaia": _gaia()}
+    if not shared:
+        sources["memory"] = _memory()
+    if search:
+        sources["search"] = _search()
+
+    results, timings = await gather_sources(sources)
+
+    memory_sections = results.get("memory") or {}
+    search_context, citations = results.get("search") or ("", [])
+
+    context, context_tokens = build_prompt_context(
+        search_context=search_context,
+        gaia_context=results["gaia"] or "",
+        profile_context=memory_sections.get("profile", ""),
+        conversation_context=memory_sections.get("conversation", ""),
+        summary_context=memory_sections.get("summary", ""),
+        recall_context=memory_sections.get("recall", "")
+    )
+    print(f"[CONTEXT] Source timings: {timings}")
+
+    return {
+        "context": context,
+        "context_tokens": context_tokens,
+        "sources": citations,
+        "timings": timings,
+        "cache": _response_cache_policy(results["gaia"] or "", search_context) if shared else None,
+    }
+
+
+def _response_cache_policy(gaia_context: str, search_context: str) -> dict:
+    """
+    Cache key and TTL bounded by the sources' freshness, for a prompt built
+    from shared context only - the key covers everything the answer saw.
+    """
+    from services.response_cache import RESPONSE_CACHE_TTL, RESPONSE_CACHE_SEARCH_TTL, shared_context_key
+    from services.gaia import WEATHER_CACHE_TTL
+
+    # The clock line changes every minute; clock questions are never cached
+    gaia_key = "\n".join(l for l in gaia_context.split("\n") if not l.startswith("Current time:"))
+
+    ttl = RESPONSE_CACHE_TTL
+    if gaia_key:
+        ttl = min(ttl, WEATHER_CACHE_TTL)
+    if search_context:
+        ttl = min(ttl, RESPONSE_CACHE_SEARCH_TTL)
+    return {
+        "key": shared_context_key(gaia_key, search_context),
+        "ttl": ttl,
+    }
@@ -1,13 +1,26 @@
 """
 ElevenLabs Service - Text-to-Speech Integration
 Day 2: Voice Round-Trip
+
+Clients are created once and reused, so keep-alive connections (and their
+TLS sessions) carry over between calls. Async requests are bounded by a
+semaphore sized to the plan's concurrency limit, with a bounded wait queue
+that rejects fast when full instead of piling up.
+
+Benchmark pooled vs per-call clients: python -m bench.elevenlabs
 """
 
 import os
-import io
-from typing import AsyncGenerator
+import time
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional
+import httpx
 from ddtrace import tracer
 
+from services.tts_cache import PREWARM_PHRASES, get_tts_cache, tts_cache_key
+
 # ElevenLabs SDK
 try:
     from elevenlabs import ElevenLabs
@@ -19,6 +32,11 @@ except ImportError:
 
 # Configuration
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
+ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "")  # Override, e.g. a local stub server
+ELEVENLABS_MAX_CONCURRENCY = int(os.getenv("ELEVENLABS_MAX_CONCURRENCY", "5"))  # Plan's concurrent request limit
+ELEVENLABS_MAX_QUEUED = int(os.getenv("ELEVENLABS_MAX_QUEUED", "20"))  # Waiting requests before rejecting
+ELEVENLABS_QUEUE_TIMEOUT = float(os.getenv("ELEVENLABS_QUEUE_TIMEOUT", "10"))  # Max seconds to wait for a slot
+ELEVENLABS_KEEPALIVE_SECONDS = float(os.getenv("ELEVENLABS_KEEPALIVE_SECONDS", "60"))
 
 # Default voice settings
 DEFAULT_VOICE_ID = "pNInz6obpgDQGcFmaJgB"  # Adam - deep, professional voice
@@ -28,30 +46,144 @@ DEFAULT_VOICE_ID = "pNInz6obpgDQGcFmaJgB"  # Adam - deep, professional voice
 # "EXAVITQu4vr4xnSDxMaL" - Bella (female, soft)
 # "ErXwobaYiN019PkySvjV" - Antoni (male, dynamic)
 
+MODEL_ID = "eleven_turbo_v2_5"  # Fastest model, ~300ms latency
+OUTPUT_FORMAT = "mp3_44100_128"
+
+
+# ============ Pooled Clients ============
+
+_client: Optional["ElevenLabs"] = None
+_async_client: Optional["AsyncElevenLabs"] = None
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_clients_lock = threading.Lock()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=ELEVENLABS_MAX_CONCURRENCY,
+        max_keepalive_connections=ELEVENLABS_MAX_CONCURRENCY,
+        keepalive_expiry=ELEVENLABS_KEEPALIVE_SECONDS
+    )
+
+
+def _client_kwargs() -> dict:
+    kwargs = {"api_key": ELEVENLABS_API_KEY}
+    if ELEVENLABS_BASE_URL:
+        kwargs["base_url"] = ELEVENLABS_BASE_URL
+    return kwargs
 
-def get_client() -> ElevenLabs | None:
-    """Get ElevenLabs client"""
+
+def get_client() -> "ElevenLabs | None":
+    """Get the shared ElevenLabs client"""
+    global _client, _http_client
     if not ELEVENLABS_AVAILABLE:
         return None
     if not ELEVENLABS_API_KEY:
         print("[WARN] ELEVENLABS_API_KEY not set. TTS disabled.")
         return None
-    return ElevenLabs(api_key=ELEVENLABS_API_KEY)
+    with _clients_lock:
+        if _client is None:
+            _http_client = httpx.Client(limits=_pool_limits(), timeout=httpx.Timeout(30.0, connect=5.0))
+            _client = ElevenLabs(**_client_kwargs(), httpx_client=_http_client)
+    return _client
 
 
-def get_async_client() -> AsyncElevenLabs | None:
-    """Get async ElevenLabs client for streaming"""
+def get_async_client() -> "AsyncElevenLabs | None":
+    """Get the shared async ElevenLabs client for streaming"""
+    global _async_client, _async_http_client
     if not ELEVENLABS_AVAILABLE:
         return None
     if not ELEVENLABS_API_KEY:
         return None
-    return AsyncElevenLabs(api_key=ELEVENLABS_API_KEY)
+    with _clients_lock:
+        if _async_client is None:
+            _async_http_client = httpx.AsyncClient(limits=_pool_limits(), timeout=httpx.Timeout(30.0, connect=5.0))
+            _async_client = AsyncElevenLabs(**_client_kwargs(), httpx_client=_async_http_client)
+    return _async_client
+
+
+async def close_tts_clients():
+    """Close pooled connections (app shutdown)"""
+    global _client, _async_client, _http_client, _async_http_client
+    with _clients_lock:
+        http_client, async_http_client = _http_client, _async_http_client
+        _client = _async_client = _http_client = _async_http_client = None
+    if async_http_client is not None:
+        await async_http_client.aclose()
+    if http_client is not None:
+        http_client.close()
+
+
+class TTSOverloadedError(Exception):
+    """Too many TTS requests already waiting for a slot"""
+
+
+class TTSLimiter:
+    """Concurrency slots for TTS requests with a bounded wait queue"""
+    
+    def __init__(self, max_concurrency: int, max_queued: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        self.active = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_ms_total = 0.0
+    
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot; raises TTSOverloadedError when the queue is full or the wait times out"""
+        # Counted before any await, so a burst can't slip past the check
+        if self.active + self.waiting >= self.max_concurrency + self.max_queued:
+            self.rejected += 1
+            raise TTSOverloadedError(f"{self.active + self.waiting} TTS requests already in flight or queued")
+        
+        start = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise TTSOverloadedError(f"No TTS slot within {self.queue_timeout}s")
+        finally:
+            self.waiting -= 1
+        self.wait_ms_total += (time.perf_counter() - start) * 1000
+        
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.completed += 1
+            self._semaphore.release()
+    
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queued": self.max_queued,
+            "active": self.active,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": round(self.wait_ms_total / self.completed, 2) if self.completed else 0.0,
+        }
+
+
+_limiter = TTSLimiter(ELEVENLABS_MAX_CONCURRENCY, ELEVENLABS_MAX_QUEUED, ELEVENLABS_QUEUE_TIMEOUT)
+
+def tts_pool_stats() -> dict:
+    return _limiter.stats()
 
 
 @tracer.wrap(service="nexus-elevenlabs", resource="tts")
 def text_to_speech(text: str, voice_id: str = DEFAULT_VOICE_ID) -> bytes | None:
     """
-    Convert text to speech audio (synchronous)
+    Convert text to speech audio (synchronous).
+    Async code should use atext_to_speech - this blocks the calling thread.
     
     Args:
         text: Text to convert to speech
@@ -60,6 +192,13 @@ def text_to_speech(text: str, voice_id: str = DEFAULT_VOICE_ID) -> bytes | None:
     Returns:
         Audio bytes (mp3) or None if unavailable
     """
+    cache = get_tts_cache()
+    key = tts_cache_key(text, voice_id, MODEL_ID, OUTPUT_FORMAT)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
     client = get_client()
     
     if client is None:
@@ -71,13 +210,15 @@ def text_to_speech(text: str, voice_id: str = DEFAULT_VOICE_ID) -> bytes | None:
         audio = client.text_to_speech.convert(
             voice_id=voice_id,
             text=text,
-            model_id="eleven_turbo_v2_5",  # Fastest model, ~300ms latency
-            output_format="mp3_44100_128"
+            model_id=MODEL_ID,
+            output_format=OUTPUT_FORMAT
         )
         
         # Collect all chunks into bytes
         audio_bytes = b"".join(audio)
         print(f"[TTS] Generated {len(audio_bytes)} bytes of audio")
+        if cache is not None:
+            cache.put(key, audio_bytes)
         return audio_bytes
         
     except Exception as e:
@@ -93,8 +234,22 @@ async def text_to_speech_stream(
     """
     Stream text-to-speech audio (for low latency)
     
-    Yields audio chunks as they're generated.
+    Yields audio chunks as they're generated; cached clips are replayed
+    from the TTS cache instead.
     """
+    cache = get_tts_cache()
+    key = tts_cache_key(text, voice_id, MODEL_ID, OUTPUT_FORMAT)
+    if cache is not None:
+        # Opening the file and touching mmap'd pages can hit the disk - keep it off the loop
+        frames = await asyncio.to_thread(cache.iter_frames, key)
+        if frames is not None:
+            try:
+                while (frame := await asyncio.to_thread(next, frames, None)) is not None:
+                    yield frame
+            finally:
+                frames.close()
+            return
+    
     client = get_async_client()
     
     if client is None:
@@ -102,28 +257,62 @@ async def text_to_speech_stream(
         return
     
     try:
-        # Stream audio generation
-        async for chunk in client.text_to_speech.convert_as_stream(
-            voice_id=voice_id,
-            text=text,
-            model_id="eleven_turbo_v2_5",
-            output_format="mp3_44100_128"
-        ):
-            yield chunk
+        # Stream audio generation, holding a concurrency slot for the whole stream
+        chunks = []
+        async with _limiter.slot():
+            async for chunk in client.text_to_speech.convert_as_stream(
+                voice_id=voice_id,
+                text=text,
+                model_id=MODEL_ID,
+                output_format=OUTPUT_FORMAT
+            ):
+                chunks.append(chunk)
+                yield chunk
+        
+        # Only complete clips are cached (file write off the loop)
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, b"".join(chunks))
             
     except Exception as e:
         print(f"[ERROR] ElevenLabs streaming error: {e}")
 
 
+async def atext_to_speech(text: str, voice_id: str = DEFAULT_VOICE_ID) -> bytes | None:
+    """Convert text to speech audio without blocking the event loop"""
+    audio = b"".join([chunk async for chunk in text_to_speech_stream(text, voice_id)])
+    return audio or None
+
+
+async def prewarm_tts_cache(phrases: list[str] = PREWARM_PHRASES, voice_id: str = DEFAULT_VOICE_ID) -> int:
+    """
+    Synthesize fixed phrases that aren't cached yet; returns how many were generated.
+    Runs as a background task on the event loop: synthesis is async I/O and
+    cache disk access goes through worker threads.
+    """
+    cache = await asyncio.to_thread(get_tts_cache)  # First use scans the cache directory
+    if cache is None or get_async_client() is None:
+        return 0
+    
+    generated = 0
+    for phrase in phrases:
+        key = tts_cache_key(phrase, voice_id, MODEL_ID, OUTPUT_FORMAT)
+        if cache.contains(key):
+            continue
+        if await atext_to_speech(phrase, voice_id) is not None:
+            generated += 1
+    print(f"[TTS CACHE] Pre-warmed {generated} phrase(s)")
+    return generated
+
+
 async def get_available_voices() -> list:
     """Get list of available voices"""
-    client = get_client()
+    client = get_async_client()
     
     if client is None:
         return []
     
     try:
-        voices = client.voices.get_all()
+        voices = await client.voices.get_all()
         return [
             {"id": v.voice_id, "name": v.name, "category": v.category}
             for v in voices.voices
@@ -2,6 +2,8 @@
 GAIA Service - Real-Time Earth Data Streams
 Day 5-6: Connect NEXUS to live data about the world
 
+Benchmark: python -m bench.gaia
+
 Data streams:
 - Weather (Open-Meteo - FREE, no API key!)
 - News headlines (NewsAPI free tier)
@@ -10,11 +12,15 @@ Data streams:
 """
 
 import os
-import httpx
+import time
 from datetime import datetime, timezone
 from typing import Optional
 from ddtrace import tracer
 
+from services.cache import AsyncTTLCache
+from services.geo import geohash_center, geohash_encode, valid_coordinates
+from services.http_clients import get_http_client
+
 # API Keys (free tiers)
 NEWS_API_KEY = os.getenv("NEWS_API_KEY", "")
 
@@ -24,12 +30,82 @@ DEFAULT_LAT = 40.7128
 DEFAULT_LON = -74.0060
 DEFAULT_CITY = "New York"
 
+# Weather cache - conditions change on a scale of minutes, not per user turn
+WEATHER_CACHE_TTL = float(os.getenv("GAIA_WEATHER_TTL", "300"))          # Seconds served fresh
+WEATHER_STALE_TTL = float(os.getenv("GAIA_WEATHER_STALE_TTL", "900"))    # Extra seconds served while refreshing
+WEATHER_GEOHASH_PRECISION = int(os.getenv("GAIA_GEOHASH_PRECISION", "5"))  # Cache cell size (5 = ~4.9 km)
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv("GAIA_WEATHER_MAX_ENTRIES", "4096"))  # Distinct cells kept
+
+# Kafka-fed cache (consumers/gaia_consumer.py) - served when fresher than these
+STREAM_WEATHER_MAX_AGE = float(os.getenv("GAIA_STREAM_WEATHER_MAX_AGE", "180"))  # Older stream events aren't cached
+STREAM_NEWS_MAX_AGE = float(os.getenv("GAIA_STREAM_NEWS_MAX_AGE", "3600"))
+STREAM_ALERT_MAX_AGE = float(os.getenv("GAIA_STREAM_ALERT_MAX_AGE", "3600"))
+
+# Weather code to description mapping
+WEATHER_CODES = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Foggy", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+    71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
+    80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
+    95: "Thunderstorm", 96: "Thunderstorm with hail", 99: "Thunderstorm with heavy hail"
+}
+
+
+def location_key(lat: float, lon: float) -> str:
+    """Geohash cell of a location - weather cache key and Kafka message key"""
+    return geohash_encode(lat, lon, WEATHER_GEOHASH_PRECISION)
+
+
+def _age_seconds(timestamp: Optional[str]) -> float:
+    """Age of a producer timestamp (naive UTC ISO format); inf if missing/invalid"""
+    if not timestamp:
+        return float("inf")
+    try:
+        return (datetime.utcnow() - datetime.fromisoformat(timestamp)).total_seconds()
+    except ValueError:
+        return float("inf")
+
+
+def weather_from_stream(event: dict) -> dict:
+    """Convert a gaia-updates weather event into the get_weather() format"""
+    def fahrenheit(value):
+        if event.get("temperature_unit") == "fahrenheit":
+            return value
+        return value * 9 / 5 + 32  # Open-Meteo default is Celsius
+    
+    temp = fahrenheit(event["temperature"])
+    feels_like = fahrenheit(event.get("apparent_temperature", event["temperature"]))
+    weather = {
+        "condition": WEATHER_CODES.get(event.get("weathercode", 0), "Unknown"),
+        "temperature": f"{round(temp)}°F",
+        "feels_like": f"{round(feels_like)}°F",
+        "mock": False,
+        "source": "stream"
+    }
+    if event.get("humidity") is not None:
+        weather["humidity"] = f"{event['humidity']}%"
+    if event.get("windspeed") is not None:
+        weather["wind"] = f"{round(event['windspeed'])} mph"
+    return weather
+
 
 class GaiaDataStream:
     """Real-time data streams for NEXUS"""
     
-    def __init__(self):
-        self.client = httpx.AsyncClient(timeout=10.0)
+    def __init__(self, geohash_precision: int = WEATHER_GEOHASH_PRECISION):
+        self.geohash_precision = geohash_precision
+        self.weather_cache = AsyncTTLCache(
+            "gaia-weather",
+            ttl=WEATHER_CACHE_TTL,
+            stale_ttl=WEATHER_STALE_TTL,
+            max_entries=WEATHER_CACHE_MAX_ENTRIES,
+            should_cache=lambda w: not w.get("error")
+        )
+        self.stream_hits = 0
+        self.stream_misses = 0
+        self.stream_warmed = 0
     
     # ============ Time & Date ============
     
@@ -52,11 +128,47 @@ class GaiaDataStream:
         """
         Get current weather using Open-Meteo (100% free, no API key!)
         https://open-meteo.com/
+        
+        Cached per geohash cell, so users in the same area share one
+        observation: the Kafka stream keeps cells warm, and a cold cell is
+        fetched once (at its center) however many users ask concurrently.
         """
-        lat = lat or DEFAULT_LAT
-        lon = lon or DEFAULT_LON
-        city = city or DEFAULT_CITY
+        if not valid_coordinates(lat, lon):
+            lat, lon, city = DEFAULT_LAT, DEFAULT_LON, city or DEFAULT_CITY
+        city = city or f"{lat:.2f}, {lon:.2f}"
+        
+        key = geohash_encode(lat, lon, self.geohash_precision)
+        weather = await self.weather_cache.get_or_fetch(key, lambda: self._fetch_weather(*geohash_center(key)))
+        if weather.get("source") == "stream":
+            self.stream_hits += 1
+        else:
+            self.stream_misses += 1
+        return dict(weather, location=city)
+    
+    def warm_from_stream(self, event: dict) -> bool:
+        """Seed a cell from a gaia-updates weather event (consumer thread hands these to the loop)"""
+        age = _age_seconds(event.get("timestamp"))
+        location = event.get("location") or {}
+        if (
+            event.get("simulated")
+            or event.get("temperature") is None
+            or age > STREAM_WEATHER_MAX_AGE
+            or not valid_coordinates(location.get("lat"), location.get("lon"))
+        ):
+            return False
+        
+        key = geohash_encode(location["lat"], location["lon"], self.geohash_precision)
+        current = self.weather_cache.get(key)
+        if current is not None and current.get("source") == "stream" and current.get("observed_at", "") > event["timestamp"]:
+            return False  # Out-of-order delivery - keep the newer observation
         
+        self.weather_cache.set(key, dict(weather_from_stream(event), observed_at=event["timestamp"]),
+                               stored_at=time.monotonic() - max(age, 0.0))
+        self.stream_warmed += 1
+        return True
+    
+    async def _fetch_weather(self, lat: float, lon: float) -> dict:
+        """Fetch current weather from Open-Meteo (uncached)"""
         try:
             # Open-Meteo free API - no key needed!
             url = "https://api.open-meteo.com/v1/forecast"
@@ -69,28 +181,16 @@ class GaiaDataStream:
                 "timezone": "auto"
             }
             
-            response = await self.client.get(url, params=params)
+            response = await get_http_client("open_meteo").get(url, params=params)
             data = response.json()
             
             if response.status_code == 200 and "current" in data:
                 current = data["current"]
                 
-                # Weather code to description mapping
-                weather_codes = {
-                    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
-                    45: "Foggy", 48: "Depositing rime fog",
-                    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
-                    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
-                    71: "Slight snow", 73: "Moderate snow", 75: "Heavy snow",
-                    80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
-                    95: "Thunderstorm", 96: "Thunderstorm with hail", 99: "Thunderstorm with heavy hail"
-                }
-                
                 weather_code = current.get("weather_code", 0)
-                condition = weather_codes.get(weather_code, "Unknown")
+                condition = WEATHER_CODES.get(weather_code, "Unknown")
                 
                 return {
-                    "location": city,
                     "condition": condition,
                     "temperature": f"{round(current['temperature_2m'])}°F",
                     "feels_like": f"{round(current['apparent_temperature'])}°F",
@@ -103,7 +203,7 @@ class GaiaDataStream:
                 
         except Exception as e:
             print(f"[GAIA] Weather error: {e}")
-            return {"error": str(e), "mock": True, "location": city}
+            return {"error": str(e), "mock": True}
     
     # ============ News ============
     
@@ -127,7 +227,7 @@ class GaiaDataStream:
                 "pageSize": 5
             }
             
-            response = await self.client.get(url, params=params)
+            response = await get_http_client("newsapi").get(url, params=params)
             data = response.json()
             
             if response.status_code == 200 and data.get("articles"):
@@ -152,10 +252,48 @@ class GaiaDataStream:
             print(f"[GAIA] News error: {e}")
             return {"error": str(e), "mock": True}
     
+    # ============ Real-Time Stream (Kafka) ============
+    
+    def get_stream_news(self) -> list[dict]:
+        """Fresh headlines from the Kafka-fed cache (no upstream call)"""
+        from consumers.gaia_consumer import get_cached_gaia_data
+        news = get_cached_gaia_data().get("news", [])
+        return [n for n in news if _age_seconds(n.get("timestamp")) <= STREAM_NEWS_MAX_AGE]
+    
+    def get_stream_alerts(self) -> list[dict]:
+        """Fresh alerts from the Kafka-fed cache (no upstream call)"""
+        from consumers.gaia_consumer import get_cached_gaia_data
+        alerts = get_cached_gaia_data().get("alerts", [])
+        return [a for a in alerts if _age_seconds(a.get("timestamp")) <= STREAM_ALERT_MAX_AGE]
+    
+    def cache_stats(self) -> dict:
+        """Stream-cache and weather-cache counters"""
+        lookups = self.stream_hits + self.stream_misses
+        return {
+            "stream": {
+                "hits": self.stream_hits,
+                "misses": self.stream_misses,
+                "hit_rate": round(self.stream_hits / lookups, 4) if lookups else 0.0,
+                "warmed": self.stream_warmed,
+                "max_age": STREAM_WEATHER_MAX_AGE
+            },
+            "geohash_precision": WEATHER_GEOHASH_PRECISION,
+            "weather": self.weather_cache.stats()
+        }
+    
     # ============ Context Builder ============
     
-    async def build_context(self, include_weather: bool = True, include_time: bool = True) -> str:
-        """Build a context string with current GAIA data for Gemini"""
+    async def build_context(
+        self,
+        include_weather: bool = True,
+        include_time: bool = True,
+        include_stream: bool = True,
+        location: Optional[dict] = None
+    ) -> str:
+        """
+        Build a context string with current GAIA data for Gemini
+        location: the user's {"lat", "lon", "city"} (UserProfile); default city if None
+        """
         parts = []
         
         # Always include time
@@ -165,18 +303,24 @@ class GaiaDataStream:
         
         # Include weather (now works without API key!)
         if include_weather:
-            weather = await self.get_weather()
+            location = location or {}
+            weather = await self.get_weather(location.get("lat"), location.get("lon"), location.get("city"))
             if not weather.get("error"):
                 parts.append(
                     f"Weather in {weather['location']}: {weather['condition']}, "
                     f"{weather['temperature']} (feels like {weather['feels_like']})"
                 )
         
+        # Headlines and alerts only ever come from the stream cache - no request-path fetch
+        if include_stream:
+            headlines = [n["title"] for n in self.get_stream_news() if n.get("title")]
+            if headlines:
+                parts.append("Latest headlines: " + "; ".join(headlines[:3]))
+            for alert in self.get_stream_alerts()[:2]:
+                if not alert.get("simulated"):
+                    parts.append(f"Alert ({alert.get('severity', 'info')}): {alert.get('message')}")
+        
         return "\n".join(parts) if parts else ""
-    
-    async def close(self):
-        """Close the HTTP client"""
-        await self.client.aclose()
 
 
 # Global instance
@@ -196,3 +340,4 @@ async def get_current_context() -> str:
     """Quick helper to get current GAIA context"""
     gaia = get_gaia()
     return await gaia.build_context()
+
@@ -2,12 +2,19 @@
 Gemini Service - Vertex AI Integration
 Now using Vertex AI with GCP $300 credits!
 Supports streaming for real-time text generation.
+
+All calls use the SDK's async API (generate_content_async) so a request
+waiting on Gemini never blocks the event loop.
 """
 
 import os
-from typing import AsyncGenerator
+import re
+import asyncio
+from typing import AsyncGenerator, Optional
 from ddtrace import tracer
 
+from services.response_cache import get_response_cache
+
 # Use Vertex AI (GCP credits) instead of free Generative AI API
 import vertexai
 from vertexai.generative_models import GenerativeModel
@@ -51,13 +58,24 @@ def _build_prompt(user_input: str, context: str = "") -> str:
 
 
 @tracer.wrap(service="nexus-gemini", resource="generate")
-async def generate_response(user_input: str, context: str = "") -> dict:
+async def generate_response(user_input: str, context: str = "", cache: Optional[dict] = None) -> dict:
     """
     Generate response using Vertex AI Gemini (non-streaming).
+    
+    cache: {"key", "ttl"} from the context gatherer to use the response cache,
+    or None to always call the model (personal or follow-up question).
     """
+    if cache:
+        cached = get_response_cache().get(user_input, cache["key"])
+        if cached is not None:
+            return {"text": cached, "confidence": 0.95, "sources": [], "cached": True}
+    
     try:
         full_prompt = _build_prompt(user_input, context)
-        response = model.generate_content(full_prompt)
+        response = await model.generate_content_async(full_prompt)
+        
+        if cache:
+            get_response_cache().put(user_input, cache["key"], response.text, cache["ttl"])
         
         return {
             "text": response.text,
@@ -75,26 +93,89 @@ async def generate_response(user_input: str, context: str = "") -> dict:
         }
 
 
-async def generate_response_stream(user_input: str, context: str = "") -> AsyncGenerator[str, None]:
+async def _replay_chunks(text: str) -> AsyncGenerator[str, None]:
+    """Stream a cached response in word-sized chunks, like a live one"""
+    for chunk in re.findall(r"\S+\s*", text):
+        yield chunk
+        await asyncio.sleep(0)
+
+
+async def generate_response_stream(
+    user_input: str,
+    context: str = "",
+    cache: Optional[dict] = None
+) -> AsyncGenerator[str, None]:
     """
     Generate response using Vertex AI Gemini with STREAMING.
     Yields text chunks as they're generated for real-time display.
+    
+    cache: as for generate_response; cache hits are still streamed in chunks.
     """
+    if cache:
+        cached = get_response_cache().get(user_input, cache["key"])
+        if cached is not None:
+            async for chunk in _replay_chunks(cached):
+                yield chunk
+            return
+    
     try:
         full_prompt = _build_prompt(user_input, context)
         
-        # Use streaming generation
-        response = model.generate_content(full_prompt, stream=True)
+        # Use async streaming generation - chunks arrive without blocking the loop
+        response = await model.generate_content_async(full_prompt, stream=True)
         
-        for chunk in response:
+        parts = []
+        async for chunk in response:
             if chunk.text:
+                parts.append(chunk.text)
                 yield chunk.text
+        
+        # Only complete, successful streams are cached
+        if cache and parts:
+            get_response_cache().put(user_input, cache["key"], "".join(parts), cache["ttl"])
                 
     except Exception as e:
         print(f"[ERROR] Streaming error: {e}")
         yield f"I'm having trouble processing that: {str(e)}"
 
 
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and NEXUS.
+Keep names, preferences, decisions and open questions; drop small talk.
+Write plain prose, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+
+Updated summary:"""
+
+
+@tracer.wrap(service="nexus-gemini", resource="summarize")
+async def summarize_conversation(previous_summary: str, messages: list[dict], max_words: int = 200) -> str:
+    """
+    Fold new messages into a running conversation summary.
+    Used by ECHO memory in the background, off the request path.
+    """
+    transcript = "\n".join(
+        f"{'User' if m['role'] == 'user' else 'NEXUS'}: {m['content']}" for m in messages
+    )
+    prompt = SUMMARY_PROMPT.format(
+        max_words=max_words,
+        summary=previous_summary or "(none yet)",
+        messages=transcript
+    )
+    response = await model.generate_content_async(prompt)
+    return response.text.strip()
+
+
+def set_model(new_model):
+    """Swap the generative model (e.g. a fake with generate_content_async for tests)"""
+    global model
+    model = new_model
+
+
 async def generate_with_tools(user_input: str, tools: list = None) -> dict:
     """
     Generate response with tool calling support (for agentic behavior)
@@ -0,0 +1,157 @@
+"""
+HTTP Client Registry - One pooled httpx client per upstream
+GAIA, PROMETHEUS and the GAIA producer share long-lived clients instead of
+opening (and never closing, or closing every cycle) their own.
+
+- Per-upstream connection limits, keep-alive expiry and timeouts
+- HTTP/2 where the upstream supports it and the h2 package is installed
+- Created lazily, closed at app shutdown (or producer exit)
+- Connection-reuse and pool-wait metrics from httpcore trace events
+"""
+
+import os
+import time
+from dataclasses import dataclass
+import httpx
+
+try:
+    import h2  # noqa: F401 - enables httpx HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30"))
+
+
+@dataclass(frozen=True)
+class Upstream:
+    """Connection settings for one external API"""
+    name: str
+    timeout: float
+    connect_timeout: float = 3.0
+    max_connections: int = 10
+    max_keepalive: int = 5
+    http2: bool = False
+
+
+UPSTREAMS = {
+    "open_meteo": Upstream("open_meteo", timeout=float(os.getenv("HTTP_TIMEOUT_OPEN_METEO", "10")), http2=True),
+    "newsapi": Upstream("newsapi", timeout=float(os.getenv("HTTP_TIMEOUT_NEWSAPI", "10")), max_connections=5),
+    "tavily": Upstream("tavily", timeout=float(os.getenv("HTTP_TIMEOUT_TAVILY", "15")), http2=True),
+}
+
+
+class UpstreamStats:
+    """Per-upstream request, connection and pool-wait counters"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self.reused_connections = 0
+        self.tls_handshakes = 0
+        self.server_errors = 0
+        self.pool_wait_ms_total = 0.0
+        self.pool_wait_ms_max = 0.0
+
+    def snapshot(self) -> dict:
+        connections = self.new_connections + self.reused_connections
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "reuse_rate": round(self.reused_connections / connections, 4) if connections else 0.0,
+            "tls_handshakes": self.tls_handshakes,
+            "server_errors": self.server_errors,
+            "avg_pool_wait_ms": round(self.pool_wait_ms_total / connections, 2) if connections else 0.0,
+            "max_pool_wait_ms": round(self.pool_wait_ms_max, 2),
+        }
+
+
+def _instrument(stats: UpstreamStats):
+    """Event hooks that attach an httpcore trace callback to each request"""
+
+    async def on_request(request: httpx.Request):
+        stats.requests += 1
+        queued_at = time.perf_counter()
+        state = {"connected": False}
+
+        async def trace(event: str, info: dict):
+            # First event after dequeuing from the pool: either a new TCP connect or
+            # headers going out on an existing connection
+            if event == "connection.connect_tcp.started":
+                state["connected"] = True
+                stats.new_connections += 1
+                _record_wait(queued_at)
+            elif event == "connection.start_tls.started":
+                stats.tls_handshakes += 1
+            elif event in ("http11.send_request_headers.started", "http2.send_request_headers.started"):
+                if not state["connected"]:
+                    state["connected"] = True
+                    stats.reused_connections += 1
+                    _record_wait(queued_at)
+
+        request.extensions["trace"] = trace
+
+    def _record_wait(queued_at: float):
+        waited = (time.perf_counter() - queued_at) * 1000
+        stats.pool_wait_ms_total += waited
+        stats.pool_wait_ms_max = max(stats.pool_wait_ms_max, waited)
+
+    async def on_response(response: httpx.Response):
+        if response.status_code >= 500:
+            stats.server_errors += 1
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+# ============ Registry ============
+
+_clients: dict[str, httpx.AsyncClient] = {}
+_stats: dict[str, UpstreamStats] = {}
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Shared client for a named upstream (see UPSTREAMS)"""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        upstream = UPSTREAMS[name]
+        stats = _stats.setdefault(name, UpstreamStats())
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(upstream.timeout, connect=upstream.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=upstream.max_connections,
+                max_keepalive_connections=upstream.max_keepalive,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+            ),
+            http2=upstream.http2 and HTTP2_AVAILABLE,
+            event_hooks=_instrument(stats)
+        )
+        _clients[name] = client
+    return client
+
+
+def init_http_clients():
+    """Create every upstream client up front (app startup)"""
+    for name in UPSTREAMS:
+        get_http_client(name)
+    print(f"[HTTP] Clients ready: {', '.join(UPSTREAMS)} (HTTP/2 {'on' if HTTP2_AVAILABLE else 'unavailable'})")
+
+
+async def close_http_clients():
+    """Close all pooled connections (app shutdown / producer exit)"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
+
+
+def http_client_stats() -> dict:
+    """Per-upstream metrics, including connection reuse and pool wait"""
+    return {
+        name: {
+            **stats.snapshot(),
+            "open": name in _clients,
+            "http2": UPSTREAMS[name].http2 and HTTP2_AVAILABLE,
+        }
+        for name, stats in _stats.items()
+    }
@@ -1,13 +1,24 @@
 """
 Kafka Producer - Confluent Cloud Integration
 Using official confluent-kafka library (NOT kafka-python)
+
+AsyncKafkaProducer batches instead of flushing per message: produce() only
+enqueues, librdkafka batches by linger.ms/batch.size with compression, a
+background thread services poll() for delivery callbacks, and each send
+returns an awaitable delivery future. flush() happens once, at shutdown.
+
+Benchmark vs flush-per-message: python -m bench.kafka_producer
 """
 
 import os
 import json
+import asyncio
+import time
+import threading
 from datetime import datetime
+from typing import Optional
 from ddtrace import tracer
-from confluent_kafka import Producer
+from confluent_kafka import KafkaException, Producer
 from confluent_kafka.admin import AdminClient, NewTopic
 
 # Confluent Cloud configuration
@@ -19,37 +30,151 @@ KAFKA_CONFIG = {
     'sasl.password': os.getenv('CONFLUENT_API_SECRET', ''),
 }
 
+# Batching: wait up to linger.ms to fill a batch, compress whole batches
+PRODUCER_TUNING = {
+    'linger.ms': int(os.getenv('KAFKA_LINGER_MS', '20')),
+    'batch.size': int(os.getenv('KAFKA_BATCH_BYTES', str(128 * 1024))),
+    'compression.type': os.getenv('KAFKA_COMPRESSION', 'lz4'),
+    'queue.buffering.max.messages': int(os.getenv('KAFKA_MAX_QUEUED_MESSAGES', '100000')),
+    'acks': 'all',
+    'enable.idempotence': True,  # Safe retries without duplicates or reordering
+}
+KAFKA_FLUSH_TIMEOUT = float(os.getenv('KAFKA_FLUSH_TIMEOUT', '10'))
+
+
+class AsyncKafkaProducer:
+    """
+    Non-blocking producer for asyncio code.
+    
+    await produce(...) enqueues (waiting only if the local queue is full) and
+    returns a future that resolves to the delivered message, or raises
+    KafkaException if delivery fails.
+    """
+    
+    def __init__(self, config: dict, producer: Producer = None, poll_timeout: float = 0.1):
+        self._producer = producer if producer is not None else Producer({**config, **PRODUCER_TUNING})
+        self._poll_timeout = poll_timeout
+        self._stopping = threading.Event()
+        self._poll_thread = threading.Thread(target=self._poll_loop, name="kafka-poll", daemon=True)
+        self._poll_thread.start()
+        
+        self.produced = 0
+        self.delivered = 0
+        self.failed = 0
+        self.unawaited_failed = 0
+        self.queue_full_waits = 0
+    
+    def _poll_loop(self):
+        """Serve delivery callbacks off the event loop"""
+        while not self._stopping.is_set():
+            self._producer.poll(self._poll_timeout)
+    
+    async def produce(self, topic: str, value: bytes, key: Optional[str] = None) -> asyncio.Future:
+        """Enqueue one message; returns its delivery future"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def on_delivery(err, msg):
+            # Runs on the poll thread
+            if err:
+                self.failed += 1
+            else:
+                self.delivered += 1
+            try:
+                loop.call_soon_threadsafe(_resolve_delivery, future, err, msg)
+            except RuntimeError:
+                pass  # Event loop already closed (shutdown)
+        
+        while True:
+            try:
+                self._producer.produce(topic, value=value, key=key, on_delivery=on_delivery)
+                break
+            except BufferError:
+                # Local queue full - back off until the poll thread drains deliveries
+                self.queue_full_waits += 1
+                await asyncio.sleep(0.01)
+        self.produced += 1
+        return future
+    
+    def detach(self, delivery: asyncio.Future):
+        """Fire-and-forget a delivery: nobody awaits it, so log and count a failure here"""
+        delivery.add_done_callback(self._on_unawaited_delivery)
+    
+    def _on_unawaited_delivery(self, delivery: asyncio.Future):
+        if delivery.cancelled():
+            return
+        err = delivery.exception()  # Retrieved, so asyncio doesn't warn about it at GC
+        if err is not None:
+            self.unawaited_failed += 1
+            print(f"[ERROR] Kafka delivery failed (not awaited): {err}")
+    
+    def flush(self, timeout: float = KAFKA_FLUSH_TIMEOUT) -> int:
+        """Block until queued messages are delivered; returns how many are still pending"""
+        return self._producer.flush(timeout)
+    
+    def close(self, timeout: float = KAFKA_FLUSH_TIMEOUT) -> int:
+        """Stop polling and flush, within timeout overall (shutdown only)"""
+        deadline = time.monotonic() + timeout
+        self._stopping.set()
+        self._poll_thread.join(timeout)
+        remaining = self.flush(max(0.0, deadline - time.monotonic()))
+        if remaining:
+            print(f"[WARN] {remaining} Kafka message(s) undelivered at shutdown")
+        return remaining
+    
+    def stats(self) -> dict:
+        return {
+            "produced": self.produced,
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "unawaited_failed": self.unawaited_failed,
+            "in_flight": len(self._producer),
+            "queue_full_waits": self.queue_full_waits,
+        }
+
+
+def _resolve_delivery(future: asyncio.Future, err, msg):
+    if future.done():
+        return
+    if err:
+        future.set_exception(KafkaException(err))
+    else:
+        future.set_result(msg)
+
+
 # Initialize producer (lazy)
-_producer = None
+_producer: Optional[AsyncKafkaProducer] = None
 
 
-def get_producer() -> Producer:
-    """Get or create Kafka producer"""
+def get_producer() -> Optional[AsyncKafkaProducer]:
+    """Get or create the shared Kafka producer"""
     global _producer
     if _producer is None:
         if not KAFKA_CONFIG['bootstrap.servers']:
             print("[WARN] Kafka not configured - running in mock mode")
             return None
-        _producer = Producer(KAFKA_CONFIG)
+        _producer = AsyncKafkaProducer(KAFKA_CONFIG)
     return _producer
 
 
-def delivery_callback(err, msg):
-    """Callback for message delivery confirmation"""
-    if err:
-        print(f'[ERROR] Message delivery failed: {err}')
-    else:
-        print(f'[OK] Message delivered to {msg.topic()} [{msg.partition()}]')
+def close_producer():
+    """Flush outstanding messages and stop the poll thread (app shutdown; blocks, so run it off the loop)"""
+    global _producer
+    if _producer is not None:
+        _producer.close()
+        _producer = None
 
 
 @tracer.wrap(service="nexus-kafka", resource="publish")
-async def publish_to_kafka(topic: str, data: dict) -> bool:
+async def publish_to_kafka(topic: str, data: dict, wait_for_delivery: bool = False) -> bool:
     """
     Publish message to Kafka topic
     
     Args:
         topic: Kafka topic name
         data: Message payload (will be JSON serialized)
+        wait_for_delivery: Await the broker ack instead of returning once queued
+            (otherwise a later delivery failure is only logged and counted)
     
     Returns:
         bool: Success status
@@ -65,16 +190,14 @@ async def publish_to_kafka(topic: str, data: dict) -> bool:
         # Add timestamp
         data['timestamp'] = datetime.utcnow().isoformat()
         
-        # Serialize and send
+        # Serialize and queue - batching and delivery happen in the background
         message = json.dumps(data).encode('utf-8')
-        producer.produce(
-            topic=topic,
-            value=message,
-            callback=delivery_callback
-        )
+        delivery = await producer.produce(topic, message)
         
-        # Flush to ensure delivery
-        producer.flush(timeout=5)
+        if wait_for_delivery:
+            await delivery
+        else:
+            producer.detach(delivery)
         
         return True
         
@@ -4,56 +4,122 @@ Day 3-4: Make NEXUS remember conversations and user preferences
 
 Architecture:
 - Short-term: Recent conversation window (in-memory)
-- Long-term: JSON file storage (upgradeable to vector DB)
+- Long-term: pluggable store - JSON snapshot + JSONL journal, or SQLite (see memory_store.py)
 - User profiles: Preferences and learned facts
 """
 
 import os
-import json
+import asyncio
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional
-from pathlib import Path
 from ddtrace import tracer
 
-# Memory storage directory
-MEMORY_DIR = Path(os.getenv("MEMORY_DIR", "./memory"))
-MEMORY_DIR.mkdir(exist_ok=True)
+from services.memory_store import MEMORY_DIR, MemoryStore, get_store
+from services.context_builder import MAX_CONTEXT_TOKENS, build_prompt_context
+from services.geo import valid_coordinates
+from services.vector_index import get_vector_index
 
 # Configuration
 MAX_SHORT_TERM_MESSAGES = 20  # Keep last N messages in context
-MAX_CONTEXT_TOKENS = 4000     # Approximate context limit for Gemini
+SUMMARY_BATCH_MESSAGES = int(os.getenv("MEMORY_SUMMARY_BATCH", "10"))  # Evicted messages folded per summary update
+SUMMARY_MAX_WORDS = int(os.getenv("MEMORY_SUMMARY_MAX_WORDS", "200"))
+RECALL_TOP_K = int(os.getenv("MEMORY_RECALL_TOP_K", "3"))  # Relevant past exchanges per prompt
+MEMORY_IO_WORKERS = int(os.getenv("MEMORY_IO_WORKERS", "4"))  # Threads for blocking file I/O
+MEMORY_WINDOW_MESSAGES = MAX_SHORT_TERM_MESSAGES + SUMMARY_BATCH_MESSAGES  # Messages kept in RAM per session
+
+# Session cache bounds for get_memory()
+MEMORY_CACHE_MAX_SESSIONS = int(os.getenv("MEMORY_CACHE_MAX_SESSIONS", "1000"))
+MEMORY_CACHE_IDLE_TTL = float(os.getenv("MEMORY_CACHE_IDLE_TTL", "1800"))  # Seconds
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Dedicated executor so memory file I/O never runs on the asyncio event loop
+_io_executor = ThreadPoolExecutor(max_workers=MEMORY_IO_WORKERS, thread_name_prefix="nexus-memory-io")
+
+
+async def run_memory_io(func, *args):
+    """Run a blocking memory operation on the memory I/O executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_io_executor, func, *args)
+
+
+def shutdown_memory_io():
+    """Wait for pending memory writes, flush cached sessions and stop the I/O executor"""
+    _io_executor.shutdown(wait=True)
+    _session_cache.flush_all()
+    get_store().close()
+
+
+# ============ Rolling Summarizer ============
+
+async def _gemini_summarizer(previous_summary: str, messages: list[dict]) -> str:
+    """Default summarizer - folds messages into the summary with Gemini"""
+    from services.gemini import summarize_conversation
+    return await summarize_conversation(previous_summary, messages, max_words=SUMMARY_MAX_WORDS)
+
+
+# async (previous_summary, new_messages) -> updated summary; swap for a stub in tests
+_summarizer = _gemini_summarizer
+
+# Strong references to in-flight summary tasks so they aren't garbage collected
+_background_tasks: set[asyncio.Task] = set()
+
+
+def set_summarizer(summarizer):
+    """Replace the summarization model (e.g. a local stub instead of Vertex AI)"""
+    global _summarizer
+    _summarizer = summarizer
+
+
+def _message_size(message: dict) -> int:
+    """Cheap estimate of a message's in-memory size in bytes"""
+    return len(message.get("content", "")) + 128  # Fixed overhead for role/timestamp/dict
+
+
+def _format_messages(messages: list[dict]) -> str:
+    """Render messages as a "Previous conversation" transcript"""
+    if not messages:
+        return ""
+    
+    lines = ["Previous conversation:"]
+    for msg in messages:
+        role = "User" if msg["role"] == "user" else "NEXUS"
+        lines.append(f"{role}: {msg['content']}")
+    
+    return "\n".join(lines) + "\n"
 
 
 class ConversationMemory:
-    """Manages conversation history for a session"""
+    """
+    Manages conversation history for a session.
     
-    def __init__(self, session_id: str = "default"):
-        self.session_id = session_id
-        self.messages: list[dict] = []
-        self.session_file = MEMORY_DIR / f"session_{session_id}.json"
-        self._load()
+    Persistence is delegated to the configured MemoryStore backend
+    (JSON journal or SQLite). Only the recent window (enough for the prompt
+    and the next summary batch) is kept in memory; older messages are paged
+    in from the store when needed.
+    """
     
-    def _load(self):
-        """Load existing session if available"""
-        if self.session_file.exists():
-            try:
-                data = json.loads(self.session_file.read_text())
-                self.messages = data.get("messages", [])
-            except Exception as e:
-                print(f"[MEMORY] Failed to load session: {e}")
-                self.messages = []
+    def __init__(self, session_id: str = "default", store: MemoryStore = None):
+        self.session_id = session_id
+        self.store = store or get_store()
+        
+        # messages holds the window [first_seq, message_count) of the full history
+        self.messages, self.message_count = self.store.load_recent(session_id, MEMORY_WINDOW_MESSAGES)
+        self.first_seq = self.message_count - len(self.messages)
+        self.size_bytes = sum(_message_size(m) for m in self.messages)  # Approximate in-memory footprint
+        
+        # Rolling summary of the first summarized_count messages
+        summary = self.store.load_summary(session_id) or {}
+        self.summary: str = summary.get("summary", "")
+        self.summarized_count: int = min(summary.get("summarized_count", 0), self.message_count)
     
-    def _save(self):
-        """Persist session to disk"""
-        try:
-            data = {
-                "session_id": self.session_id,
-                "messages": self.messages,
-                "updated_at": datetime.utcnow().isoformat()
-            }
-            self.session_file.write_text(json.dumps(data, indent=2))
-        except Exception as e:
-            print(f"[MEMORY] Failed to save session: {e}")
+    def flush(self):
+        """Make the session cheap to reload (compacts the JSON journal)"""
+        self.store.flush_session(self.session_id)
     
     def add_message(self, role: str, content: str, metadata: dict = None):
         """Add a message to the conversation history"""
@@ -63,53 +129,95 @@ class ConversationMemory:
             "timestamp": datetime.utcnow().isoformat(),
             "metadata": metadata or {}
         }
+        self.store.append_message(self.session_id, message, self.message_count)
         self.messages.append(message)
-        self._save()
+        self.message_count += 1
+        self.size_bytes += _message_size(message)
+        
+        # Older messages stay in the store only
+        excess = len(self.messages) - MEMORY_WINDOW_MESSAGES
+        if excess > 0:
+            self.size_bytes -= sum(_message_size(m) for m in self.messages[:excess])
+            del self.messages[:excess]
+            self.first_seq += excess
         return message
     
+    def get_messages(self, start: int, end: int) -> list[dict]:
+        """Messages [start, end) of the full history, paged from the store if older than the window"""
+        start, end = max(start, 0), min(end, self.message_count)
+        if start >= end:
+            return []
+        if start >= self.first_seq:
+            return self.messages[start - self.first_seq:end - self.first_seq]
+        older = self.store.load_messages_range(self.session_id, start, min(end, self.first_seq))
+        return older + self.messages[:max(end - self.first_seq, 0)]
+    
+    def has_pending_summary(self) -> bool:
+        """True once a batch of messages has left the recent window unsummarized (no I/O)"""
+        return self.message_count - MAX_SHORT_TERM_MESSAGES - self.summarized_count >= SUMMARY_BATCH_MESSAGES
+    
+    def pending_summary_messages(self) -> list[dict]:
+        """Messages that have left the recent window but aren't in the summary yet"""
+        if not self.has_pending_summary():
+            return []
+        return self.get_messages(self.summarized_count, self.message_count - MAX_SHORT_TERM_MESSAGES)
+    
+    def set_summary(self, summary: str, summarized_count: int):
+        """Persist an updated rolling summary"""
+        self.summary = summary
+        self.summarized_count = summarized_count
+        self.store.save_summary(self.session_id, summary, summarized_count)
+    
+    def get_unsummarized_window(self) -> list[dict]:
+        """Recent messages not covered by the summary (bounded if summarization lags)"""
+        limit = min(self.message_count - self.summarized_count, MEMORY_WINDOW_MESSAGES)
+        return self.messages[-limit:] if limit > 0 else []
+    
     def get_context_window(self, max_messages: int = None) -> list[dict]:
         """Get recent messages for context"""
         limit = max_messages or MAX_SHORT_TERM_MESSAGES
-        return self.messages[-limit:]
+        return self.get_messages(self.message_count - limit, self.message_count)
     
     def format_for_gemini(self, max_messages: int = None) -> str:
         """Format conversation history for Gemini prompt"""
-        context = self.get_context_window(max_messages)
-        if not context:
-            return ""
-        
-        formatted = "Previous conversation:\n"
-        for msg in context:
-            role = "User" if msg["role"] == "user" else "NEXUS"
-            formatted += f"{role}: {msg['content']}\n"
-        
-        return formatted
+        return _format_messages(self.get_context_window(max_messages))
     
     def clear(self):
         """Clear session history"""
         self.messages = []
-        if self.session_file.exists():
-            self.session_file.unlink()
+        self.message_count = 0
+        self.first_seq = 0
+        self.size_bytes = 0
+        self.summary = ""
+        self.summarized_count = 0
+        self.store.clear_session(self.session_id)
 
 
 class UserProfile:
-    """Manages user preferences and learned facts"""
+    """
+    Manages user preferences and learned facts.
+    
+    The profile belongs to the user, not a session: get the shared instance
+    with get_user_profile() so every session sees (and saves) the same data.
+    """
     
-    def __init__(self, user_id: str = "default"):
+    def __init__(self, user_id: str = "default", store: MemoryStore = None):
         self.user_id = user_id
-        self.profile_file = MEMORY_DIR / f"user_{user_id}.json"
+        self.store = store or get_store()
         self.data = self._load()
+        
+        # Shared by every session of the user, so writes are serialized here
+        self._lock = threading.RLock()
     
     def _load(self) -> dict:
         """Load user profile"""
-        if self.profile_file.exists():
-            try:
-                return json.loads(self.profile_file.read_text())
-            except:
-                pass
+        data = self.store.load_profile(self.user_id)
+        if data:
+            return data
         return {
             "user_id": self.user_id,
             "name": None,
+            "location": None,  # {"lat", "lon", "city"} - personalizes GAIA weather
             "preferences": {},
             "facts": [],  # Things learned about the user
             "created_at": datetime.utcnow().isoformat()
@@ -118,31 +226,53 @@ class UserProfile:
     def _save(self):
         """Save user profile"""
         self.data["updated_at"] = datetime.utcnow().isoformat()
-        self.profile_file.write_text(json.dumps(self.data, indent=2))
+        self.store.save_profile(self.data)
     
     def set_name(self, name: str):
         """Set user's name"""
-        self.data["name"] = name
-        self._save()
+        with self._lock:
+            self.data["name"] = name
+            self._save()
+    
+    def set_location(self, lat: float, lon: float, city: str = None):
+        """Set user's location (raises ValueError for out-of-range coordinates)"""
+        if not valid_coordinates(lat, lon):
+            raise ValueError(f"Invalid coordinates: {lat}, {lon}")
+        with self._lock:
+            self.data["location"] = {"lat": lat, "lon": lon, "city": city}
+            self._save()
+    
+    def get_location(self) -> Optional[dict]:
+        """User's {"lat", "lon", "city"} if known"""
+        return self.data.get("location")
     
     def add_preference(self, key: str, value: str):
         """Add a user preference"""
-        self.data["preferences"][key] = value
-        self._save()
+        with self._lock:
+            self.data["preferences"][key] = value
+            self._save()
     
     def add_fact(self, fact: str):
         """Add a learned fact about the user"""
-        if fact not in self.data["facts"]:
-            self.data["facts"].append(fact)
-            self._save()
+        with self._lock:
+            if fact not in self.data["facts"]:
+                self.data["facts"].append(fact)
+                self._save()
     
     def get_context(self) -> str:
         """Format user profile for Gemini context"""
+        with self._lock:
+            return self._format_context()
+    
+    def _format_context(self) -> str:
         parts = []
         
         if self.data.get("name"):
             parts.append(f"User's name: {self.data['name']}")
         
+        if (self.data.get("location") or {}).get("city"):
+            parts.append(f"User's location: {self.data['location']['city']}")
+        
         if self.data.get("facts"):
             facts_str = "; ".join(self.data["facts"][-5:])  # Last 5 facts
             parts.append(f"Known about user: {facts_str}")
@@ -154,6 +284,20 @@ class UserProfile:
         return "\n".join(parts) if parts else ""
 
 
+# One profile per user, shared by all of the user's cached sessions
+_profiles: "weakref.WeakValueDictionary[str, UserProfile]" = weakref.WeakValueDictionary()
+_profiles_lock = threading.Lock()
+
+def get_user_profile(user_id: str) -> UserProfile:
+    """Get the user's profile, loading it from the store if no session holds it"""
+    with _profiles_lock:
+        profile = _profiles.get(user_id)
+        if profile is None:
+            profile = UserProfile(user_id)
+            _profiles[user_id] = profile
+        return profile
+
+
 # ============ Memory Manager (Main Interface) ============
 
 class MemoryManager:
@@ -164,16 +308,84 @@ class MemoryManager:
         self.session_id = session_id or f"{user_id}_{datetime.now().strftime('%Y%m%d')}"
         
         self.conversation = ConversationMemory(self.session_id)
-        self.profile = UserProfile(user_id)
+        self.profile = get_user_profile(user_id)
+        self.recall = get_vector_index(user_id)  # None when NumPy/recall is unavailable
+        
+        # Serializes access between the event loop and I/O executor threads
+        self._lock = threading.RLock()
+        self._summary_task: Optional[asyncio.Task] = None
     
     @tracer.wrap(service="nexus-memory", resource="add_exchange")
     def add_exchange(self, user_message: str, nexus_response: str):
         """Record a full exchange (user message + NEXUS response)"""
-        self.conversation.add_message("user", user_message)
-        self.conversation.add_message("nexus", nexus_response)
+        with self._lock:
+            seq = self.conversation.message_count
+            user_msg = self.conversation.add_message("user", user_message)
+            self.conversation.add_message("nexus", nexus_response)
+            
+            # Extract facts from the exchange (simple heuristic)
+            self._extract_facts(user_message)
+            
+            if self.recall is not None:
+                self.recall.add(
+                    f"User: {user_message}\nNEXUS: {nexus_response}",
+                    {"kind": "exchange", "session_id": self.session_id, "seq": seq,
+                     "timestamp": user_msg["timestamp"]}
+                )
+    
+    def size_bytes(self) -> int:
+        """Approximate in-memory footprint, used by the session cache"""
+        return self.conversation.size_bytes
+    
+    def flush(self):
+        """Compact the session journal so a reload reads a single snapshot"""
+        with self._lock:
+            self.conversation.flush()
+    
+    async def aadd_exchange(self, user_message: str, nexus_response: str):
+        """Record a full exchange without blocking the event loop"""
+        await run_memory_io(self.add_exchange, user_message, nexus_response)
+        self.schedule_summary()
+    
+    def schedule_summary(self):
+        """Fold evicted messages into the rolling summary in the background"""
+        if self._summary_task is not None and not self._summary_task.done():
+            return  # The running task picks up any new backlog
+        if not self.conversation.has_pending_summary():
+            return
         
-        # Extract facts from the exchange (simple heuristic)
-        self._extract_facts(user_message)
+        task = asyncio.create_task(self.asummarize())
+        self._summary_task = task
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    
+    @tracer.wrap(service="nexus-memory", resource="summarize")
+    async def asummarize(self):
+        """Update the rolling summary until no batch of evicted messages is pending"""
+        def _pending():
+            with self._lock:
+                # May page older messages from the store if summarization lagged
+                return (self.conversation.pending_summary_messages(), self.conversation.summary,
+                        self.conversation.summarized_count)
+        
+        while True:
+            pending, previous, start = await run_memory_io(_pending)
+            if not pending:
+                return
+            
+            try:
+                summary = await _summarizer(previous, pending)
+            except Exception as e:
+                print(f"[MEMORY] Summarization failed: {e}")
+                return
+            
+            def _commit():
+                with self._lock:
+                    # Skip if the session was cleared while the model was running
+                    conversation = self.conversation
+                    if conversation.summarized_count == start and conversation.message_count >= start + len(pending):
+                        conversation.set_summary(summary, start + len(pending))
+            await run_memory_io(_commit)
     
     def _extract_facts(self, user_message: str):
         """Simple fact extraction from user messages"""
@@ -193,37 +405,258 @@ class MemoryManager:
         
         # Interest detection
         if "i love" in msg_lower or "i like" in msg_lower or "i enjoy" in msg_lower:
-            self.profile.add_fact(user_message[:100])
+            fact = user_message[:100]
+            if fact not in self.profile.data["facts"]:
+                self.profile.add_fact(fact)
+                if self.recall is not None:
+                    self.recall.add(fact, {"kind": "fact", "session_id": self.session_id})
     
-    @tracer.wrap(service="nexus-memory", resource="get_context")
-    def get_full_context(self) -> str:
-        """Get complete context for Gemini prompt"""
-        parts = []
+    @tracer.wrap(service="nexus-memory", resource="recall")
+    def recall_relevant(self, query: str, k: int = RECALL_TOP_K) -> str:
+        """Top-k past exchanges/facts relevant to the query that aren't already in the prompt"""
+        if self.recall is None or not query:
+            return ""
         
-        # User profile context
-        profile_ctx = self.profile.get_context()
-        if profile_ctx:
-            parts.append(f"[About the user]\n{profile_ctx}")
+        with self._lock:
+            window_start = self.conversation.message_count - len(self.conversation.get_unsummarized_window())
+            recent_facts = set(self.profile.data.get("facts", [])[-5:])
         
-        # Conversation history
-        conv_ctx = self.conversation.format_for_gemini(10)  # Last 10 messages
-        if conv_ctx:
-            parts.append(f"[Conversation history]\n{conv_ctx}")
+        def already_in_prompt(payload: dict) -> bool:
+            if payload.get("kind") == "fact":
+                return payload.get("text") in recent_facts
+            return payload.get("session_id") == self.session_id and payload.get("seq", -1) >= window_start
         
-        return "\n\n".join(parts)
+        hits = self.recall.search(query, k=k, exclude=already_in_prompt)
+        lines = []
+        for hit in hits:
+            if hit.get("kind") == "fact":
+                lines.append(f"- Fact: {hit['text']}")
+            else:
+                date = (hit.get("timestamp") or "")[:10]
+                lines.append(f"- ({date}) {hit['text']}")
+        return "\n".join(lines)
+    
+    @tracer.wrap(service="nexus-memory", resource="get_context")
+    def get_full_context(self, query: str = None, budget: int = MAX_CONTEXT_TOKENS) -> str:
+        """Get ECHO context for a Gemini prompt, trimmed to the token budget"""
+        sections = self.get_context_sections(query)
+        context, _ = build_prompt_context(
+            profile_context=sections["profile"],
+            conversation_context=sections["conversation"],
+            summary_context=sections["summary"],
+            recall_context=sections["recall"],
+            budget=budget
+        )
+        return context
+    
+    async def aget_full_context(self, query: str = None, budget: int = MAX_CONTEXT_TOKENS) -> str:
+        """Get ECHO context without blocking the event loop"""
+        return await run_memory_io(self.get_full_context, query, budget)
+    
+    def get_context_sections(self, query: str = None) -> dict:
+        """
+        Profile, rolling summary, recent conversation and (given a query) recalled
+        past exchanges as separate sections (no headers), for the token-budgeted
+        ContextBuilder to trim.
+        """
+        with self._lock:
+            sections = {
+                "profile": self.profile.get_context(),
+                "summary": self.conversation.summary,
+                "conversation": _format_messages(self.conversation.get_unsummarized_window()),
+            }
+        sections["recall"] = self.recall_relevant(query) if query else ""
+        return sections
+    
+    async def aget_context_sections(self, query: str = None) -> dict:
+        """Get context sections without blocking the event loop"""
+        return await run_memory_io(self.get_context_sections, query)
     
     def get_user_name(self) -> Optional[str]:
         """Get user's name if known"""
         return self.profile.data.get("name")
+    
+    def get_user_facts(self) -> list[str]:
+        """Facts learned about the user"""
+        return list(self.profile.data.get("facts", []))
+    
+    def get_user_location(self) -> Optional[dict]:
+        """Get user's {"lat", "lon", "city"} if known"""
+        return self.profile.get_location()
+    
+    def set_user_location(self, lat: float, lon: float, city: str = None):
+        """Set user's location (raises ValueError for out-of-range coordinates)"""
+        self.profile.set_location(lat, lon, city)
 
 
 # ============ Global Instance Factory ============
 
-_memory_instances: dict[str, MemoryManager] = {}
+class SessionCache:
+    """
+    Bounded LRU cache of MemoryManagers with idle TTL and byte accounting.
+    
+    Evicted sessions are flushed to disk and rehydrated lazily on next access.
+    A session evicted while a request still holds its manager is handed back
+    to the next caller instead of being reloaded, and concurrent misses on one
+    session share a single load, so there is never more than one live manager
+    (and journal writer) per session.
+    """
+    
+    def __init__(self, max_sessions: int, idle_ttl: float, max_bytes: int):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_bytes = max_bytes
+        
+        # key -> (memory, last_access, accounted_bytes), ordered oldest access first
+        self._entries: OrderedDict[str, tuple[MemoryManager, float, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        # Evicted managers, kept only as long as something else still references them
+        self._released: "weakref.WeakValueDictionary[str, MemoryManager]" = weakref.WeakValueDictionary()
+        
+        # key -> set once the in-flight load for that session is cached
+        self._loading: dict[str, threading.Event] = {}
+        
+        self.hits = 0
+        self.misses = 0
+        self.revived = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, user_id: str, session_id: str = None) -> MemoryManager:
+        """Get a cached manager, loading it from disk on a miss"""
+        key = f"{user_id}:{session_id or 'default'}"
+        
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                evicted = self._expire(now)
+                memory = self._live(key)
+                if memory is not None:
+                    self.hits += 1
+                    self._put(key, memory, now)
+                    evicted += self._shrink()
+                    break
+                
+                # Loading can compact the journal, so a second loader would race the first
+                # manager's appends - wait for the in-flight load instead
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = self._loading[key] = threading.Event()
+                    break
+            
+            self._flush(evicted)
+            loading.wait()
+        
+        if memory is None:
+            # Load outside the lock so one slow disk read doesn't block other sessions
+            try:
+                memory = MemoryManager(user_id, session_id)
+                with self._lock:
+                    self.misses += 1
+                    self._put(key, memory, now)
+                    evicted += self._shrink()
+            finally:
+                with self._lock:
+                    del self._loading[key]
+                loading.set()
+        
+        self._flush(evicted)
+        return memory
+    
+    def _live(self, key: str) -> Optional[MemoryManager]:
+        """The cached manager, or an evicted one a request still holds (lock held)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[0]
+        memory = self._released.pop(key, None)
+        if memory is not None:
+            self.revived += 1
+        return memory
+    
+    def _put(self, key: str, memory: MemoryManager, now: float):
+        """Insert or refresh an entry at the most-recently-used end (lock held)"""
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[2]
+        size = memory.size_bytes()
+        self._entries[key] = (memory, now, size)
+        self._bytes += size
+    
+    def _pop_oldest(self) -> MemoryManager:
+        """Remove the least-recently-used entry (lock held)"""
+        key, (memory, _, size) = self._entries.popitem(last=False)
+        self._bytes -= size
+        self._released[key] = memory
+        return memory
+    
+    def _expire(self, now: float) -> list[MemoryManager]:
+        """Drop entries idle for longer than the TTL (lock held)"""
+        expired = []
+        while self._entries:
+            _, last_access, _ = next(iter(self._entries.values()))
+            if now - last_access < self.idle_ttl:
+                break
+            expired.append(self._pop_oldest())
+            self.expirations += 1
+        return expired
+    
+    def _shrink(self) -> list[MemoryManager]:
+        """Evict LRU entries until count and byte limits hold (lock held)"""
+        evicted = []
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_sessions or self._bytes > self.max_bytes
+        ):
+            evicted.append(self._pop_oldest())
+            self.evictions += 1
+        return evicted
+    
+    def _flush(self, memories: list[MemoryManager]):
+        """Persist released sessions before dropping them"""
+        for memory in memories:
+            try:
+                memory.flush()
+            except Exception as e:
+                print(f"[MEMORY] Failed to flush evicted session {memory.session_id}: {e}")
+    
+    def flush_all(self):
+        """Flush every cached session (used at shutdown)"""
+        with self._lock:
+            memories = [entry[0] for entry in self._entries.values()] + list(self._released.values())
+        self._flush(memories)
+    
+    def stats(self) -> dict:
+        """Hit/miss/eviction counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "sessions": len(self._entries),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "idle_ttl": self.idle_ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revived": self.revived,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_session_cache = SessionCache(MEMORY_CACHE_MAX_SESSIONS, MEMORY_CACHE_IDLE_TTL, MEMORY_CACHE_MAX_BYTES)
 
 def get_memory(user_id: str = "default", session_id: str = None) -> MemoryManager:
     """Get or create a memory manager for a user"""
-    key = f"{user_id}:{session_id or 'default'}"
-    if key not in _memory_instances:
-        _memory_instances[key] = MemoryManager(user_id, session_id)
-    return _memory_instances[key]
+    return _session_cache.get(user_id, session_id)
+
+
+def get_memory_cache_stats() -> dict:
+    """Session cache counters (hits, misses, evictions, bytes)"""
+    return _session_cache.stats()
+
+
+async def aget_memory(user_id: str = "default", session_id: str = None) -> MemoryManager:
+    """Get or create a memory manager, loading from disk off the event loop"""
+    return await run_memory_io(get_memory, user_id, session_id)
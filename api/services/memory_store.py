@@ -0,0 +1,560 @@
+"""
+ECHO Memory Storage Backends
+Pluggable persistence behind ConversationMemory / UserProfile
+
+Backends:
+- json: session snapshot + append-only JSONL journal, one file per user profile
+- sqlite: single WAL-mode database with indexed messages, facts and preferences
+
+Select with MEMORY_BACKEND=json|sqlite. Import existing JSON data with:
+    python -m services.memory_store migrate
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from typing import Optional
+from pathlib import Path
+
+# Memory storage directory
+MEMORY_DIR = Path(os.getenv("MEMORY_DIR", "./memory"))
+MEMORY_DIR.mkdir(exist_ok=True)
+
+# Configuration
+MEMORY_BACKEND = os.getenv("MEMORY_BACKEND", "json")
+MEMORY_DB_PATH = Path(os.getenv("MEMORY_DB_PATH", str(MEMORY_DIR / "echo.db")))
+JOURNAL_COMPACT_EVERY = int(os.getenv("MEMORY_JOURNAL_COMPACT_EVERY", "200"))  # Journal entries before snapshot
+
+
+class MemoryStore:
+    """Storage interface for ECHO sessions and user profiles"""
+
+    # ---- Sessions ----
+
+    def load_messages(self, session_id: str) -> list[dict]:
+        """Load the full message history of a session"""
+        raise NotImplementedError
+
+    def append_message(self, session_id: str, message: dict, seq: int):
+        """Persist one new message at position seq of the session history"""
+        raise NotImplementedError
+
+    def load_recent(self, session_id: str, limit: int) -> tuple[list[dict], int]:
+        """Last `limit` messages of a session (oldest first) and its total message count"""
+        raise NotImplementedError
+
+    def load_messages_range(self, session_id: str, start: int, end: int) -> list[dict]:
+        """Messages [start, end) of a session, for paging in history older than the recent window"""
+        raise NotImplementedError
+
+    def session_stats(self, session_id: str) -> dict:
+        """Message counts for a session"""
+        messages = self.load_messages(session_id)
+        return {
+            "total_messages": len(messages),
+            "user_messages": sum(1 for m in messages if m.get("role") == "user"),
+        }
+
+    def flush_session(self, session_id: str):
+        """Make the session cheap to reload (e.g. compact a journal)"""
+
+    def clear_session(self, session_id: str):
+        """Delete all stored messages (and the summary) of a session"""
+        raise NotImplementedError
+
+    def load_summary(self, session_id: str) -> Optional[dict]:
+        """Rolling summary {"summary": str, "summarized_count": int}, or None"""
+        raise NotImplementedError
+
+    def save_summary(self, session_id: str, summary: str, summarized_count: int):
+        """Persist the rolling summary covering the first summarized_count messages"""
+        raise NotImplementedError
+
+    # ---- Profiles ----
+
+    def load_profile(self, user_id: str) -> Optional[dict]:
+        """Load a user profile dict, or None if the user is unknown"""
+        raise NotImplementedError
+
+    def save_profile(self, data: dict):
+        """Persist a user profile dict (user_id, name, location, preferences, facts, timestamps)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release backend resources"""
+
+
+# ============ JSON Backend ============
+
+class JsonMemoryStore(MemoryStore):
+    """
+    One JSON snapshot per session plus an append-only JSONL journal.
+
+    Each message costs one journal append; the journal is folded into the
+    snapshot every JOURNAL_COMPACT_EVERY entries.
+    """
+
+    def __init__(self, base_dir: Path = MEMORY_DIR, compact_every: int = JOURNAL_COMPACT_EVERY):
+        self.base_dir = Path(base_dir)
+        self.compact_every = compact_every
+        self._journal_entries: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _session_file(self, session_id: str) -> Path:
+        return self.base_dir / f"session_{session_id}.json"
+
+    def _journal_file(self, session_id: str) -> Path:
+        return self.base_dir / f"session_{session_id}.jsonl"
+
+    def _profile_file(self, user_id: str) -> Path:
+        return self.base_dir / f"user_{user_id}.json"
+
+    def _summary_file(self, session_id: str) -> Path:
+        return self.base_dir / f"summary_{session_id}.json"
+
+    def load_messages(self, session_id: str) -> list[dict]:
+        """Load snapshot, then replay any journal entries written after it"""
+        messages = self._read_session(session_id)
+
+        entries, torn = self._replay_journal(session_id, messages)
+        with self._lock:
+            self._journal_entries[session_id] = entries
+
+        # Rewrite a clean snapshot so new appends don't land after a torn line
+        if torn or entries >= self.compact_every:
+            self._compact(session_id, messages)
+        return messages
+
+    def load_recent(self, session_id: str, limit: int) -> tuple[list[dict], int]:
+        # The snapshot has to be parsed in full; only the window outlives this call
+        messages = self.load_messages(session_id)
+        return (messages[-limit:] if limit > 0 else []), len(messages)
+
+    def load_messages_range(self, session_id: str, start: int, end: int) -> list[dict]:
+        return self.load_messages(session_id)[start:end]
+
+    def _read_session(self, session_id: str) -> list[dict]:
+        """Messages in the snapshot file (without the journal)"""
+        session_file = self._session_file(session_id)
+        if not session_file.exists():
+            return []
+        try:
+            return json.loads(session_file.read_text()).get("messages", [])
+        except Exception as e:
+            print(f"[MEMORY] Failed to load session: {e}")
+            return []
+
+    def _replay_journal(self, session_id: str, messages: list[dict]) -> tuple[int, bool]:
+        """Apply journal entries on top of the snapshot (crash recovery)"""
+        journal_file = self._journal_file(session_id)
+        if not journal_file.exists():
+            return 0, False
+
+        try:
+            lines = journal_file.read_text().split("\n")
+        except Exception as e:
+            print(f"[MEMORY] Failed to read journal: {e}")
+            return 0, False
+
+        entries = 0
+        torn = False
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Torn write from a crash - everything before it is intact
+                print(f"[MEMORY] Ignoring partial journal entry in {journal_file.name}")
+                torn = True
+                break
+
+            entries += 1
+            # Entries already folded into the snapshot (crash mid-compaction) are skipped
+            if entry.get("seq", 0) < len(messages):
+                continue
+            messages.append(entry["message"])
+
+        return entries, torn
+
+    def append_message(self, session_id: str, message: dict, seq: int):
+        """Append one message to the session journal"""
+        entry = {"seq": seq, "message": message}
+        try:
+            with open(self._journal_file(session_id), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            print(f"[MEMORY] Failed to append journal: {e}")
+            return
+
+        with self._lock:
+            entries = self._journal_entries.get(session_id, 0) + 1
+            self._journal_entries[session_id] = entries
+
+        if entries >= self.compact_every:
+            self._compact(session_id)
+
+    def _write_snapshot(self, session_id: str, messages: list[dict]) -> bool:
+        """Persist full session snapshot to disk (atomic replace)"""
+        try:
+            data = {
+                "session_id": session_id,
+                "messages": messages,
+                "updated_at": datetime.utcnow().isoformat()
+            }
+            session_file = self._session_file(session_id)
+            tmp_file = session_file.with_suffix(".json.tmp")
+            tmp_file.write_text(json.dumps(data, indent=2))
+            os.replace(tmp_file, session_file)
+            return True
+        except Exception as e:
+            print(f"[MEMORY] Failed to save session: {e}")
+            return False
+
+    def _compact(self, session_id: str, messages: list[dict] = None):
+        """
+        Fold the journal into the snapshot and truncate it.
+        Without messages, the history is rebuilt from disk (callers only keep a window).
+        """
+        if messages is None:
+            messages = self._read_session(session_id)
+            self._replay_journal(session_id, messages)
+        if self._write_snapshot(session_id, messages):
+            try:
+                self._journal_file(session_id).unlink(missing_ok=True)
+                with self._lock:
+                    self._journal_entries[session_id] = 0
+            except Exception as e:
+                print(f"[MEMORY] Failed to truncate journal: {e}")
+
+    def flush_session(self, session_id: str):
+        """Compact the journal so a reload reads a single snapshot"""
+        if self._journal_entries.get(session_id):
+            self._compact(session_id)
+
+    def clear_session(self, session_id: str):
+        """Delete snapshot and journal"""
+        with self._lock:
+            self._journal_entries.pop(session_id, None)
+        for path in (self._session_file(session_id), self._journal_file(session_id),
+                     self._summary_file(session_id)):
+            if path.exists():
+                path.unlink()
+
+    def load_summary(self, session_id: str) -> Optional[dict]:
+        summary_file = self._summary_file(session_id)
+        if summary_file.exists():
+            try:
+                return json.loads(summary_file.read_text())
+            except Exception as e:
+                print(f"[MEMORY] Failed to load summary: {e}")
+        return None
+
+    def save_summary(self, session_id: str, summary: str, summarized_count: int):
+        data = {
+            "session_id": session_id,
+            "summary": summary,
+            "summarized_count": summarized_count,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        summary_file = self._summary_file(session_id)
+        tmp_file = summary_file.with_suffix(".json.tmp")
+        tmp_file.write_text(json.dumps(data, indent=2))
+        os.replace(tmp_file, summary_file)
+
+    def load_profile(self, user_id: str) -> Optional[dict]:
+        """Load user profile"""
+        profile_file = self._profile_file(user_id)
+        if profile_file.exists():
+            try:
+                return json.loads(profile_file.read_text())
+            except Exception as e:
+                print(f"[MEMORY] Failed to load profile: {e}")
+        return None
+
+    def save_profile(self, data: dict):
+        """Save user profile"""
+        self._profile_file(data["user_id"]).write_text(json.dumps(data, indent=2))
+
+
+# ============ SQLite Backend ============
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT,
+    metadata TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_session ON messages (session_id, id);
+CREATE INDEX IF NOT EXISTS idx_messages_session_role ON messages (session_id, role);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    name TEXT,
+    location TEXT,
+    created_at TEXT,
+    updated_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS preferences (
+    user_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (user_id, key)
+);
+
+CREATE TABLE IF NOT EXISTS facts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    fact TEXT NOT NULL,
+    UNIQUE (user_id, fact)
+);
+CREATE INDEX IF NOT EXISTS idx_facts_user ON facts (user_id, id);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    session_id TEXT PRIMARY KEY,
+    summary TEXT NOT NULL,
+    summarized_count INTEGER NOT NULL,
+    updated_at TEXT
+);
+"""
+
+
+class SqliteMemoryStore(MemoryStore):
+    """Single SQLite database in WAL mode with indexed tables"""
+
+    def __init__(self, db_path: Path = MEMORY_DB_PATH):
+        self.db_path = Path(db_path)
+        # One shared connection; the lock serializes the memory I/O executor threads
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SQLITE_SCHEMA)
+            # Databases created before profiles had a location column
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(profiles)")}
+            if "location" not in columns:
+                self._conn.execute("ALTER TABLE profiles ADD COLUMN location TEXT")
+            self._conn.commit()
+
+    @staticmethod
+    def _row_to_message(row: sqlite3.Row) -> dict:
+        return {
+            "role": row["role"],
+            "content": row["content"],
+            "timestamp": row["timestamp"],
+            "metadata": json.loads(row["metadata"]) if row["metadata"] else {}
+        }
+
+    def load_messages(self, session_id: str) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp, metadata FROM messages WHERE session_id = ? ORDER BY id",
+                (session_id,)
+            ).fetchall()
+        return [self._row_to_message(r) for r in rows]
+
+    def append_message(self, session_id: str, message: dict, seq: int):
+        self.insert_messages(session_id, [message])
+
+    def insert_messages(self, session_id: str, messages: list[dict]):
+        """Insert messages in one transaction"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO messages (session_id, role, content, timestamp, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, m.get("role", ""), m.get("content", ""), m.get("timestamp"),
+                     json.dumps(m.get("metadata") or {}))
+                    for m in messages
+                ]
+            )
+
+    def load_recent(self, session_id: str, limit: int) -> tuple[list[dict], int]:
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp, metadata FROM messages WHERE session_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, max(limit, 0))
+            ).fetchall()
+        return [self._row_to_message(r) for r in reversed(rows)], total
+
+    def load_messages_range(self, session_id: str, start: int, end: int) -> list[dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp, metadata FROM messages WHERE session_id = ? "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (session_id, max(end - start, 0), start)
+            ).fetchall()
+        return [self._row_to_message(r) for r in rows]
+
+    def session_stats(self, session_id: str) -> dict:
+        with self._lock:
+            total = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            user = self._conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE session_id = ? AND role = 'user'", (session_id,)
+            ).fetchone()[0]
+        return {"total_messages": total, "user_messages": user}
+
+    def clear_session(self, session_id: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+
+    def load_summary(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, summarized_count FROM summaries WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"summary": row["summary"], "summarized_count": row["summarized_count"]}
+
+    def save_summary(self, session_id: str, summary: str, summarized_count: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO summaries (session_id, summary, summarized_count, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET summary = excluded.summary, "
+                "summarized_count = excluded.summarized_count, updated_at = excluded.updated_at",
+                (session_id, summary, summarized_count, datetime.utcnow().isoformat())
+            )
+
+    def load_profile(self, user_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, name, location, created_at, updated_at FROM profiles WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            prefs = self._conn.execute(
+                "SELECT key, value FROM preferences WHERE user_id = ?", (user_id,)
+            ).fetchall()
+            facts = self._conn.execute(
+                "SELECT fact FROM facts WHERE user_id = ? ORDER BY id", (user_id,)
+            ).fetchall()
+
+        data = {
+            "user_id": row["user_id"],
+            "name": row["name"],
+            "location": json.loads(row["location"]) if row["location"] else None,
+            "preferences": {p["key"]: p["value"] for p in prefs},
+            "facts": [f["fact"] for f in facts],
+            "created_at": row["created_at"]
+        }
+        if row["updated_at"]:
+            data["updated_at"] = row["updated_at"]
+        return data
+
+    def save_profile(self, data: dict):
+        user_id = data["user_id"]
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO profiles (user_id, name, location, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET name = excluded.name, location = excluded.location, "
+                "updated_at = excluded.updated_at",
+                (user_id, data.get("name"), json.dumps(data["location"]) if data.get("location") else None,
+                 data.get("created_at"), data.get("updated_at"))
+            )
+            self._conn.executemany(
+                "INSERT INTO preferences (user_id, key, value) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id, key) DO UPDATE SET value = excluded.value",
+                [(user_id, k, v) for k, v in data.get("preferences", {}).items()]
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO facts (user_id, fact) VALUES (?, ?)",
+                [(user_id, f) for f in data.get("facts", [])]
+            )
+
+    def has_session(self, session_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM messages WHERE session_id = ? LIMIT 1", (session_id,)
+            ).fetchone() is not None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ============ Factory ============
+
+_store_instance: Optional[MemoryStore] = None
+_store_lock = threading.Lock()
+
+def get_store() -> MemoryStore:
+    """Get or create the configured storage backend"""
+    global _store_instance
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                if MEMORY_BACKEND == "sqlite":
+                    _store_instance = SqliteMemoryStore(MEMORY_DB_PATH)
+                else:
+                    _store_instance = JsonMemoryStore(MEMORY_DIR)
+                print(f"[MEMORY] Storage backend: {MEMORY_BACKEND}")
+    return _store_instance
+
+
+# ============ Migration ============
+
+def migrate_json_to_sqlite(source_dir: Path = MEMORY_DIR, db_path: Path = MEMORY_DB_PATH) -> dict:
+    """
+    Import session_*.json / user_*.json (including pending journals) into SQLite.
+    Sessions already present in the database are skipped, so re-running is safe.
+    """
+    source = JsonMemoryStore(source_dir, compact_every=float("inf"))
+    target = SqliteMemoryStore(db_path)
+    counts = {"sessions": 0, "messages": 0, "skipped_sessions": 0, "profiles": 0}
+
+    try:
+        # Sessions that were never compacted only have a journal
+        session_ids = sorted(
+            {p.stem[len("session_"):] for p in Path(source_dir).glob("session_*.json")}
+            | {p.stem[len("session_"):] for p in Path(source_dir).glob("session_*.jsonl")}
+        )
+        for session_id in session_ids:
+            if target.has_session(session_id):
+                counts["skipped_sessions"] += 1
+                continue
+            messages = source.load_messages(session_id)
+            if messages:
+                target.insert_messages(session_id, messages)
+            summary = source.load_summary(session_id)
+            if summary:
+                target.save_summary(session_id, summary["summary"], summary["summarized_count"])
+            counts["sessions"] += 1
+            counts["messages"] += len(messages)
+
+        for profile_file in sorted(Path(source_dir).glob("user_*.json")):
+            data = source.load_profile(profile_file.stem[len("user_"):])
+            if data and data.get("user_id"):
+                target.save_profile(data)
+                counts["profiles"] += 1
+    finally:
+        target.close()
+
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ECHO memory storage tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="Import JSON memory files into SQLite")
+    migrate.add_argument("--source", default=str(MEMORY_DIR), help="Directory with session_*/user_* JSON files")
+    migrate.add_argument("--db", default=str(MEMORY_DB_PATH), help="Target SQLite database path")
+    args = parser.parse_args()
+
+    result = migrate_json_to_sqlite(Path(args.source), Path(args.db))
+    print(f"[MEMORY] Migration complete: {result}")
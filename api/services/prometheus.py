@@ -3,19 +3,36 @@ PROMETHEUS Service - Web Search & Knowledge Synthesis
 Gives NEXUS the ability to search the web for accurate, real-time information.
 
 Uses Tavily API - designed for AI agents, accurate web search
+
+Searches are cached per normalized query (TTL + LRU, concurrent identical
+queries share one Tavily call). The formatted context string and citation
+list are cached with the results, so a hit does no re-formatting.
 """
 
 import os
-import httpx
 from typing import Optional
+from urllib.parse import urlparse
 from ddtrace import tracer
 from dotenv import load_dotenv
 
+from services.cache import AsyncTTLCache
+from services.http_clients import get_http_client
+from services.search_gate import needs_search
+from services.response_cache import normalize_query
+
 # Load environment variables
 load_dotenv()
 
 # Tavily API
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY", "")
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com/search")
+
+# Search cache
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+
+# Search gating: "classifier" (services.search_gate) or "heuristic" (is_question)
+SEARCH_GATE = os.getenv("SEARCH_GATE", "classifier")
 
 print(f"[PROMETHEUS] Tavily API Key: {'CONFIGURED' if TAVILY_API_KEY else 'NOT FOUND'}")
 
@@ -24,7 +41,13 @@ class PrometheusSearch:
     """Web search capability for NEXUS"""
     
     def __init__(self):
-        self.client = httpx.AsyncClient(timeout=15.0)
+        # Failed/mock searches are not cached so the next turn retries
+        self.search_cache = AsyncTTLCache(
+            "prometheus_search",
+            ttl=SEARCH_CACHE_TTL,
+            max_entries=SEARCH_CACHE_MAX_ENTRIES,
+            should_cache=lambda entry: entry is not None and not entry["results"].get("mock")
+        )
     
     @tracer.wrap(service="nexus-prometheus", resource="search")
     async def search(self, query: str, max_results: int = 5) -> dict:
@@ -36,7 +59,7 @@ class PrometheusSearch:
             return {"query": query, "error": "No API key", "mock": True}
         
         try:
-            url = "https://api.tavily.com/search"
+            url = TAVILY_API_URL
             payload = {
                 "api_key": TAVILY_API_KEY,
                 "query": query,
@@ -46,7 +69,7 @@ class PrometheusSearch:
                 "max_results": max_results
             }
             
-            response = await self.client.post(url, json=payload)
+            response = await get_http_client("tavily").post(url, json=payload)
             data = response.json()
             
             if response.status_code == 200:
@@ -100,8 +123,25 @@ class PrometheusSearch:
         
         return "\n".join(parts)
     
-    async def close(self):
-        await self.client.aclose()
+    async def cached_search(self, query: str, max_results: int = 5) -> dict:
+        """
+        Search through the cache.
+        Returns {"results", "context", "sources"} - context and sources are
+        rendered once per cache entry.
+        """
+        async def _fetch():
+            results = await self.search(query, max_results)
+            return {
+                "results": results,
+                "context": self.format_for_context(results),
+                "sources": extract_sources(results),
+            }
+        
+        key = (normalize_query(query), max_results)
+        return await self.search_cache.get_or_fetch(key, _fetch)
+    
+    def cache_stats(self) -> dict:
+        return self.search_cache.stats()
 
 
 # Global instance
@@ -116,6 +156,25 @@ def get_prometheus() -> PrometheusSearch:
 
 # ============ Smart Search Helper ============
 
+def extract_sources(search_results: dict, limit: int = 4) -> list[dict]:
+    """Citation list for the UI: [{"title", "url", "domain"}, ...]"""
+    sources = []
+    for r in search_results.get("results", [])[:limit]:
+        url = r.get("url", "")
+        domain = ""
+        if url:
+            try:
+                domain = urlparse(url).netloc.replace("www.", "")
+            except ValueError:
+                domain = url[:30]
+        
+        sources.append({
+            "title": r.get("title", "")[:80],
+            "url": url,
+            "domain": domain
+        })
+    return sources
+
 def is_question(text: str) -> bool:
     """
     Detect if text is a question that might need factual info.
@@ -137,20 +196,26 @@ def is_question(text: str) -> bool:
     return any(text_lower.startswith(q) for q in question_starters)
 
 
+def should_search(text: str) -> bool:
+    """Gate for PROMETHEUS: does this turn need a web search?"""
+    if SEARCH_GATE == "heuristic":
+        return is_question(text)
+    return needs_search(text)
+
+
 async def search_if_needed(user_query: str) -> str:
     """
-    Smart search: Search for ANY question that might need factual information.
-    This is better than hardcoded keywords - if it looks like a question, search it!
+    Smart search: Search when the turn needs fresh or specific external facts.
+    Conversational, personal and creative turns skip the Tavily round trip.
     """
     
-    # If it's a question, search for it
-    if is_question(user_query):
-        print(f"[PROMETHEUS] Question detected, searching: {user_query[:50]}...")
-        prometheus = get_prometheus()
-        results = await prometheus.search(user_query)
-        return prometheus.format_for_context(results)
+    # If it needs external facts, search for it
+    if should_search(user_query):
+        print(f"[PROMETHEUS] Search needed, searching: {user_query[:50]}...")
+        cached = await get_prometheus().cached_search(user_query)
+        return cached["context"]
     
-    print(f"[PROMETHEUS] Not a question, skipping search: {user_query[:30]}...")
+    print(f"[PROMETHEUS] No search needed, skipping: {user_query[:30]}...")
     return ""
 
 
@@ -159,32 +224,11 @@ async def search_with_sources(user_query: str) -> tuple[str, list[dict]]:
     Search and return both context string AND list of sources for citation display.
     Returns: (context_string, [{"title": ..., "url": ..., "domain": ...}, ...])
     """
-    sources = []
-    
-    if is_question(user_query):
+    if should_search(user_query):
         print(f"[PROMETHEUS] Searching with sources: {user_query[:50]}...")
-        prometheus = get_prometheus()
-        results = await prometheus.search(user_query)
-        
-        # Extract sources for UI
-        for r in results.get("results", [])[:4]:
-            url = r.get("url", "")
-            domain = ""
-            if url:
-                try:
-                    from urllib.parse import urlparse
-                    domain = urlparse(url).netloc.replace("www.", "")
-                except:
-                    domain = url[:30]
-            
-            sources.append({
-                "title": r.get("title", "")[:80],
-                "url": url,
-                "domain": domain
-            })
-        
-        context = prometheus.format_for_context(results)
-        return context, sources
+        cached = await get_prometheus().cached_search(user_query)
+        # Copy so callers can't mutate the cached citation list
+        return cached["context"], [dict(s) for s in cached["sources"]]
     
-    return "", sources
+    return "", []
 
@@ -0,0 +1,184 @@
+"""
+Response Cache - Reuse Gemini answers for repeated questions
+"What's the weather?" asked by many users within minutes needs one
+Vertex AI call, not one per user.
+
+- Key: normalized user input + hash of the shared (non-personal) context,
+  i.e. GAIA and PROMETHEUS data - never memory/profile
+- TTL: bounded by the freshness of the data sources the answer used
+- Optional near-duplicate matching via the local ECHO embedding function,
+  only for questions without numbers or named entities (those need an exact
+  match: "population of Tokyo in 2020" must not answer "... in 2024")
+- Personalized, follow-up or time-of-day questions bypass the cache entirely;
+  the others are answered from shared context only (see context_gatherer)
+"""
+
+import os
+import re
+import time
+import hashlib
+from collections import OrderedDict
+from typing import Optional
+
+from services.vector_index import NUMPY_AVAILABLE
+
+# Configuration
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "900"))              # No time-sensitive sources
+RESPONSE_CACHE_SEARCH_TTL = float(os.getenv("RESPONSE_CACHE_SEARCH_TTL", "600"))  # Answer used web search
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))
+RESPONSE_CACHE_SEMANTIC = NUMPY_AVAILABLE and os.getenv("RESPONSE_CACHE_SEMANTIC", "true").lower() == "true"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+SEMANTIC_CANDIDATES_PER_CONTEXT = 64
+SEMANTIC_MAX_CONTEXTS = 256
+
+# Questions whose answer depends on the user or the conversation so far
+_PERSONAL_RE = re.compile(
+    r"\b(i|i'm|im|me|my|mine|myself|we|us|our|remember|again|earlier|before|last time|"
+    r"you said|that|this|it|he|she|they|them|his|her|their|"
+    r"recommend|suggest|suggestions?|advice|ideas)\b"
+)
+# Follow-ups that only make sense after the previous turn ("why?", "go on")
+_FOLLOW_UP_RE = re.compile(
+    r"^(and|but|so|also|then|ok|okay)\b|\b(what|how) about\b|"
+    r"\b(go on|continue|tell me more|more detail|in detail|elaborate|explain more|else|instead|another one)\b"
+)
+FOLLOW_UP_MAX_WORDS = 2  # "Why?", "Go on", "Why not?" - too short to stand alone
+# Numbers and proper nouns after the first word: near-duplicates differing here are different questions
+_SPECIFIC_RE = re.compile(r"\d|(?<!^)(?<![.?!]\s)\b[A-Z][a-z]+")
+# Questions whose answer depends on the current clock
+_CLOCK_RE = re.compile(r"\b(time|date|clock|o'clock)\b")
+_PUNCT_RE = re.compile(r"[^\w\s']")
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return " ".join(_PUNCT_RE.sub(" ", text.lower()).split())
+
+
+def is_cacheable_query(text: str) -> bool:
+    """False for personalized, follow-up or clock-dependent questions"""
+    normalized = normalize_query(text)
+    return (
+        len(normalized.split()) > FOLLOW_UP_MAX_WORDS
+        and not _PERSONAL_RE.search(normalized)
+        and not _FOLLOW_UP_RE.search(normalized)
+        and not _CLOCK_RE.search(normalized)
+    )
+
+
+def needs_exact_match(text: str) -> bool:
+    """True if the question names a number or entity, so near-duplicate matching is unsafe"""
+    return bool(_SPECIFIC_RE.search(text.strip()))
+
+
+def shared_context_key(*parts: str) -> str:
+    """Hash of the non-personal context an answer was generated from"""
+    return hashlib.sha256("\x1e".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+class ResponseCache:
+    """LRU response cache with per-entry TTL and optional semantic matching"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, semantic: bool = RESPONSE_CACHE_SEMANTIC,
+                 similarity: float = RESPONSE_CACHE_SIMILARITY):
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.similarity = similarity
+
+        # (context_key, normalized query) -> (text, expires_at)
+        self._entries: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+        # context_key -> recent [(embedding, normalized query)] for near-duplicate lookups
+        self._vectors: OrderedDict[str, list] = OrderedDict()
+
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def get(self, query: str, context_key: str) -> Optional[str]:
+        """Cached response for this question under this shared context, or None"""
+        normalized = normalize_query(query)
+        now = time.monotonic()
+
+        text = self._get_live((context_key, normalized), now)
+        if text is not None:
+            self.hits += 1
+            return text
+
+        if self.semantic and not needs_exact_match(query):
+            match = self._nearest(normalized, context_key, now)
+            if match is not None:
+                self.semantic_hits += 1
+                return match
+
+        self.misses += 1
+        return None
+
+    def _get_live(self, key: tuple[str, str], now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def _nearest(self, normalized: str, context_key: str, now: float) -> Optional[str]:
+        """Most similar cached question under the same context, if above the threshold"""
+        from services.vector_index import embed_text
+
+        candidates = self._vectors.get(context_key)
+        if not candidates:
+            return None
+
+        query_vec = embed_text(normalized)
+        best_score, best_query = 0.0, None
+        for vec, cached_query in candidates:
+            score = float(vec @ query_vec)
+            if score > best_score:
+                best_score, best_query = score, cached_query
+        if best_query is None or best_score < self.similarity:
+            return None
+        return self._get_live((context_key, best_query), now)
+
+    def put(self, query: str, context_key: str, text: str, ttl: float):
+        """Store a response for ttl seconds"""
+        normalized = normalize_query(query)
+        key = (context_key, normalized)
+        self._entries[key] = (text, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        self.stores += 1
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        if self.semantic and not needs_exact_match(query):
+            from services.vector_index import embed_text
+            candidates = self._vectors.setdefault(context_key, [])
+            self._vectors.move_to_end(context_key)
+            candidates.append((embed_text(normalized), normalized))
+            del candidates[:-SEMANTIC_CANDIDATES_PER_CONTEXT]
+            # Old contexts (GAIA/search data has since changed) can't produce live hits
+            while len(self._vectors) > SEMANTIC_MAX_CONTEXTS:
+                self._vectors.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# Global instance
+_response_cache = ResponseCache()
+
+def get_response_cache() -> ResponseCache:
+    return _response_cache
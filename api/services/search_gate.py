@@ -0,0 +1,76 @@
+"""
+Search Gate - Decide locally whether a turn needs a PROMETHEUS web search
+Replaces the "starts with a question word or ends in ?" heuristic, which
+sent conversational turns ("can you say that again?") to Tavily and made
+them wait a full search round trip before Gemini started.
+
+A compact weighted-feature model: a handful of precompiled patterns, each
+with a weight, summed against a bias. Runs in a few microseconds, needs no
+model files, and every decision can be explained from its features.
+
+Evaluate on the labelled train/held-out sets: python -m bench.search_gate
+"""
+
+import os
+import re
+
+# Score threshold: search when score > SEARCH_GATE_THRESHOLD
+SEARCH_GATE_THRESHOLD = float(os.getenv("SEARCH_GATE_THRESHOLD", "0.0"))
+SEARCH_GATE_BIAS = -1.0
+
+# (feature name, pattern, weight) - patterns run on lowercased text
+# unless listed in _CASED_FEATURES
+_FEATURES = [
+    # Needs fresh or specific external facts
+    ("freshness", r"\b(latest|news|currently|current|today|tonight|yesterday|this (week|month|year)|"
+                  r"recent|recently|right now|score|scores|price|prices|stock|stocks|released?|"
+                  r"announced|election|won|winner|trending|live|upcoming|next|new)\b", 2.0),
+    ("markets", r"\b(exchange rates?|trading at|bitcoin|ethereum|crypto(currency|currencies)?|market cap|"
+                r"interest rates?|mortgage rates?|inflation|gdp)\b", 2.0),
+    ("fact_lookup", r"\b(who (is|was|are|won|invented|founded|wrote|directed|owns|plays|leads)|"
+                    r"when (is|was|did|does|will)|where (is|was|are)|what year|how (many|much|old|tall|far)|"
+                    r"population|ceo|president|prime minister|founded|net worth|release date|"
+                    r"box office|capital of|headquarter)", 2.0),
+    ("year", r"\b(19|20)\d{2}\b", 1.0),
+    ("question_form", r"(^(who|what|when|where|which|how|is|are|was|were|did|does|will)\b|\?$)", 0.5),
+    # Answerable from the conversation, the model, or GAIA real-time data
+    ("conversational", r"\b(say that again|repeat (that|it)|what did you (just )?say|you (just )?said|"
+                       r"come again|pardon|never ?mind|go on|continue|what do you mean)\b", -3.0),
+    ("smalltalk", r"^(hi|hello|hey|thanks|thank you|good (morning|afternoon|evening|night)|ok|okay|"
+                  r"cool|great|nice|bye|goodbye|yes|no|sure)\b", -3.0),
+    ("about_assistant", r"\b(how are you|who are you|what can you do|your name|are you (a|an|real|alive|human))\b", -2.5),
+    ("personal", r"\b(i|i'm|i've|my|mine|myself|remember)\b|(?<!tell )(?<!give )(?<!show )\bme\b", -1.5),
+    ("task", r"\b(write|compose|draft|rewrite|summari[sz]e|translate|poem|story|joke|essay|email|"
+             r"code|help me|brainstorm|ideas|suggest|recommend)\b", -1.5),
+    ("opinion", r"\b(should i|do you think|what do you think|your opinion|would you|do you like)\b", -1.5),
+    ("arithmetic", r"\d+\s*[-+*/x^%]\s*\d+", -3.0),
+    ("gaia_local", r"\b(weather|temperature|raining|forecast|what time|time is it|"
+                   r"what day is|today's date)\b", -2.5),
+    ("anaphora", r"\b(that|it|this|those|them)\b", -0.5),
+    # Proper nouns after the first word point at a specific entity
+    ("entity", r"(?<!^)(?<![.?!]\s)\b[A-Z][a-z]+", 1.0),
+]
+_CASED_FEATURES = {"entity"}
+
+_COMPILED = [(name, re.compile(pattern), weight, name in _CASED_FEATURES) for name, pattern, weight in _FEATURES]
+
+
+def score_query(text: str) -> tuple[float, list[str]]:
+    """Return (score, names of features that fired)"""
+    stripped = text.strip()
+    lowered = stripped.lower()
+    score = SEARCH_GATE_BIAS
+    fired = []
+    for name, pattern, weight, cased in _COMPILED:
+        if pattern.search(stripped if cased else lowered):
+            score += weight
+            fired.append(name)
+    return score, fired
+
+
+def needs_search(text: str) -> bool:
+    """True if answering text likely needs fresh external facts"""
+    if not text or not text.strip():
+        return False
+    score, _ = score_query(text)
+    return score > SEARCH_GATE_THRESHOLD
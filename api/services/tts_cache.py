@@ -0,0 +1,275 @@
+"""
+TTS Audio Cache - Reuse synthesized speech for repeated text
+Greetings, error fallbacks and cached answers are spoken again and again;
+each repeat was a fresh ElevenLabs call.
+
+- Key: sha256 of (normalized text, voice_id, model_id, output_format)
+- Memory tier: byte-bounded LRU of recent clips
+- Disk tier: one <key>.mp3 per clip under TTS_CACHE_DIR, read through mmap
+  so streaming a cached clip doesn't copy it onto the heap; byte-bounded,
+  least-recently-used files are evicted
+- Pre-warm: fixed phrases are synthesized once at startup if missing
+"""
+
+import os
+import mmap
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Configuration
+TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", "./tts_cache"))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(32 * 1024 * 1024)))
+TTS_CACHE_DISK_BYTES = int(os.getenv("TTS_CACHE_DISK_BYTES", str(512 * 1024 * 1024)))
+TTS_CACHE_MAX_CLIP_BYTES = int(os.getenv("TTS_CACHE_MAX_CLIP_BYTES", str(2 * 1024 * 1024)))  # ~2 min of mp3
+TTS_CACHE_FRAME_BYTES = 16 * 1024  # Chunk size when streaming a cached clip
+
+# Phrases NEXUS speaks verbatim - synthesized once, then always served from cache
+PREWARM_PHRASES = [
+    "I'm having trouble right now.",
+    "I'm having trouble processing that. Let me try again.",
+    "What are your orders?",
+]
+
+
+def normalize_tts_text(text: str) -> str:
+    """Collapse whitespace; case and punctuation are kept since they change the speech"""
+    return " ".join(text.split())
+
+
+def tts_cache_key(text: str, voice_id: str, model_id: str, output_format: str) -> str:
+    raw = "\x1f".join((normalize_tts_text(text), voice_id, model_id, output_format))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """Two-tier (memory LRU + mmap'd files) audio cache"""
+
+    def __init__(
+        self,
+        directory: Path = TTS_CACHE_DIR,
+        memory_bytes: int = TTS_CACHE_MEMORY_BYTES,
+        disk_bytes: int = TTS_CACHE_DISK_BYTES,
+        max_clip_bytes: int = TTS_CACHE_MAX_CLIP_BYTES
+    ):
+        self.directory = Path(directory)
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_clip_bytes = max_clip_bytes
+
+        # Sync TTS runs in worker threads; the streaming path on the event loop
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._disk: OrderedDict[str, int] = OrderedDict()  # key -> file size, LRU order
+        self._disk_used = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        self._scan_disk()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.mp3"
+
+    def _scan_disk(self):
+        """Index existing clips, oldest access first"""
+        if not self.directory.exists():
+            return
+        files = []
+        for path in self.directory.glob("*.mp3"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._disk[key] = size
+            self._disk_used += size
+        for key in self._evict_disk():
+            self._path(key).unlink(missing_ok=True)
+
+    # ============ Lookups ============
+
+    def contains(self, key: str) -> bool:
+        """True if the clip is cached in either tier (no hit/miss counted)"""
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Whole clip as bytes, or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return audio
+            on_disk = key in self._disk
+
+        if on_disk:
+            audio = self._read_disk(key)
+            if audio is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, audio)
+                return audio
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def iter_frames(self, key: str, frame_bytes: int = TTS_CACHE_FRAME_BYTES) -> Optional[Iterator[bytes]]:
+        """
+        Frames of a cached clip, or None.
+        Disk hits are sliced straight from the mmap'd file; the clip is not
+        promoted to the memory tier, so one long replay can't flush it.
+        """
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+            on_disk = key in self._disk
+
+        if audio is not None:
+            return (audio[i:i + frame_bytes] for i in range(0, len(audio), frame_bytes))
+
+        if on_disk:
+            mapped = self._map(key)
+            if mapped is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                return self._mapped_frames(mapped, frame_bytes)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    @staticmethod
+    def _mapped_frames(mapped: mmap.mmap, frame_bytes: int) -> Iterator[bytes]:
+        try:
+            for offset in range(0, len(mapped), frame_bytes):
+                yield mapped[offset:offset + frame_bytes]
+        finally:
+            mapped.close()
+
+    def _map(self, key: str) -> Optional[mmap.mmap]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)  # mtime doubles as last access for eviction after restarts
+        except (OSError, ValueError):
+            # Deleted underneath us, or empty
+            self._forget_disk(key)
+            return None
+        with self._lock:
+            if key in self._disk:
+                self._disk.move_to_end(key)
+        return mapped
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        mapped = self._map(key)
+        if mapped is None:
+            return None
+        try:
+            return mapped[:]
+        finally:
+            mapped.close()
+
+    # ============ Stores ============
+
+    def put(self, key: str, audio: bytes):
+        """Store a clip in both tiers (clips over max_clip_bytes are skipped)"""
+        if not audio or len(audio) > self.max_clip_bytes:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            tmp.write_bytes(audio)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"[TTS CACHE] Disk write failed: {e}")
+            tmp.unlink(missing_ok=True)
+        else:
+            with self._lock:
+                self._disk_used += len(audio) - self._disk.get(key, 0)
+                self._disk[key] = len(audio)
+                self._disk.move_to_end(key)
+                evicted = self._evict_disk()
+            for old_key in evicted:
+                self._path(old_key).unlink(missing_ok=True)
+
+        with self._lock:
+            self._remember(key, audio)
+            self.stores += 1
+
+    def _remember(self, key: str, audio: bytes):
+        """Add to the memory tier (caller holds the lock)"""
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, old = self._memory.popitem(last=False)
+            self._memory_used -= len(old)
+
+    def _evict_disk(self) -> list[str]:
+        """Drop least-recently-used clips over the disk budget (caller holds the lock)"""
+        evicted = []
+        while self._disk_used > self.disk_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_used -= size
+            self.evictions += 1
+            evicted.append(key)
+        return evicted
+
+    def _forget_disk(self, key: str):
+        with self._lock:
+            size = self._disk.pop(key, None)
+            if size is not None:
+                self._disk_used -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_used,
+                "memory_limit": self.memory_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_used,
+                "disk_limit": self.disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global instance
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """Shared cache, or None when TTS_CACHE_ENABLED is off"""
+    global _tts_cache
+    if not TTS_CACHE_ENABLED:
+        return None
+    with _tts_cache_lock:
+        if _tts_cache is None:
+            _tts_cache = TTSCache()
+    return _tts_cache
@@ -0,0 +1,319 @@
+"""
+ECHO Recall Index - Local semantic search over past messages and facts
+In-process, NumPy-backed, no external vector DB.
+
+- Embeddings: pluggable local function (default: hashed word/bigram features)
+- Flat index: exact cosine search over a memory-mapped float32 matrix
+- IVF: coarse k-means partitions, used automatically for large histories
+- Persistence: vectors_<user>.f32 (raw rows) + vectors_<user>.jsonl (payloads)
+  under MEMORY_DIR, both append-only; payloads are read from disk per hit
+
+Benchmark recall latency: python -m bench.vector_index
+"""
+
+import os
+import re
+import json
+import time
+import zlib
+import threading
+import weakref
+from array import array
+from pathlib import Path
+from typing import Callable, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("[WARN] NumPy not installed. ECHO semantic recall disabled.")
+
+from services.memory_store import MEMORY_DIR
+
+# Configuration
+RECALL_ENABLED = NUMPY_AVAILABLE and os.getenv("MEMORY_RECALL_ENABLED", "true").lower() == "true"
+EMBEDDING_DIM = int(os.getenv("MEMORY_EMBEDDING_DIM", "256"))
+RECALL_BUDGET_MS = float(os.getenv("MEMORY_RECALL_BUDGET_MS", "20"))  # Search latency budget
+RECALL_MIN_SCORE = float(os.getenv("MEMORY_RECALL_MIN_SCORE", "0.25"))
+IVF_MIN_VECTORS = int(os.getenv("MEMORY_IVF_MIN_VECTORS", "50000"))  # Switch from flat to IVF above this
+IVF_NPROBE = int(os.getenv("MEMORY_IVF_NPROBE", "8"))
+SCAN_CHUNK_ROWS = 65536  # Rows scored per step of a budgeted flat scan
+TAIL_REMAP_ROWS = 4096   # Re-map the file once this many rows sit in RAM
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+# ============ Embeddings ============
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIM) -> "np.ndarray":
+    """
+    Local embedding via feature hashing of words and word bigrams.
+    Cheap and deterministic; swap in a real model with set_embedding_function().
+    """
+    vec = np.zeros(dim, dtype=np.float32)
+    words = _TOKEN_RE.findall(text.lower())
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vec[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+    norm = np.linalg.norm(vec)
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+# text -> L2-normalized float32 vector of length EMBEDDING_DIM
+_embed: Callable[[str], "np.ndarray"] = hash_embedding
+
+
+def set_embedding_function(embed: Callable[[str], "np.ndarray"]):
+    """Replace the embedding function (must return normalized EMBEDDING_DIM vectors)"""
+    global _embed
+    _embed = embed
+
+
+def embed_text(text: str) -> "np.ndarray":
+    return np.asarray(_embed(text), dtype=np.float32)
+
+
+# ============ IVF Partitioning ============
+
+class IVFPartition:
+    """Coarse k-means quantizer: search only the nprobe closest partitions"""
+
+    def __init__(self, vectors: "np.ndarray", n_lists: int = None, iterations: int = 8, seed: int = 0):
+        n = len(vectors)
+        self.n_lists = n_lists or max(1, int(np.sqrt(n)))
+        self.trained_size = n
+        rng = np.random.default_rng(seed)
+
+        # Train on a sample - full k-means over 1M rows isn't worth it
+        sample = vectors[rng.choice(n, size=min(n, self.n_lists * 64), replace=False)]
+        self.centroids = sample[rng.choice(len(sample), size=self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ self.centroids.T, axis=1)
+            for c in range(self.n_lists):
+                members = sample[assign == c]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    self.centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assign = np.concatenate([
+            np.argmax(vectors[i:i + SCAN_CHUNK_ROWS] @ self.centroids.T, axis=1)
+            for i in range(0, n, SCAN_CHUNK_ROWS)
+        ])
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(self.n_lists + 1))
+        self.lists = [order[bounds[c]:bounds[c + 1]] for c in range(self.n_lists)]
+
+    def candidates(self, query: "np.ndarray", nprobe: int) -> "np.ndarray":
+        """Row ids in the nprobe partitions closest to the query"""
+        nprobe = min(nprobe, self.n_lists)
+        closest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.lists[c] for c in closest])
+
+
+# ============ Vector Index ============
+
+class VectorIndex:
+    """
+    Append-only vector index for one user.
+
+    Rows written before open() are served from a read-only memmap; rows added
+    since are kept in a small in-RAM tail until the next open.
+    """
+
+    def __init__(self, name: str, base_dir: Path = MEMORY_DIR, dim: int = EMBEDDING_DIM):
+        self.name = name
+        self.dim = dim
+        self.vectors_file = Path(base_dir) / f"vectors_{name}.f32"
+        self.payload_file = Path(base_dir) / f"vectors_{name}.jsonl"
+        self._lock = threading.Lock()
+        self._ivf: Optional[IVFPartition] = None
+        self._ivf_training = False
+        self._tail: list["np.ndarray"] = []
+        self._load()
+
+    def _load(self):
+        """
+        Map persisted vectors and index payload line offsets; trim a torn trailing row or payload.
+        Payload JSON (including the message text) stays on disk until a search returns it.
+        """
+        self._offsets = array("q")  # Byte offset of each payload line
+        end = 0
+        if self.payload_file.exists():
+            with open(self.payload_file, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn final append
+                    if line.strip():
+                        self._offsets.append(end)
+                    end += len(line)
+
+        row_bytes = self.dim * 4
+        size = self.vectors_file.stat().st_size if self.vectors_file.exists() else 0
+        count = min(size // row_bytes, len(self._offsets))
+
+        # Crash between the two appends - cut both files back to the consistent length
+        if size != count * row_bytes:
+            with open(self.vectors_file, "r+b") as f:
+                f.truncate(count * row_bytes)
+        if len(self._offsets) != count or (self.payload_file.exists() and self.payload_file.stat().st_size != end):
+            with open(self.payload_file, "r+b") as f:
+                f.truncate(self._offsets[count] if count < len(self._offsets) else end)
+            del self._offsets[count:]
+
+        self._map(count)
+
+    def _read_payloads(self, rows: list[int]) -> dict[int, dict]:
+        """Load the payloads of the given rows from disk"""
+        payloads = {}
+        with open(self.payload_file, "rb") as f:
+            for row in sorted(rows):
+                f.seek(self._offsets[row])
+                try:
+                    payloads[row] = json.loads(f.readline())
+                except json.JSONDecodeError:
+                    payloads[row] = {}
+        return payloads
+
+    def _map(self, count: int):
+        """Memory-map the first count rows of the vectors file"""
+        if count:
+            self._mapped = np.memmap(self.vectors_file, dtype=np.float32, mode="r", shape=(count, self.dim))
+        else:
+            self._mapped = np.zeros((0, self.dim), dtype=np.float32)
+        self._tail = []
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def add(self, text: str, payload: dict):
+        """Embed text and append it with its payload"""
+        vec = embed_text(text)
+        payload = dict(payload, text=text)
+        line = (json.dumps(payload) + "\n").encode("utf-8")
+        with self._lock:
+            with open(self.payload_file, "ab") as f:
+                offset = f.tell()
+                f.write(line)
+            with open(self.vectors_file, "ab") as f:
+                f.write(vec.tobytes())
+            self._offsets.append(offset)
+            self._tail.append(vec)
+            if len(self._tail) >= TAIL_REMAP_ROWS:
+                self._map(len(self._offsets))
+
+    def _maybe_train_ivf(self):
+        """
+        (Re)build IVF partitions once the mapped set is large or has doubled (lock held).
+        Training runs on a background thread; searches use the budgeted flat scan meanwhile.
+        """
+        n = len(self._mapped)
+        if n < IVF_MIN_VECTORS:
+            self._ivf = None
+            return
+        if self._ivf_training or (self._ivf is not None and n < 2 * self._ivf.trained_size):
+            return
+
+        mapped = self._mapped
+        self._ivf_training = True
+
+        def _train():
+            try:
+                ivf = IVFPartition(np.asarray(mapped))
+                with self._lock:
+                    self._ivf = ivf
+            except Exception as e:
+                print(f"[MEMORY] IVF training failed: {e}")
+            finally:
+                self._ivf_training = False
+
+        threading.Thread(target=_train, name=f"nexus-ivf-{self.name}", daemon=True).start()
+
+    def search(self, query: str, k: int = 3, budget_ms: float = RECALL_BUDGET_MS,
+               min_score: float = RECALL_MIN_SCORE, exclude: Callable[[dict], bool] = None) -> list[dict]:
+        """
+        Top-k payloads by cosine similarity.
+        A flat scan stops at the latency budget and returns the best rows seen so far.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        q = embed_text(query)
+        if not q.any():
+            return []
+
+        with self._lock:
+            mapped = self._mapped
+            tail = np.stack(self._tail) if self._tail else None
+            self._maybe_train_ivf()
+            ivf = self._ivf
+        n_mapped = len(mapped)
+
+        ids_parts, score_parts = [], []
+
+        # Newest rows first - they are the likeliest to matter and cheapest to score
+        if tail is not None:
+            ids_parts.append(np.arange(n_mapped, n_mapped + len(tail)))
+            score_parts.append(tail @ q)
+
+        # Flat scan, newest chunk first; with IVF only the rows mapped since training,
+        # which aren't in any partition yet
+        indexed = min(ivf.trained_size, n_mapped) if ivf is not None else 0
+        for end in range(n_mapped, indexed, -SCAN_CHUNK_ROWS):
+            start = max(indexed, end - SCAN_CHUNK_ROWS)
+            ids_parts.append(np.arange(start, end))
+            score_parts.append(np.asarray(mapped[start:end]) @ q)
+            if time.perf_counter() > deadline:
+                break
+
+        if ivf is not None:
+            rows = np.sort(ivf.candidates(q, IVF_NPROBE))
+            ids_parts.append(rows)
+            score_parts.append(np.asarray(mapped[rows]) @ q)
+
+        if not ids_parts:
+            return []
+        ids = np.concatenate(ids_parts)
+        scores = np.concatenate(score_parts)
+
+        # Partial sort - only the best few rows (with slack for exclusions) matter
+        top = min(len(scores), k * 8)
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+
+        best = [i for i in best if scores[i] >= min_score]
+        if not best:
+            return []
+        payloads = self._read_payloads([int(ids[i]) for i in best])
+
+        results = []
+        for i in best:
+            if len(results) >= k:
+                break
+            score = float(scores[i])
+            payload = payloads[int(ids[i])]
+            if exclude is not None and exclude(payload):
+                continue
+            results.append(dict(payload, score=round(score, 4)))
+        return results
+
+
+# ============ Registry ============
+
+# Shared per user so every session of a user appends to the same files;
+# released once no MemoryManager holds it
+_indexes: "weakref.WeakValueDictionary[str, VectorIndex]" = weakref.WeakValueDictionary()
+_indexes_lock = threading.Lock()
+
+def get_vector_index(user_id: str) -> Optional[VectorIndex]:
+    """Get the recall index for a user, or None if recall is disabled"""
+    if not RECALL_ENABLED:
+        return None
+    with _indexes_lock:
+        index = _indexes.get(user_id)
+        if index is None:
+            index = VectorIndex(user_id)
+            _indexes[user_id] = index
+        return index
+
@@ -0,0 +1,124 @@
+"""
+Voice Pipeline - Sentence-chunked TTS over a streaming Gemini response
+Time-to-first-audio was LLM latency + full TTS latency + transfer. Here each
+sentence goes to ElevenLabs as soon as Gemini finishes it, sentences are
+synthesized concurrently (bounded), and audio frames are emitted in sentence
+order as they arrive - so the first audio lands after the first sentence,
+not after the whole answer.
+
+Benchmark against fake LLM/TTS backends: python -m bench.voice_pipeline bench
+Compare base64-JSON vs binary audio transport: python -m bench.voice_pipeline transport
+"""
+
+import os
+import re
+import asyncio
+from typing import AsyncGenerator, AsyncIterator, Callable, Optional
+
+# Configuration
+TTS_MAX_CONCURRENT = int(os.getenv("TTS_MAX_CONCURRENT", "3"))      # Sentences synthesized at once
+MIN_SENTENCE_CHARS = int(os.getenv("TTS_MIN_SENTENCE_CHARS", "24"))  # Shorter pieces merge with the next
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) then whitespace, or a newline
+_BOUNDARY_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n+")
+
+
+class SentenceSplitter:
+    """Incrementally split streamed text into sentences"""
+
+    def __init__(self, min_chars: int = MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> list[str]:
+        """Add a chunk; return the sentences it completed"""
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for match in _BOUNDARY_RE.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        """Whatever is left once the stream ends"""
+        tail, self._buffer = self._buffer.strip(), ""
+        return tail or None
+
+
+async def speak_stream(
+    text_chunks: AsyncIterator[str],
+    tts: Callable[[str], AsyncIterator[bytes]] = None,
+    max_concurrent: int = TTS_MAX_CONCURRENT
+) -> AsyncGenerator[dict, None]:
+    """
+    Pipe streamed LLM text through per-sentence TTS.
+
+    Yields events as they happen:
+      {"type": "text", "chunk": str}                  - every LLM chunk
+      {"type": "sentence", "index": int, "text": str} - before that sentence's audio
+      {"type": "audio", "index": int, "data": bytes}  - audio frames, in sentence order
+    """
+    if tts is None:
+        from services.elevenlabs import text_to_speech_stream
+        tts = text_to_speech_stream
+
+    events: asyncio.Queue = asyncio.Queue()
+    pending: asyncio.Queue = asyncio.Queue()  # (index, sentence, audio queue) in sentence order
+    semaphore = asyncio.Semaphore(max_concurrent)
+    synth_tasks: list[asyncio.Task] = []
+
+    async def _synthesize(sentence: str, frames: asyncio.Queue):
+        try:
+            async with semaphore:
+                async for frame in tts(sentence):
+                    frames.put_nowait(frame)
+        except Exception as e:
+            print(f"[VOICE] TTS failed for sentence: {e}")
+        finally:
+            frames.put_nowait(None)
+
+    def _start(index: int, sentence: str):
+        frames: asyncio.Queue = asyncio.Queue()
+        synth_tasks.append(asyncio.create_task(_synthesize(sentence, frames)))
+        pending.put_nowait((index, sentence, frames))
+
+    async def _read_text():
+        splitter = SentenceSplitter()
+        index = 0
+        try:
+            async for chunk in text_chunks:
+                events.put_nowait({"type": "text", "chunk": chunk})
+                for sentence in splitter.feed(chunk):
+                    _start(index, sentence)
+                    index += 1
+            tail = splitter.flush()
+            if tail:
+                _start(index, tail)
+        finally:
+            pending.put_nowait(None)
+
+    async def _emit_audio():
+        while (item := await pending.get()) is not None:
+            index, sentence, frames = item
+            events.put_nowait({"type": "sentence", "index": index, "text": sentence})
+            while (frame := await frames.get()) is not None:
+                events.put_nowait({"type": "audio", "index": index, "data": frame})
+
+    reader = asyncio.create_task(_read_text())
+    emitter = asyncio.create_task(_emit_audio())
+    finisher = asyncio.create_task(asyncio.wait([reader, emitter]))
+    finisher.add_done_callback(lambda _: events.put_nowait(None))
+
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+        if not reader.cancelled() and reader.exception() is not None:
+            raise reader.exception()
+    finally:
+        # Client went away or the LLM stream failed - stop any outstanding synthesis
+        for task in (reader, emitter, finisher, *synth_tasks):
+            task.cancel()
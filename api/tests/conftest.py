@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# Keep test sessions, profiles and vectors out of the checked-in ./memory directory
+os.environ.setdefault("MEMORY_DIR", tempfile.mkdtemp(prefix="nexus-test-memory-"))
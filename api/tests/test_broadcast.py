@@ -0,0 +1,55 @@
+"""SSE broadcast hub: Last-Event-ID resumes within a boot, and resets a client from an earlier one"""
+
+import asyncio
+
+from services.broadcast import BroadcastHub
+
+
+def _frame_id(frame: bytes) -> str:
+    return frame[4:frame.index(b"\n")].decode()
+
+
+def _primed(hub: BroadcastHub, last_event_id: str = None) -> list[bytes]:
+    """Frames queued for a client subscribing with last_event_id"""
+    async def scenario():
+        subscriber = hub.subscribe(last_event_id)
+        hub.unsubscribe(subscriber)
+        return [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+
+    return asyncio.run(scenario())
+
+
+def _hub_with(updates: int) -> BroadcastHub:
+    hub = BroadcastHub("test", keepalive=0)
+    for update in range(1, updates + 1):
+        hub.publish({"update": update})
+    return hub
+
+
+def test_reconnect_within_a_boot_replays_missed_frames():
+    hub = _hub_with(5)
+
+    frames = _primed(hub, f"{hub.epoch}-3")
+
+    assert [_frame_id(f) for f in frames] == [f"{hub.epoch}-4", f"{hub.epoch}-5"]
+    assert hub.stats()["resumed"] == 1
+
+
+def test_id_from_before_a_restart_gets_the_latest_frame():
+    before = _hub_with(3)
+    last_seen = _frame_id(_primed(before)[-1])
+    restarted = _hub_with(3)  # Same sequence numbers, different boot
+
+    frames = _primed(restarted, last_seen)
+
+    assert restarted.epoch != before.epoch
+    assert [_frame_id(f) for f in frames] == [f"{restarted.epoch}-3"]
+    assert b'"update": 3' in frames[0]
+    assert restarted.stats()["resumed"] == 0
+
+
+def test_malformed_or_legacy_ids_get_the_latest_frame():
+    hub = _hub_with(3)
+
+    for last_event_id in ("3", "garbage", f"{hub.epoch}-x", ""):
+        assert [_frame_id(f) for f in _primed(hub, last_event_id)] == [f"{hub.epoch}-3"]
@@ -0,0 +1,175 @@
+"""AsyncTTLCache: TTL expiry, single-flight fetches and stale-while-revalidate"""
+
+import asyncio
+import time
+
+import pytest
+
+from services.cache import AsyncTTLCache
+
+
+class Upstream:
+    """Counts fetches; each one waits on `release` so callers can pile up"""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = None
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return f"v{self.calls}"
+
+
+def _age(cache: AsyncTTLCache, key, seconds: float):
+    """Backdate an entry instead of sleeping through the TTL"""
+    value, _ = cache._entries[key]
+    cache.set(key, value, stored_at=time.monotonic() - seconds)
+
+
+def test_fresh_values_are_served_until_ttl():
+    cache, upstream = AsyncTTLCache("test", ttl=60), Upstream()
+
+    async def scenario():
+        first = await cache.get_or_fetch("k", upstream.fetch)
+        second = await cache.get_or_fetch("k", upstream.fetch)
+        _age(cache, "k", 61)
+        third = await cache.get_or_fetch("k", upstream.fetch)
+        return first, second, third
+
+    assert asyncio.run(scenario()) == ("v1", "v1", "v2")
+    assert upstream.calls == 2
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_get_ignores_expired_entries():
+    cache = AsyncTTLCache("test", ttl=60, stale_ttl=60)
+    cache.set("k", "v")
+    assert cache.get("k") == "v"
+    _age(cache, "k", 90)
+    assert cache.get("k") is None
+
+
+def test_concurrent_misses_share_one_fetch():
+    cache, upstream = AsyncTTLCache("test", ttl=60), Upstream()
+
+    async def scenario():
+        upstream.release = asyncio.Event()
+        callers = [asyncio.create_task(cache.get_or_fetch("k", upstream.fetch)) for _ in range(50)]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        return await asyncio.gather(*callers)
+
+    assert asyncio.run(scenario()) == ["v1"] * 50
+    assert upstream.calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["coalesced"] == 49
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    cache, upstream = AsyncTTLCache("test", ttl=60), Upstream()
+
+    async def scenario():
+        upstream.release = asyncio.Event()
+        impatient = asyncio.create_task(cache.get_or_fetch("k", upstream.fetch))
+        patient = asyncio.create_task(cache.get_or_fetch("k", upstream.fetch))
+        await asyncio.sleep(0)
+        impatient.cancel()
+        upstream.release.set()
+        return await patient
+
+    assert asyncio.run(scenario()) == "v1"
+    assert cache.get("k") == "v1"
+
+
+def test_stale_value_is_served_while_one_refresh_runs():
+    cache, upstream = AsyncTTLCache("test", ttl=60, stale_ttl=60), Upstream()
+
+    async def scenario():
+        await cache.get_or_fetch("k", upstream.fetch)
+        _age(cache, "k", 90)
+
+        upstream.release = asyncio.Event()
+        served = [await cache.get_or_fetch("k", upstream.fetch) for _ in range(5)]
+        upstream.release.set()
+        await asyncio.sleep(0.01)
+        return served, await cache.get_or_fetch("k", upstream.fetch)
+
+    served, refreshed = asyncio.run(scenario())
+    assert served == ["v1"] * 5  # Never waited on the upstream
+    assert refreshed == "v2"
+    assert upstream.calls == 2
+    assert cache.stats()["stale_hits"] == 5
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_values_past_the_stale_window_are_refetched():
+    cache, upstream = AsyncTTLCache("test", ttl=60, stale_ttl=60), Upstream()
+
+    async def scenario():
+        await cache.get_or_fetch("k", upstream.fetch)
+        _age(cache, "k", 150)
+        return await cache.get_or_fetch("k", upstream.fetch)
+
+    assert asyncio.run(scenario()) == "v2"
+    assert cache.stats()["stale_hits"] == 0
+
+
+def test_failed_background_refresh_keeps_the_stale_value():
+    cache, upstream = AsyncTTLCache("test", ttl=60, stale_ttl=60), Upstream()
+    loop_errors = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: loop_errors.append(ctx))
+        await cache.get_or_fetch("k", upstream.fetch)
+        _age(cache, "k", 90)
+        upstream.fail = True
+        served = await cache.get_or_fetch("k", upstream.fetch)
+        await asyncio.sleep(0.01)
+        return served
+
+    assert asyncio.run(scenario()) == "v1"
+    assert cache.stats()["errors"] == 1
+    assert cache._entries["k"][0] == "v1"
+    assert not loop_errors  # No "Task exception was never retrieved"
+
+
+def test_errors_reach_the_caller_and_are_not_cached():
+    cache, upstream = AsyncTTLCache("test", ttl=60), Upstream()
+    upstream.fail = True
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_fetch("k", upstream.fetch))
+    assert cache.get("k") is None
+
+    upstream.fail = False
+    assert asyncio.run(cache.get_or_fetch("k", upstream.fetch)) == "v2"
+
+
+def test_should_cache_rejects_values():
+    cache = AsyncTTLCache("test", ttl=60, should_cache=lambda value: not value.get("mock"))
+
+    async def mock_fetch():
+        return {"mock": True}
+
+    assert asyncio.run(cache.get_or_fetch("k", mock_fetch)) == {"mock": True}
+    assert cache.get("k") is None
+    assert cache.stats()["errors"] == 1
+
+
+def test_lru_bound_evicts_least_recently_used():
+    cache = AsyncTTLCache("test", ttl=60, max_entries=2)
+
+    async def scenario():
+        for key in ("a", "b"):
+            cache.set(key, key)
+        await cache.get_or_fetch("a", Upstream().fetch)  # Hit refreshes "a"
+        cache.set("c", "c")
+
+    asyncio.run(scenario())
+    assert list(cache._entries) == ["a", "c"]
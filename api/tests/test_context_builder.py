@@ -0,0 +1,67 @@
+"""Context builder: sections are trimmed to the token budget, right up to its boundary"""
+
+import pytest
+
+from services import context_builder, memory, memory_store
+from services.context_builder import TRUNCATION_MARKER, ContextBuilder, _truncate, estimate_tokens
+from services.memory import MemoryManager
+from services.memory_store import JsonMemoryStore
+
+MARKER_TOKENS = estimate_tokens(TRUNCATION_MARKER)
+
+
+@pytest.mark.parametrize("keep", ["head", "tail"])
+def test_text_at_the_budget_is_kept_whole_and_one_token_over_is_cut(keep):
+    text = "\n".join(f"line {i} with some words" for i in range(20))
+    budget = estimate_tokens(text)
+
+    assert _truncate(text, budget, keep) == text
+    cut = _truncate(text, budget - 1, keep)
+    assert TRUNCATION_MARKER in cut
+    assert estimate_tokens(cut) <= budget - 1
+
+
+@pytest.mark.parametrize("keep", ["head", "tail"])
+def test_oversized_line_never_comes_back_whole(keep):
+    line = "x" * 400
+    for max_tokens in range(MARKER_TOKENS + 3):
+        cut = _truncate(line, max_tokens, keep)
+        assert cut != line
+        assert estimate_tokens(cut) <= max_tokens
+
+
+@pytest.mark.parametrize("keep", ["head", "tail"])
+def test_zero_keep_length_drops_the_line(keep, monkeypatch):
+    # Text so dense that no characters fit: a keep length of 0 must mean nothing, not line[-0:]
+    monkeypatch.setattr(context_builder, "estimate_tokens",
+                        lambda text: len(text) * 1000 if "x" in text else estimate_tokens(text))
+
+    assert _truncate("x" * 400, 30, keep) == ""
+
+
+@pytest.mark.parametrize("budget", range(0, 60, 3))
+def test_built_context_fits_every_budget(budget):
+    builder = ContextBuilder(budget)
+    builder.add("gaia", "Weather: 21C, clear", 0, header="[Real-time data]")
+    builder.add("conversation", "\n".join(f"User: q{i}\nNEXUS: a{i}" for i in range(30)), 3,
+                header="[Conversation history]", keep="tail")
+
+    context, usage = builder.build()
+
+    assert estimate_tokens(context) <= budget
+    assert usage["total"] <= budget
+
+
+def test_full_context_is_budgeted(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_store, "_store_instance", JsonMemoryStore(tmp_path))
+    monkeypatch.setattr(memory, "get_vector_index", lambda user_id: None)
+    manager = MemoryManager("alice", "alice-s")
+    for i in range(15):
+        manager.add_exchange(f"question {i} " + "word " * 40, f"answer {i} " + "word " * 40)
+
+    context = manager.get_full_context(budget=200)
+
+    assert estimate_tokens(context) <= 200
+    assert context.startswith("[Conversation history]\n" + TRUNCATION_MARKER)
+    assert "NEXUS: answer 14 " in context
+    assert "question 0 " not in context
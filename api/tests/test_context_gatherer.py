@@ -0,0 +1,90 @@
+"""Context gatherer: a slow or failing ECHO session load doesn't cost GAIA its context"""
+
+import asyncio
+import gc
+
+import pytest
+
+from services import context_gatherer, gaia, memory
+
+
+class GaiaStub:
+    def __init__(self):
+        self.locations = []
+
+    async def build_context(self, location=None):
+        self.locations.append(location)
+        return f"Weather in {(location or {}).get('city', 'Default City')}: 21C"
+
+
+class SessionStub:
+    def get_user_location(self):
+        return {"lat": 48.8566, "lon": 2.3522, "city": "Paris"}
+
+    async def aget_context_sections(self, text):
+        return {"profile": "Name: Alice", "summary": "", "conversation": "", "recall": ""}
+
+
+@pytest.fixture
+def gaia_stub(monkeypatch):
+    stub = GaiaStub()
+    monkeypatch.setattr(gaia, "get_gaia", lambda: stub)
+    monkeypatch.setattr(context_gatherer, "GAIA_LOCATION_TIMEOUT", 0.05)
+    monkeypatch.setattr(context_gatherer, "SOURCE_TIMEOUTS", {"memory": 0.2, "gaia": 0.5, "search": 0.5})
+    return stub
+
+
+def _gather(text: str = "What did I tell you about my trip?"):
+    """Turn context plus any errors asyncio reported as never retrieved"""
+    unhandled = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: unhandled.append(ctx["message"]))
+        result = await context_gatherer.gather_turn_context(text, "alice", "alice-s", search=None)
+        await asyncio.sleep(0.3)  # Let the abandoned session load finish
+        gc.collect()
+        return result
+
+    return asyncio.run(scenario()), unhandled
+
+
+def test_gaia_uses_the_stored_location(gaia_stub, monkeypatch):
+    async def load(user_id, session_id):
+        return SessionStub()
+
+    monkeypatch.setattr(memory, "aget_memory", load)
+
+    result, _ = _gather()
+
+    assert gaia_stub.locations == [{"lat": 48.8566, "lon": 2.3522, "city": "Paris"}]
+    assert "Weather in Paris" in result["context"]
+    assert "Name: Alice" in result["context"]
+
+
+def test_slow_session_load_falls_back_to_the_default_location(gaia_stub, monkeypatch):
+    async def slow_load(user_id, session_id):
+        await asyncio.sleep(0.25)  # Past GAIA's location wait and the memory timeout
+        return SessionStub()
+
+    monkeypatch.setattr(memory, "aget_memory", slow_load)
+
+    result, _ = _gather()
+
+    assert gaia_stub.locations == [None]
+    assert result["timings"]["gaia"]["status"] == "ok"
+    assert result["timings"]["gaia"]["ms"] < 150
+    assert result["timings"]["memory"]["status"] == "timeout"
+    assert "Weather in Default City" in result["context"]
+
+
+def test_failed_abandoned_session_load_is_not_reported_unhandled(gaia_stub, monkeypatch):
+    async def failing_load(user_id, session_id):
+        await asyncio.sleep(0.25)
+        raise OSError("memory store unavailable")
+
+    monkeypatch.setattr(memory, "aget_memory", failing_load)
+
+    result, unhandled = _gather()
+
+    assert result["timings"]["memory"]["status"] == "timeout"
+    assert unhandled == []
@@ -0,0 +1,154 @@
+"""GAIA consumer: the consume thread survives broker errors; the hub is seeded once"""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from consumers import gaia_consumer
+from consumers.gaia_consumer import BatchedGaiaConsumer
+
+
+class Message:
+    def __init__(self, value: dict, offset: int):
+        self._value, self._offset = json.dumps(value).encode(), offset
+
+    def error(self):
+        return None
+
+    def topic(self):
+        return gaia_consumer.GAIA_TOPIC
+
+    def partition(self):
+        return 0
+
+    def offset(self):
+        return self._offset
+
+    def value(self):
+        return self._value
+
+
+class BrokenThenHealthyConsumer:
+    """consume() raises `failures` times, then returns one alert message and nothing after"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.delivered = False
+        self.commits = []
+        self.closed = False
+
+    def consume(self, num_messages, timeout):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("broker transport failure")
+        if not self.delivered:
+            self.delivered = True
+            return [Message({"type": "alert", "message": "Storm"}, 41)]
+        time.sleep(timeout)
+        return []
+
+    def commit(self, offsets, asynchronous=True):
+        self.commits.append([(tp.topic, tp.partition, tp.offset) for tp in offsets])
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(gaia_consumer, "_snapshot", gaia_consumer.GaiaSnapshot.build(0, None, (), (), None))
+    monkeypatch.setattr(gaia_consumer, "_gaia_hub", None)
+
+
+def test_consume_errors_back_off_and_keep_the_thread_alive(fresh_cache, monkeypatch):
+    monkeypatch.setattr(gaia_consumer, "ERROR_BACKOFF_SECONDS", 0.01)
+    kafka = BrokenThenHealthyConsumer(failures=3)
+
+    async def scenario():
+        consumer = BatchedGaiaConsumer(kafka, asyncio.get_running_loop(), batch_timeout=0.01, commit_interval=0.01)
+        consumer.start()
+        applier = asyncio.create_task(consumer.apply_batches())
+        try:
+            for _ in range(300):
+                if gaia_consumer.get_cached_gaia_data()["alerts"]:
+                    break
+                await asyncio.sleep(0.01)
+            return consumer.stats()
+        finally:
+            applier.cancel()
+            await asyncio.to_thread(consumer.stop)
+
+    stats = asyncio.run(scenario())
+
+    assert stats["thread_alive"]
+    assert stats["errors"] == 3
+    assert "broker transport failure" in stats["last_error"]
+    assert gaia_consumer.get_cached_gaia_data()["alerts"][0]["message"] == "Storm"
+    assert (gaia_consumer.GAIA_TOPIC, 0, 42) in [tp for commit in kafka.commits for tp in commit]
+    assert kafka.closed
+
+
+def test_first_update_publishes_one_frame(fresh_cache):
+    async def scenario():
+        gaia_consumer.update_cache({"type": "alert", "message": "Storm"})
+        return gaia_consumer.get_gaia_hub()
+
+    hub = asyncio.run(scenario())
+
+    assert hub.stats()["published"] == 1
+    assert hub._history[-1][1].endswith(gaia_consumer.get_gaia_snapshot().body + b"\n\n")
+
+
+def test_snapshot_weather_stays_on_the_default_city(fresh_cache):
+    from services.gaia import DEFAULT_LAT, DEFAULT_LON, location_key
+
+    def weather(city: str, lat: float, lon: float, temperature: float) -> dict:
+        return {"type": "weather", "temperature": temperature, "weathercode": 1,
+                "location": {"lat": lat, "lon": lon, "name": city}, "location_key": location_key(lat, lon)}
+
+    async def scenario():
+        gaia_consumer.update_cache_bulk([
+            weather("London", 51.5074, -0.1278, 50),
+            weather("New York", DEFAULT_LAT, DEFAULT_LON, 70),
+            weather("Tokyo", 35.6762, 139.6503, 80),
+        ])
+        gaia_consumer.update_cache(weather("Mumbai", 19.0760, 72.8777, 90))
+
+    asyncio.run(scenario())
+
+    snapshot_weather = gaia_consumer.get_cached_gaia_data()["weather"]
+    assert snapshot_weather["location"]["name"] == "New York"
+    assert snapshot_weather["temperature"] == 70
+
+
+def test_other_cities_weather_does_not_bump_the_snapshot(fresh_cache):
+    async def scenario():
+        gaia_consumer.update_cache({"type": "weather", "temperature": 50, "location_key": "gcpvj"})
+
+    asyncio.run(scenario())
+
+    assert gaia_consumer.get_gaia_snapshot().version == 0
+
+
+class HangingCloseConsumer(BrokenThenHealthyConsumer):
+    """Leaving the group never completes (broker unreachable)"""
+
+    def close(self):
+        time.sleep(10)
+
+
+def test_stop_is_bounded_when_close_hangs(fresh_cache):
+    async def scenario():
+        consumer = BatchedGaiaConsumer(HangingCloseConsumer(failures=0), asyncio.get_running_loop(),
+                                       batch_timeout=0.01)
+        consumer.start()
+        start = time.perf_counter()
+        stopped = await asyncio.to_thread(consumer.stop, 0.2)
+        return stopped, time.perf_counter() - start
+
+    stopped, elapsed = asyncio.run(scenario())
+
+    assert not stopped
+    assert elapsed < 1.0
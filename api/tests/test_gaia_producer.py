@@ -0,0 +1,83 @@
+"""GAIA producer: change tracking counts only acknowledged sends; headlines are re-sent"""
+
+import asyncio
+
+import pytest
+
+from consumers import gaia_consumer
+from producers import gaia_producer
+from producers.gaia_producer import ChangeTracker, Location, publish_cycle
+
+LOCATIONS = [Location("Here", 40.0, -74.0), Location("There", 51.5, -0.1)]
+HEADLINES = [{"type": "news", "title": f"Headline {i}", "source": "Wire"} for i in range(3)]
+
+
+class FlakyProducer:
+    """Fails delivery of every message while `failing` is set"""
+
+    def __init__(self):
+        self.failing = False
+        self.sent = []
+
+    async def produce(self, topic, value, key=None):
+        self.sent.append((topic, key))
+        delivery = asyncio.get_running_loop().create_future()
+        if self.failing:
+            delivery.set_exception(RuntimeError("broker unavailable"))
+        else:
+            delivery.set_result(None)
+        return delivery
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    async def fake_weather(locations):
+        return [gaia_producer._weather_event({"temperature_2m": 70, "weather_code": 1}, loc) for loc in locations]
+
+    async def fake_news():
+        return [dict(h) for h in HEADLINES]
+
+    monkeypatch.setattr(gaia_producer, "fetch_weather_all", fake_weather)
+    monkeypatch.setattr(gaia_producer, "fetch_news_headlines", fake_news)
+    monkeypatch.setattr(gaia_producer.random, "random", lambda: 1.0)  # No simulated alerts
+
+
+def _cycle(producer, tracker) -> list[bool]:
+    return asyncio.run(publish_cycle(producer, tracker, LOCATIONS))
+
+
+def test_failed_deliveries_are_retried_next_cycle(sources):
+    producer, tracker = FlakyProducer(), ChangeTracker()
+
+    producer.failing = True
+    assert _cycle(producer, tracker) == [False] * 5
+
+    producer.failing = False
+    assert _cycle(producer, tracker) == [True] * 5
+    assert _cycle(producer, tracker) == []  # Delivered and unchanged
+
+
+def test_unchanged_headlines_are_republished_periodically(sources, monkeypatch):
+    producer, tracker = FlakyProducer(), ChangeTracker(republish_after=3600)
+    _cycle(producer, tracker)
+    assert _cycle(producer, tracker) == []
+
+    monkeypatch.setattr(gaia_producer, "NEWS_REPUBLISH_SECONDS", 0)
+    producer.sent.clear()
+    assert _cycle(producer, tracker) == [True] * 3
+    assert {key for _, key in producer.sent} == {"news"}
+
+
+def test_consumer_drops_repeated_headlines(monkeypatch):
+    class FakeHub:
+        def publish(self, body):
+            pass
+
+    monkeypatch.setattr(gaia_consumer, "get_gaia_hub", lambda: FakeHub())
+    monkeypatch.setattr(gaia_consumer, "_snapshot", gaia_consumer.GaiaSnapshot.build(0, None, (), (), None))
+
+    gaia_consumer.update_cache_bulk([dict(h) for h in HEADLINES])
+    gaia_consumer.update_cache_bulk([dict(h) for h in HEADLINES])  # Periodic re-send
+
+    titles = [item["title"] for item in gaia_consumer.get_cached_gaia_data()["news"]]
+    assert titles == ["Headline 2", "Headline 1", "Headline 0"]
@@ -0,0 +1,106 @@
+"""Gemini: concurrent requests overlap on the event loop instead of queueing behind each other"""
+
+import asyncio
+import time
+
+import pytest
+
+import services.gemini as gemini
+
+MODEL_LATENCY = 0.2  # Seconds per fake model call
+
+
+class SlowStream:
+    def __init__(self, chunks: list[str], delay: float):
+        self.chunks, self.delay = chunks, delay
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(self.delay)
+            yield type("Chunk", (), {"text": chunk})()
+
+
+class SlowModel:
+    """generate_content_async with fixed latency; tracks how many calls overlap"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def generate_content_async(self, prompt, stream=False):
+        user = prompt.rsplit("User: ", 1)[-1].split("\n", 1)[0]
+        if stream:
+            return SlowStream([f"{user} ", "streamed"], MODEL_LATENCY / 2)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(MODEL_LATENCY)
+        finally:
+            self.in_flight -= 1
+        if user == "boom":
+            raise RuntimeError("quota exceeded")
+        return type("Response", (), {"text": f"answer to {user}"})()
+
+
+@pytest.fixture
+def model():
+    previous, fake = gemini.model, SlowModel()
+    gemini.set_model(fake)
+    yield fake
+    gemini.set_model(previous)
+
+
+async def _max_loop_lag(until: asyncio.Future, interval: float = 0.01) -> float:
+    """Worst scheduling delay of a ticker while the requests run"""
+    worst = 0.0
+    while not until.done():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+def test_concurrent_requests_overlap(model):
+    requests = 20
+
+    async def scenario():
+        start = time.perf_counter()
+        turns = asyncio.ensure_future(asyncio.gather(*(gemini.generate_response(f"q{i}") for i in range(requests))))
+        lag = await _max_loop_lag(turns)
+        return await turns, time.perf_counter() - start, lag
+
+    results, elapsed, lag = asyncio.run(scenario())
+
+    assert [r["text"] for r in results] == [f"answer to q{i}" for i in range(requests)]
+    assert model.max_in_flight == requests
+    assert elapsed < MODEL_LATENCY * 3  # Serialized calls would take requests * MODEL_LATENCY
+    assert lag < MODEL_LATENCY / 2
+
+
+def test_concurrent_streams_interleave(model):
+    async def collect(user: str) -> list[tuple[str, float]]:
+        return [(chunk, time.perf_counter()) async for chunk in gemini.generate_response_stream(user)]
+
+    async def scenario():
+        return await asyncio.gather(collect("alice"), collect("bob"))
+
+    alice, bob = asyncio.run(scenario())
+
+    assert "".join(chunk for chunk, _ in alice) == "alice streamed"
+    assert "".join(chunk for chunk, _ in bob) == "bob streamed"
+    # Bob's first chunk arrives before Alice's stream has finished
+    assert bob[0][1] < alice[-1][1]
+
+
+def test_one_failing_request_does_not_affect_the_others(model):
+    async def scenario():
+        return await asyncio.gather(gemini.generate_response("boom"), gemini.generate_response("fine"))
+
+    failed, ok = asyncio.run(scenario())
+
+    assert failed["confidence"] == 0.0
+    assert "quota exceeded" in failed["error"]
+    assert ok["text"] == "answer to fine"
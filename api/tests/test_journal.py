@@ -0,0 +1,58 @@
+"""ECHO journal: appends are folded into the snapshot; crashes mid-write or mid-compaction lose nothing"""
+
+from services.memory_store import JsonMemoryStore
+
+
+def _message(i: int) -> dict:
+    return {"role": "user", "content": f"m{i}", "timestamp": None, "metadata": {}}
+
+
+def _journal_lines(store: JsonMemoryStore, session_id: str) -> list[str]:
+    journal = store._journal_file(session_id)
+    return journal.read_text().splitlines() if journal.exists() else []
+
+
+def _snapshot(store: JsonMemoryStore, session_id: str) -> list[str]:
+    return [m["content"] for m in store._read_session(session_id)]
+
+
+def test_journal_is_folded_into_snapshot_every_n_appends(tmp_path):
+    store = JsonMemoryStore(tmp_path, compact_every=4)
+    for i in range(10):
+        store.append_message("s", _message(i), i)
+
+    # Two compactions (after 4 and 8 appends), two entries journaled since
+    assert _snapshot(store, "s") == [f"m{i}" for i in range(8)]
+    assert len(_journal_lines(store, "s")) == 2
+
+    store.flush_session("s")
+    assert _snapshot(store, "s") == [f"m{i}" for i in range(10)]
+    assert not store._journal_file("s").exists()
+    assert [m["content"] for m in JsonMemoryStore(tmp_path).load_messages("s")] == [f"m{i}" for i in range(10)]
+
+
+def test_torn_journal_line_is_dropped_on_load(tmp_path):
+    store = JsonMemoryStore(tmp_path, compact_every=100)
+    for i in range(3):
+        store.append_message("s", _message(i), i)
+    with open(store._journal_file("s"), "a", encoding="utf-8") as f:
+        f.write('{"seq": 3, "message": {"role": "us')  # Crash mid-append
+
+    reloaded = JsonMemoryStore(tmp_path, compact_every=100)
+    assert [m["content"] for m in reloaded.load_messages("s")] == ["m0", "m1", "m2"]
+
+    # The torn tail was compacted away, so the next append starts on a clean line
+    reloaded.append_message("s", _message(3), 3)
+    assert [m["content"] for m in JsonMemoryStore(tmp_path).load_messages("s")] == ["m0", "m1", "m2", "m3"]
+
+
+def test_crash_between_snapshot_and_truncate_does_not_duplicate(tmp_path):
+    store = JsonMemoryStore(tmp_path, compact_every=100)
+    for i in range(5):
+        store.append_message("s", _message(i), i)
+    journal = store._journal_file("s").read_text()
+    store.flush_session("s")
+    store._journal_file("s").write_text(journal)  # Snapshot written, journal never truncated
+
+    store.append_message("s", _message(5), 5)
+    assert [m["content"] for m in JsonMemoryStore(tmp_path).load_messages("s")] == [f"m{i}" for i in range(6)]
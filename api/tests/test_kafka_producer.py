@@ -0,0 +1,92 @@
+"""Kafka producer: fire-and-forget sends still surface delivery failures"""
+
+import asyncio
+import gc
+import time
+
+from confluent_kafka import KafkaError
+
+from services import kafka_producer
+from services.kafka_producer import AsyncKafkaProducer
+
+
+class FailingProducer:
+    """confluent_kafka.Producer stand-in whose deliveries all fail on the next poll"""
+
+    def __init__(self):
+        self._callbacks = []
+
+    def __len__(self):
+        return len(self._callbacks)
+
+    def produce(self, topic, value=None, key=None, on_delivery=None):
+        self._callbacks.append(on_delivery)
+
+    def poll(self, timeout=0):
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(KafkaError(KafkaError._MSG_TIMED_OUT), None)
+        time.sleep(0.005)  # Keep the poll thread from spinning hot
+        return len(callbacks)
+
+    def flush(self, timeout=None):
+        self.poll()
+        return 0
+
+
+def test_unawaited_delivery_failure_is_logged_and_counted(monkeypatch, capsys):
+    producer = AsyncKafkaProducer({}, producer=FailingProducer(), poll_timeout=0)
+    monkeypatch.setattr(kafka_producer, "get_producer", lambda: producer)
+    loop_errors = []
+
+    async def scenario():
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: loop_errors.append(ctx))
+        assert await kafka_producer.publish_to_kafka("gaia-updates", {"type": "weather"})
+        for _ in range(200):
+            if producer.unawaited_failed:
+                break
+            await asyncio.sleep(0.01)
+        gc.collect()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        producer.close(timeout=0)
+
+    assert producer.stats()["failed"] == 1
+    assert producer.stats()["unawaited_failed"] == 1
+    assert "not awaited" in capsys.readouterr().out
+    assert not loop_errors  # No "Future exception was never retrieved"
+
+
+def test_awaited_delivery_failure_is_reported_to_caller(monkeypatch):
+    producer = AsyncKafkaProducer({}, producer=FailingProducer(), poll_timeout=0)
+    monkeypatch.setattr(kafka_producer, "get_producer", lambda: producer)
+    try:
+        ok = asyncio.run(kafka_producer.publish_to_kafka("gaia-updates", {"type": "weather"}, wait_for_delivery=True))
+    finally:
+        producer.close(timeout=0)
+
+    assert ok is False
+    assert producer.stats()["unawaited_failed"] == 0
+
+
+class StuckProducer(FailingProducer):
+    """poll() and flush() that hang, like a producer that can't reach the broker"""
+
+    def poll(self, timeout=0):
+        time.sleep(10)
+
+    def flush(self, timeout=None):
+        time.sleep(min(timeout, 10))
+        return 1
+
+
+def test_close_is_bounded_when_the_broker_hangs():
+    producer = AsyncKafkaProducer({}, producer=StuckProducer())
+
+    start = time.perf_counter()
+    remaining = producer.close(timeout=0.3)
+
+    assert remaining == 1
+    assert time.perf_counter() - start < 1.0
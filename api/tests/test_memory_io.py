@@ -0,0 +1,97 @@
+"""ECHO memory I/O runs on the dedicated executor, so turn latency doesn't grow with concurrent sessions"""
+
+import asyncio
+import random
+import threading
+import time
+
+import pytest
+
+from services import memory, memory_store
+from services.memory import MemoryManager, aget_memory
+from services.memory_store import JsonMemoryStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JsonMemoryStore(tmp_path, compact_every=5)
+    monkeypatch.setattr(memory_store, "_store_instance", store)
+    monkeypatch.setattr(memory, "get_vector_index", lambda user_id: None)
+    return store
+
+
+def test_async_memory_calls_run_on_the_io_executor(store, monkeypatch):
+    io_threads = []
+    append_message = store.append_message
+
+    def recording_append(session_id, message, seq):
+        io_threads.append(threading.current_thread().name)
+        append_message(session_id, message, seq)
+
+    monkeypatch.setattr(store, "append_message", recording_append)
+    manager = MemoryManager("alice", "alice-s")
+
+    async def scenario():
+        await asyncio.gather(*(manager.aadd_exchange(f"q{i}", f"a{i}") for i in range(20)))
+        return await manager.aget_full_context(), threading.current_thread().name
+
+    context, loop_thread = asyncio.run(scenario())
+
+    assert len(io_threads) == 40
+    assert all(name.startswith("nexus-memory-io") for name in io_threads)
+    assert loop_thread not in io_threads
+
+    manager.flush()
+    contents = [m["content"] for m in JsonMemoryStore(store.base_dir).load_messages("alice-s")]
+    assert sorted(contents) == sorted(f"{kind}{i}" for kind in "qa" for i in range(20))
+    # Each exchange's question and answer stay adjacent despite the concurrent writers
+    assert [(q[0], a[0], q[1:] == a[1:]) for q, a in zip(contents[::2], contents[1::2])] == [("q", "a", True)] * 20
+    assert f"NEXUS: {contents[-1]}" in context
+
+
+def _turn_latencies(sessions: int, turns: int = 5, think: float = 0.1) -> list[float]:
+    """Seconds from when each turn was due until its exchange was stored"""
+    latencies = []
+
+    async def session(i: int):
+        due = time.perf_counter() + random.uniform(0, think)
+        for turn in range(turns):
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            manager = await aget_memory(f"load-{sessions}-u{i}", f"load-{sessions}-s{i}")
+            await manager.aget_context_sections()
+            await manager.aadd_exchange(f"q{turn}", f"a{turn}")
+            done = time.perf_counter()
+            latencies.append(done - due)
+            due = done + think
+
+    async def scenario():
+        await asyncio.gather(*(session(i) for i in range(sessions)))
+
+    asyncio.run(scenario())
+    return latencies
+
+
+def _p99(values: list[float]) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * 0.99), len(values) - 1)]
+
+
+def test_p99_turn_latency_does_not_grow_with_sessions(store, monkeypatch):
+    disk_latency = 0.002
+    append_message, load_messages = store.append_message, store.load_messages
+
+    def slow_append(*args):
+        time.sleep(disk_latency)
+        append_message(*args)
+
+    def slow_load(*args, **kwargs):
+        time.sleep(disk_latency)
+        return load_messages(*args, **kwargs)
+
+    monkeypatch.setattr(store, "append_message", slow_append)
+    monkeypatch.setattr(store, "load_messages", slow_load)
+
+    p99 = {n: _p99(_turn_latencies(n)) for n in (5, 40)}
+
+    # Blocking the loop would make 40 sessions queue behind each other's writes (~40 * 3 * disk_latency)
+    assert p99[40] < max(3 * p99[5], 0.03)
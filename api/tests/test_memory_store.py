@@ -0,0 +1,69 @@
+"""ECHO storage: sessions load only their recent window and page older history on demand"""
+
+import pytest
+
+from services import memory
+from services.memory import MEMORY_WINDOW_MESSAGES, MAX_SHORT_TERM_MESSAGES, ConversationMemory
+from services.memory_store import JsonMemoryStore, SqliteMemoryStore
+
+
+def _message(i: int) -> dict:
+    return {"role": "user" if i % 2 == 0 else "nexus", "content": f"m{i}", "timestamp": None, "metadata": {}}
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SqliteMemoryStore(tmp_path / "echo.db")
+        yield store
+        store.close()
+    else:
+        yield JsonMemoryStore(tmp_path, compact_every=7)
+
+
+def _seed(store, session_id: str, count: int):
+    for i in range(count):
+        store.append_message(session_id, _message(i), i)
+    store.flush_session(session_id)
+
+
+def test_load_keeps_only_recent_window(store):
+    _seed(store, "s", 100)
+
+    conversation = ConversationMemory("s", store=store)
+    assert conversation.message_count == 100
+    assert len(conversation.messages) == MEMORY_WINDOW_MESSAGES
+    assert conversation.messages[0]["content"] == f"m{100 - MEMORY_WINDOW_MESSAGES}"
+    assert [m["content"] for m in conversation.get_context_window(3)] == ["m97", "m98", "m99"]
+
+
+def test_older_messages_are_paged_from_store(store, monkeypatch):
+    _seed(store, "s", 100)
+    conversation = ConversationMemory("s", store=store)
+
+    assert [m["content"] for m in conversation.get_messages(5, 8)] == ["m5", "m6", "m7"]
+    # A range straddling the window joins store rows and in-memory rows
+    first = conversation.first_seq
+    assert [m["content"] for m in conversation.get_messages(first - 2, first + 2)] == [
+        f"m{i}" for i in range(first - 2, first + 2)
+    ]
+
+    # Never summarized: the summarizer's backlog starts before the window
+    pending = conversation.pending_summary_messages()
+    assert [m["content"] for m in pending] == [f"m{i}" for i in range(100 - MAX_SHORT_TERM_MESSAGES)]
+
+
+def test_appends_slide_the_window_and_persist(store):
+    _seed(store, "s", 40)
+    conversation = ConversationMemory("s", store=store)
+    for i in range(40, 55):
+        conversation.add_message("user", f"m{i}")
+    conversation.flush()
+
+    assert conversation.message_count == 55
+    assert len(conversation.messages) == MEMORY_WINDOW_MESSAGES
+    assert conversation.size_bytes == sum(memory._message_size(m) for m in conversation.messages)
+
+    reloaded = ConversationMemory("s", store=store)
+    assert reloaded.message_count == 55
+    assert [m["content"] for m in reloaded.get_messages(0, 55)] == [f"m{i}" for i in range(55)]
@@ -0,0 +1,124 @@
+"""PROMETHEUS search cache: repeated and concurrent searches reach Tavily once"""
+
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services import prometheus
+from services.http_clients import close_http_clients
+from services.prometheus import PrometheusSearch
+
+
+class TavilyStub:
+    """Local Tavily-like endpoint: counts requests, answers after a fixed delay"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.queries = []
+        self.status = 200
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.queries.append(payload["query"])
+                time.sleep(stub.latency)
+                if stub.status == 200:
+                    body = {"answer": "Paris", "results": [
+                        {"title": f"Result {i}", "url": f"https://example{i}.com/a", "content": f"Fact {i}"}
+                        for i in range(payload["max_results"])
+                    ]}
+                else:
+                    body = {"detail": "rate limited"}
+                data = json.dumps(body).encode()
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/search"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def tavily(monkeypatch):
+    stub = TavilyStub()
+    monkeypatch.setattr(prometheus, "TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(prometheus, "TAVILY_API_URL", stub.url)
+    monkeypatch.setattr(prometheus, "_prometheus_instance", PrometheusSearch())
+    yield stub
+    stub.server.shutdown()
+
+
+def _run(scenario):
+    async def _with_clients():
+        try:
+            return await scenario()
+        finally:
+            await close_http_clients()  # Clients are bound to this test's loop
+    return asyncio.run(_with_clients())
+
+
+def test_repeated_and_reworded_queries_hit_the_cache(tavily):
+    async def scenario():
+        first = await prometheus.search_with_sources("Who won the 2024 Tour de France?")
+        second = await prometheus.search_with_sources("who won the 2024 tour de france")
+        return first, second
+
+    (context, sources), (cached_context, cached_sources) = _run(scenario)
+
+    assert len(tavily.queries) == 1
+    assert "SOURCE 1: Result 0" in context
+    assert cached_context == context
+    assert cached_sources == sources and sources[0]["domain"] == "example0.com"
+    stats = prometheus.get_prometheus().cache_stats()
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+
+
+def test_concurrent_identical_searches_share_one_request(tavily):
+    async def scenario():
+        return await asyncio.gather(*(prometheus.search_if_needed("What is the population of Tokyo?")
+                                      for _ in range(10)))
+
+    contexts = _run(scenario)
+
+    assert len(tavily.queries) == 1
+    assert len(set(contexts)) == 1 and contexts[0]
+    assert prometheus.get_prometheus().cache_stats()["coalesced"] == 9
+
+
+def test_callers_cannot_mutate_cached_sources(tavily):
+    async def scenario():
+        _, sources = await prometheus.search_with_sources("Who won the 2024 Tour de France?")
+        sources[0]["title"] = "tampered"
+        sources.clear()
+        return await prometheus.search_with_sources("Who won the 2024 Tour de France?")
+
+    _, sources = _run(scenario)
+    assert sources[0]["title"] == "Result 0"
+
+
+def test_failed_searches_are_not_cached(tavily):
+    tavily.status = 429
+
+    async def scenario():
+        failed = await prometheus.search_if_needed("Who won the 2024 Tour de France?")
+        tavily.status = 200
+        return failed, await prometheus.search_if_needed("Who won the 2024 Tour de France?")
+
+    failed, retried = _run(scenario)
+
+    assert failed == ""
+    assert "SOURCE 1" in retried
+    assert len(tavily.queries) == 2
@@ -0,0 +1,117 @@
+"""Response cache must never serve one user's personalized answer to another"""
+
+import asyncio
+
+import pytest
+
+import services.gemini as gemini
+from services import context_gatherer
+from services.response_cache import ResponseCache
+
+
+class FakeMemory:
+    def __init__(self, sections: dict):
+        self.sections = sections
+
+    async def aget_context_sections(self, query=None):
+        return self.sections
+
+    def get_user_location(self):
+        return None
+
+
+class FakeGaia:
+    async def build_context(self, location=None):
+        return "Current time: Monday\nWeather in New York: Clear sky, 70°F (feels like 70°F)"
+
+
+class FakeModel:
+    """Answers from whatever the prompt says about the user"""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.prompts.append(prompt)
+        liked = "sushi" if "sushi" in prompt else "tacos" if "tacos" in prompt else "food"
+        return type("Response", (), {"text": f"Since you love {liked}, try that place."})()
+
+
+USERS = {
+    "alice": {"profile": "Known about user: I love sushi", "summary": "", "conversation": "User: Dinner ideas?",
+              "recall": ""},
+    "bob": {"profile": "Known about user: I love tacos", "summary": "", "conversation": "User: Dinner ideas?",
+            "recall": ""},
+}
+
+
+@pytest.fixture
+def turn_env(monkeypatch):
+    memories = {user: FakeMemory(sections) for user, sections in USERS.items()}
+
+    async def fake_aget_memory(user_id, session_id=None):
+        return memories.get(user_id) or FakeMemory({})
+
+    model = FakeModel()
+    monkeypatch.setattr("services.memory.aget_memory", fake_aget_memory)
+    monkeypatch.setattr("services.gaia.get_gaia", lambda: FakeGaia())
+    monkeypatch.setattr(gemini, "model", model)
+    monkeypatch.setattr(gemini, "get_response_cache", lambda cache=ResponseCache(semantic=False): cache)
+    return model
+
+
+async def _ask(user_id: str, text: str) -> dict:
+    turn = await context_gatherer.gather_turn_context(text, user_id, f"{user_id}-session", search=None)
+    response = await gemini.generate_response(text, turn["context"], cache=turn["cache"])
+    return {"turn": turn, "response": response}
+
+
+@pytest.mark.parametrize("question", ["Why?", "Go on", "Explain in more detail", "Recommend a good restaurant",
+                                      "What about tomorrow?", "And then what happened?"])
+def test_personal_and_follow_up_questions_are_not_shared(turn_env, question):
+    async def scenario():
+        return await _ask("alice", question), await _ask("bob", question)
+
+    alice, bob = asyncio.run(scenario())
+
+    assert alice["turn"]["cache"] is None and bob["turn"]["cache"] is None
+    assert "sushi" in alice["response"]["text"]
+    assert "tacos" in bob["response"]["text"] and not bob["response"].get("cached")
+    assert len(turn_env.prompts) == 2
+
+
+def test_standalone_questions_are_shared_across_users_with_history(turn_env):
+    async def scenario():
+        return await _ask("alice", "How do volcanoes form?"), await _ask("bob", "How do volcanoes form?")
+
+    alice, bob = asyncio.run(scenario())
+
+    assert alice["turn"]["cache"] is not None
+    assert alice["turn"]["cache"]["key"] == bob["turn"]["cache"]["key"]
+    assert bob["response"].get("cached") is True
+    assert len(turn_env.prompts) == 1
+    # The shared answer was built without anyone's memory
+    assert "sushi" not in turn_env.prompts[0] and "Dinner ideas" not in turn_env.prompts[0]
+    assert "sushi" not in alice["turn"]["context"]
+
+
+@pytest.mark.parametrize("cached, asked", [
+    ("What was the population of Tokyo in 2020?", "What was the population of Tokyo in 2024?"),
+    ("What is the capital of France?", "What is the capital of Spain?"),
+    ("how far is the moon 384400 km", "how far is the moon 384401 km"),
+])
+def test_near_misses_with_different_numbers_or_entities_do_not_match(cached, asked):
+    cache = ResponseCache(semantic=True, similarity=0.5)  # Low bar: anything similar would match
+    cache.put(cached, "ctx", "cached answer", ttl=60)
+
+    assert cache.get(asked, "ctx") is None
+    assert cache.get(cached, "ctx") == "cached answer"  # Exact repeats still hit
+
+
+def test_generic_near_duplicates_still_match_semantically():
+    cache = ResponseCache(semantic=True, similarity=0.85)
+    cache.put("how do volcanoes form", "ctx", "Magma rises...", ttl=60)
+
+    assert cache.get("How do volcanoes form exactly?", "ctx") == "Magma rises..."
+    assert cache.stats()["semantic_hits"] == 1
+    assert cache.get("How do volcanoes form exactly?", "other-ctx") is None  # Different shared context
@@ -0,0 +1,42 @@
+"""Search gate accuracy on queries its weights were not tuned on"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from services.search_gate import needs_search
+
+DATA_DIR = Path(__file__).parent / "data"
+
+# The weights were tuned on the train split only. The held-out split was
+# labelled before the gate ever saw it and must not be used for tuning;
+# once it has been, its rows move to train and a fresh set replaces it.
+HELDOUT_MIN_ACCURACY = 0.9
+
+
+def _load(split: str) -> list[tuple[str, bool]]:
+    with open(DATA_DIR / f"search_gate_{split}.jsonl", encoding="utf-8") as f:
+        return [(row["query"], row["needs_search"]) for row in map(json.loads, f) if row]
+
+
+def _accuracy(labelled: list[tuple[str, bool]]) -> float:
+    return sum(needs_search(text) == label for text, label in labelled) / len(labelled)
+
+
+def test_heldout_accuracy():
+    assert _accuracy(_load("heldout")) >= HELDOUT_MIN_ACCURACY
+
+
+def test_train_accuracy():
+    assert _accuracy(_load("train")) >= HELDOUT_MIN_ACCURACY
+
+
+def test_splits_do_not_overlap():
+    train = {text.lower() for text, _ in _load("train")}
+    assert not train & {text.lower() for text, _ in _load("heldout")}
+
+
+@pytest.mark.parametrize("query", ["", "   ", "\n"])
+def test_blank_turns_skip_search(query):
+    assert not needs_search(query)
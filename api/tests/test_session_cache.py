@@ -0,0 +1,93 @@
+"""Session cache: evicting a session a request still holds must not fork it"""
+
+import threading
+import time
+
+import pytest
+
+from services import memory, memory_store
+from services.memory import SessionCache
+from services.memory_store import JsonMemoryStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JsonMemoryStore(tmp_path, compact_every=5)
+    monkeypatch.setattr(memory_store, "_store_instance", store)
+    monkeypatch.setattr(memory, "get_vector_index", lambda user_id: None)
+    return store
+
+
+def _contents(store: JsonMemoryStore, session_id: str) -> list[str]:
+    return [m["content"] for m in JsonMemoryStore(store.base_dir).load_messages(session_id)]
+
+
+def test_evicted_session_in_use_is_reused(store):
+    cache = SessionCache(max_sessions=1, idle_ttl=3600, max_bytes=1 << 30)
+
+    alice = cache.get("alice", "alice-s")  # Held by an in-flight request
+    alice.add_exchange("q1", "a1")
+    cache.get("bob", "bob-s")  # Evicts and flushes alice mid-request
+    alice.add_exchange("q2", "a2")
+
+    again = cache.get("alice", "alice-s")
+    assert again is alice
+    assert cache.stats()["revived"] == 1
+    again.add_exchange("q3", "a3")
+
+    assert _contents(store, "alice-s") == ["q1", "a1", "q2", "a2", "q3", "a3"]
+
+
+def test_evict_during_concurrent_writes_keeps_every_turn(store):
+    cache = SessionCache(max_sessions=2, idle_ttl=3600, max_bytes=1 << 30)
+    threads, turns = 8, 25
+    errors = []
+
+    def request_loop(worker: int):
+        try:
+            for turn in range(turns):
+                session = cache.get("alice", "alice-s")
+                # Other users' requests push alice out while this one is mid-write
+                cache.get(f"user{worker}", f"other-{worker}-{turn % 3}")
+                session.add_exchange(f"q{worker}-{turn}", f"a{worker}-{turn}")
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=request_loop, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    cache.flush_all()
+
+    assert not errors
+    assert cache.stats()["evictions"] > 0
+    contents = _contents(store, "alice-s")
+    expected = {f"{kind}{w}-{t}" for kind in "qa" for w in range(threads) for t in range(turns)}
+    assert len(contents) == len(expected)
+    assert set(contents) == expected
+
+
+def test_concurrent_misses_share_one_load(store, monkeypatch):
+    cache = SessionCache(max_sessions=4, idle_ttl=3600, max_bytes=1 << 30)
+    loads = []
+    loading = threading.Event()
+    real_manager = memory.MemoryManager
+
+    def slow_manager(user_id, session_id=None):
+        loads.append(session_id)
+        loading.set()
+        time.sleep(0.05)  # Long enough for the other request to miss too
+        return real_manager(user_id, session_id)
+
+    monkeypatch.setattr(memory, "MemoryManager", slow_manager)
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get("alice", "alice-s")))
+    first.start()
+    loading.wait()
+    results.append(cache.get("alice", "alice-s"))
+    first.join()
+
+    assert loads == ["alice-s"]
+    assert results[0] is results[1]
+    assert cache.stats()["misses"] == 1
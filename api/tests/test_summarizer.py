@@ -0,0 +1,98 @@
+"""ECHO rolling summary: evicted messages are folded in the background, and a failed update loses nothing"""
+
+import asyncio
+import time
+
+import pytest
+
+from services import memory, memory_store
+from services.memory import MAX_SHORT_TERM_MESSAGES, SUMMARY_BATCH_MESSAGES, MemoryManager, set_summarizer
+from services.memory_store import JsonMemoryStore
+
+# Exchanges needed before one batch of messages leaves the window
+EXCHANGES_TO_SUMMARIZE = (MAX_SHORT_TERM_MESSAGES + SUMMARY_BATCH_MESSAGES) // 2
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(memory_store, "_store_instance", JsonMemoryStore(tmp_path))
+    monkeypatch.setattr(memory, "get_vector_index", lambda user_id: None)
+    previous = memory._summarizer
+    yield MemoryManager("alice", "alice-s")
+    set_summarizer(previous)
+
+
+async def _fold(previous_summary: str, messages: list[dict]) -> str:
+    return " ".join([previous_summary] + [m["content"] for m in messages]).strip()
+
+
+async def _add_exchanges(manager: MemoryManager, start: int, count: int):
+    for i in range(start, start + count):
+        await manager.aadd_exchange(f"q{i}", f"a{i}")
+
+
+def test_schedule_summary_folds_evicted_messages(manager):
+    set_summarizer(_fold)
+
+    async def scenario():
+        await _add_exchanges(manager, 0, EXCHANGES_TO_SUMMARIZE)
+        await manager._summary_task
+        return await manager.aget_context_sections()
+
+    sections = asyncio.run(scenario())
+
+    folded = SUMMARY_BATCH_MESSAGES // 2
+    assert sections["summary"] == " ".join(f"q{i} a{i}" for i in range(folded))
+    assert manager.conversation.summarized_count == SUMMARY_BATCH_MESSAGES
+    assert sections["conversation"].startswith(f"Previous conversation:\nUser: q{folded}\n")
+
+
+def test_summarization_does_not_block_add_exchange(manager):
+    release = None
+    calls = []
+
+    async def slow_fold(previous_summary, messages):
+        calls.append(len(messages))
+        await release.wait()
+        return await _fold(previous_summary, messages)
+
+    set_summarizer(slow_fold)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        await _add_exchanges(manager, 0, EXCHANGES_TO_SUMMARIZE)
+        start = time.perf_counter()
+        await asyncio.wait_for(_add_exchanges(manager, EXCHANGES_TO_SUMMARIZE, 5), timeout=1.0)
+        elapsed = time.perf_counter() - start
+        pending = not manager._summary_task.done()
+        release.set()
+        await manager._summary_task
+        return elapsed, pending
+
+    elapsed, pending = asyncio.run(scenario())
+
+    assert calls and pending  # The summarizer was still running while the exchanges were stored
+    assert elapsed < 0.5
+    assert manager.conversation.message_count == 2 * (EXCHANGES_TO_SUMMARIZE + 5)
+    assert manager.conversation.summary.startswith("q0 a0")
+
+
+def test_failing_summarizer_leaves_the_window_intact(manager):
+    async def failing(previous_summary, messages):
+        raise RuntimeError("quota exceeded")
+
+    set_summarizer(failing)
+
+    async def scenario():
+        await _add_exchanges(manager, 0, EXCHANGES_TO_SUMMARIZE)
+        await manager._summary_task
+        return await manager.aget_context_sections()
+
+    sections = asyncio.run(scenario())
+
+    assert sections["summary"] == ""
+    assert manager.conversation.summarized_count == 0
+    # Nothing was folded, so nothing left the prompt: the oldest exchange is still there
+    assert sections["conversation"].startswith("Previous conversation:\nUser: q0\nNEXUS: a0")
+    assert f"NEXUS: a{EXCHANGES_TO_SUMMARIZE - 1}" in sections["conversation"]
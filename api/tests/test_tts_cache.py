@@ -0,0 +1,36 @@
+"""TTS cache: cached clips replay off the event loop"""
+
+import asyncio
+import threading
+
+from services import elevenlabs
+from services.tts_cache import TTSCache, tts_cache_key
+
+
+def test_disk_cached_clip_is_read_in_worker_threads(tmp_path, monkeypatch):
+    clip = bytes(range(256)) * 300  # Several frames
+    key = tts_cache_key("What are your orders?", elevenlabs.DEFAULT_VOICE_ID, elevenlabs.MODEL_ID, elevenlabs.OUTPUT_FORMAT)
+    TTSCache(tmp_path, memory_bytes=0).put(key, clip)
+    cache = TTSCache(tmp_path, memory_bytes=0)  # Fresh instance: only the disk tier has the clip
+    monkeypatch.setattr(elevenlabs, "get_tts_cache", lambda: cache)
+
+    reader_threads = set()
+    mapped_frames = TTSCache._mapped_frames
+
+    def recording_frames(mapped, frame_bytes):
+        for frame in mapped_frames(mapped, frame_bytes):
+            reader_threads.add(threading.get_ident())
+            yield frame
+
+    monkeypatch.setattr(TTSCache, "_mapped_frames", staticmethod(recording_frames))
+
+    async def scenario():
+        frames = [frame async for frame in elevenlabs.text_to_speech_stream("What are your orders?")]
+        return frames, threading.get_ident()
+
+    frames, loop_thread = asyncio.run(scenario())
+
+    assert b"".join(frames) == clip
+    assert len(frames) > 1
+    assert cache.stats()["disk_hits"] == 1
+    assert reader_threads and loop_thread not in reader_threads
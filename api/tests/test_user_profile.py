@@ -0,0 +1,48 @@
+"""User profiles are per user: every session sees the stored location, and saves don't drop it"""
+
+import weakref
+
+import pytest
+
+from services import memory, memory_store
+from services.memory import MemoryManager, get_user_profile
+from services.memory_store import JsonMemoryStore, SqliteMemoryStore
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path, monkeypatch):
+    store = SqliteMemoryStore(tmp_path / "echo.db") if request.param == "sqlite" else JsonMemoryStore(tmp_path)
+    monkeypatch.setattr(memory_store, "_store_instance", store)
+    monkeypatch.setattr(memory, "get_vector_index", lambda user_id: None)
+    monkeypatch.setattr(memory, "_profiles", weakref.WeakValueDictionary())
+    yield store
+    if request.param == "sqlite":
+        store.close()
+
+
+def test_location_set_in_one_session_is_seen_by_the_others(store):
+    web = MemoryManager("alice", "demo-session")
+    phone = MemoryManager("alice", "phone-session")
+
+    web.set_user_location(48.8566, 2.3522, "Paris")
+
+    assert phone.get_user_location() == {"lat": 48.8566, "lon": 2.3522, "city": "Paris"}
+
+
+def test_saves_from_other_sessions_keep_the_location(store):
+    web = MemoryManager("alice", "demo-session")
+    phone = MemoryManager("alice", "phone-session")
+    web.set_user_location(48.8566, 2.3522, "Paris")
+
+    phone.add_exchange("I love sushi", "Noted!")  # Fact extraction saves the profile
+
+    stored = store.load_profile("alice")
+    assert stored["location"]["city"] == "Paris"
+    assert stored["facts"] == ["I love sushi"]
+
+
+def test_profile_is_reloaded_once_no_session_holds_it(store):
+    get_user_profile("alice").set_location(35.6762, 139.6503, "Tokyo")
+
+    assert get_user_profile("alice").get_location()["city"] == "Tokyo"
+    assert MemoryManager("bob", "s").get_user_location() is None
@@ -0,0 +1,64 @@
+"""ECHO recall index: rows added after IVF training stay searchable; payloads load lazily"""
+
+import time
+
+import pytest
+
+from services import vector_index
+from services.vector_index import VectorIndex
+
+
+def _wait_for_ivf(index: VectorIndex):
+    deadline = time.monotonic() + 10
+    while index._ivf_training and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def small_ivf(monkeypatch):
+    monkeypatch.setattr(vector_index, "IVF_MIN_VECTORS", 200)
+    monkeypatch.setattr(vector_index, "TAIL_REMAP_ROWS", 50)
+
+
+def test_rows_remapped_after_training_are_found(tmp_path, small_ivf):
+    index = VectorIndex("u1", base_dir=tmp_path)
+    for i in range(200):
+        index.add(f"filler message number {i} about topic t{i}", {"seq": i})
+    index.search("filler message", budget_ms=1e9)
+    _wait_for_ivf(index)
+    assert index._ivf is not None and index._ivf.trained_size == 200
+
+    # 60 more rows: the first 50 get remapped past the trained set, the rest stay in the tail
+    for i in range(200, 260):
+        text = "zebra giraffe safari" if i == 210 else f"later message {i} about topic t{i}"
+        index.add(text, {"seq": i})
+    assert len(index._mapped) == 250 and len(index._tail) == 10
+
+    hits = index.search("zebra giraffe safari", k=1, budget_ms=1e9)
+    assert [h["seq"] for h in hits] == [210]
+    assert hits[0]["text"] == "zebra giraffe safari"
+
+
+def test_reload_reads_payloads_from_disk_and_trims_torn_append(tmp_path):
+    index = VectorIndex("u2", base_dir=tmp_path)
+    for i in range(5):
+        index.add(f"message {i} mentions pancakes" if i == 3 else f"message {i}", {"seq": i})
+    del index
+
+    # Crash mid-append: vector row written, payload line torn
+    with open(tmp_path / "vectors_u2.jsonl", "ab") as f:
+        f.write(b'{"seq": 5, "te')
+    with open(tmp_path / "vectors_u2.f32", "ab") as f:
+        f.write(b"\0" * (vector_index.EMBEDDING_DIM * 4))
+
+    reloaded = VectorIndex("u2", base_dir=tmp_path)
+    assert len(reloaded) == 5
+    assert not hasattr(reloaded, "payloads")
+    assert (tmp_path / "vectors_u2.jsonl").read_bytes().endswith(b"\n")
+    assert (tmp_path / "vectors_u2.f32").stat().st_size == 5 * vector_index.EMBEDDING_DIM * 4
+
+    hits = reloaded.search("pancakes", k=1)
+    assert hits and hits[0]["seq"] == 3 and hits[0]["text"] == "message 3 mentions pancakes"
+
+    reloaded.add("message 5 after restart", {"seq": 5})
+    assert reloaded.search("after restart", k=1)[0]["seq"] == 5
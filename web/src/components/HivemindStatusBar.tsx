@@ -43,7 +43,7 @@ export default function HivemindStatusBar({ className = "" }: HivemindStatusBarP
     useEffect(() => {
         const fetchWeather = async () => {
             try {
-                const res = await fetch("http://localhost:8000/api/gaia/status");
+                const res = await fetch("http://localhost:8000/api/gaia/status?user_id=demo-user");
                 const data = await res.json();
                 if (data.weather?.temperature) {
                     setWeather(`${data.weather.temperature}, ${data.weather.condition}`);
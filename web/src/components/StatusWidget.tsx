@@ -47,7 +47,7 @@ export default function StatusWidget() {
     useEffect(() => {
         const fetchStatus = async () => {
             try {
-                const response = await fetch("http://localhost:8000/api/gaia/status");
+                const response = await fetch("http://localhost:8000/api/gaia/status?user_id=demo-user");
                 if (response.ok) {
                     const data = await response.json();
                     setStatus(data);